@@ -0,0 +1,110 @@
+"""Benchmark: bulk backfill from CFTC annual "futures only" archives.
+
+Writes synthetic deacot<year>.zip files laid out like the real legacy
+annual.txt archives (about 300 contracts a week, all 21 app markets among
+them, plus same-named contracts on other exchanges) and times backfill_from_archives over them.
+
+    python benchmarks/bench_backfill.py [--years 16] [--contracts 300] [--workers N]
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cftc_extractor import backfill_from_archives  # noqa: E402
+
+HEADER = [
+    'Market and Exchange Names', 'As of Date in Form YYMMDD', 'As of Date in Form YYYY-MM-DD',
+    'CFTC Contract Market Code', 'CFTC Market Code in Initials', 'CFTC Region Code',
+    'CFTC Commodity Code', 'Open Interest (All)', 'Noncommercial Positions-Long (All)',
+    'Noncommercial Positions-Short (All)', 'Noncommercial Positions-Spreading (All)',
+    'Commercial Positions-Long (All)', 'Commercial Positions-Short (All)',
+    ' Total Reportable Positions-Long (All)', 'Total Reportable Positions-Short (All)',
+    'Nonreportable Positions-Long (All)', 'Nonreportable Positions-Short (All)',
+] + [f'Filler column {i}' for i in range(110)]
+
+APP_CONTRACTS = [
+    'EURO FX - CHICAGO MERCANTILE EXCHANGE',
+    'BRITISH POUND - CHICAGO MERCANTILE EXCHANGE',
+    'AUSTRALIAN DOLLAR - CHICAGO MERCANTILE EXCHANGE',
+    'NZ DOLLAR - CHICAGO MERCANTILE EXCHANGE',
+    'CANADIAN DOLLAR - CHICAGO MERCANTILE EXCHANGE',
+    'SWISS FRANC - CHICAGO MERCANTILE EXCHANGE',
+    'MEXICAN PESO - CHICAGO MERCANTILE EXCHANGE',
+    'BRAZILIAN REAL - CHICAGO MERCANTILE EXCHANGE',
+    'SO AFRICAN RAND - CHICAGO MERCANTILE EXCHANGE',
+    'JAPANESE YEN - CHICAGO MERCANTILE EXCHANGE',
+    'GOLD - COMMODITY EXCHANGE INC.',
+    'SILVER - COMMODITY EXCHANGE INC.',
+    'COPPER- #1 - COMMODITY EXCHANGE INC.',
+    'STEEL-HRC - COMMODITY EXCHANGE INC.',
+    'LITHIUM HYDROXIDE - COMMODITY EXCHANGE INC.',
+    'CRUDE OIL, LIGHT SWEET-WTI - ICE FUTURES EUROPE',
+    'NATURAL GAS - ICE FUTURES EUROPE',
+    'COFFEE C - ICE FUTURES U.S.',
+    'WHEAT-SRW - CHICAGO MERCANTILE EXCHANGE',
+    'WHEAT-HRW - CHICAGO MERCANTILE EXCHANGE',
+    'MICRO BITCOIN - CHICAGO MERCANTILE EXCHANGE',
+]
+# Same names on exchanges the live fetch doesn't read; the backfill skips them
+OTHER_EXCHANGE_CONTRACTS = [
+    'CRUDE OIL, LIGHT SWEET - NEW YORK MERCANTILE EXCHANGE',
+    'NATURAL GAS - NEW YORK MERCANTILE EXCHANGE',
+    'WHEAT-SRW - CHICAGO BOARD OF TRADE',
+    'WHEAT-HRW - CHICAGO BOARD OF TRADE',
+]
+
+
+def write_archive(folder, year, n_contracts, rng):
+    listed = APP_CONTRACTS + OTHER_EXCHANGE_CONTRACTS
+    contracts = listed + [f'OTHER CONTRACT {i} - SOME EXCHANGE' for i in range(n_contracts - len(listed))]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(HEADER)
+    day = date(year, 1, 1)
+    day += timedelta(days=(1 - day.weekday()) % 7)  # first Tuesday
+    while day.year == year:
+        for i, name in enumerate(contracts):
+            row = [name, day.strftime('%y%m%d'), day.isoformat(), f'{i:06d}', 'XX', '00', '000']
+            row += [rng.randint(0, 500000) for _ in range(len(HEADER) - len(row))]
+            writer.writerow(row)
+        day += timedelta(days=7)
+    path = os.path.join(folder, f'deacot{year}.zip')
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('annual.txt', buffer.getvalue())
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=16)
+    parser.add_argument('--contracts', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as folder:
+        first_year = 2025 - args.years + 1
+        for year in range(first_year, 2026):
+            write_archive(folder, year, args.contracts, rng)
+        size = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+
+        started = time.perf_counter()
+        backfill = backfill_from_archives([folder], max_workers=args.workers)
+        elapsed = time.perf_counter() - started
+
+    rows = sum(len(columns['Date']) for columns in backfill.values())
+    print(f"archives: {args.years} years, {args.contracts} contracts/week, {size / 1e6:.1f} MB zipped")
+    print(f"backfill: {len(backfill)} markets, {rows} rows in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark: replaying the bias-shift and 70% extreme alerts over all history.
+
+Times a per-week loop that applies the latest-week rules of the analysis
+to every prefix of every market (what replaying analyze_market_with_peaks
+week by week amounts to) against backtest_alerts' single stacked pass on
+21 synthetic markets. Both must produce the same (market, date, signal)
+triggers.
+
+    python benchmarks/bench_backtest.py [--years 5 20 40] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cot_analysis import AVERAGE_WEEKS, BIAS_SHIFT_PCT, EXTREME_PCT, backtest_alerts  # noqa: E402
+from cot_store import derive_position_columns  # noqa: E402
+
+pd.set_option("mode.copy_on_write", True)
+
+N_MARKETS = 21
+
+
+def build_markets(weeks, rng):
+    markets = {}
+    for i in range(N_MARKETS):
+        base = rng.integers(20000, 300000)
+        longs = np.maximum(100, base + rng.normal(0, base * 0.05, weeks).cumsum()).astype(np.int64)
+        shorts = np.maximum(100, base + rng.normal(0, base * 0.05, weeks).cumsum()).astype(np.int64)
+        markets[f'MKT{i:02d}/USD'] = derive_position_columns(pd.DataFrame({
+            'Date': pd.date_range(end='2026-02-03', periods=weeks, freq='7D'),
+            'Longs': longs,
+            'Shorts': shorts,
+        }))
+    return markets
+
+
+def loop_backtest(markets_df):
+    """The latest-week rules applied to each week's trailing window, one week at a time"""
+    triggers = []
+    for market, df in markets_df.items():
+        for t in range(len(df)):
+            recent = df.iloc[max(0, t + 1 - AVERAGE_WEEKS):t + 1]
+            latest = recent.iloc[-1]
+            longs_vs_avg = (latest['Longs'] - recent['Longs'].mean()) / recent['Longs'].mean() * 100
+            shorts_vs_avg = (latest['Shorts'] - recent['Shorts'].mean()) / recent['Shorts'].mean() * 100
+            signals = []
+            if longs_vs_avg > BIAS_SHIFT_PCT:
+                signals.append('LONGS BULLISH')
+            elif longs_vs_avg < -BIAS_SHIFT_PCT:
+                signals.append('LONGS BEARISH')
+            if shorts_vs_avg > BIAS_SHIFT_PCT:
+                signals.append('SHORTS BEARISH')
+            elif shorts_vs_avg < -BIAS_SHIFT_PCT:
+                signals.append('SHORTS BULLISH')
+            if latest['Long %'] >= EXTREME_PCT:
+                signals.append('EXTREME BULLISH')
+            elif latest['Short %'] >= EXTREME_PCT:
+                signals.append('EXTREME BEARISH')
+            triggers.extend((market, latest['Date'], signal) for signal in signals)
+    return triggers
+
+
+def _time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', default=[5, 20])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    print(f"{'history':>8} {'triggers':>9} {'loop ms':>10} {'vectorized ms':>14} {'speedup':>8}")
+    for years in args.years:
+        markets = build_markets(years * 52, rng)
+        looped = loop_backtest(markets)
+        vectorized = backtest_alerts(markets)
+        assert sorted(looped) == sorted(zip(vectorized['Market'], vectorized['Date'], vectorized['Signal'])), \
+            "triggers differ"
+
+        loop_s = _time(lambda: loop_backtest(markets), 1)
+        vector_s = _time(lambda: backtest_alerts(markets), args.repeat)
+        print(f"{years:>7}y {len(vectorized):>9} {loop_s * 1000:10.0f} {vector_s * 1000:14.1f} {loop_s / vector_s:7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark: bulk_edit_mode "Save All Changes" with thousands of pasted rows.
+
+Pastes N Date/Longs/Shorts rows into a 20-year market, half of them
+updating existing weeks and half adding new ones, and times the original
+iterrows/concat loop against upsert_positions. Both must agree on
+Date/Longs/Shorts; only the vectorized path recomputes Total/%/Net for
+updated rows, which is checked separately.
+
+    python benchmarks/bench_bulk_upsert.py [--rows 500 2000 5000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cot_store import derive_position_columns, upsert_positions  # noqa: E402
+
+pd.set_option("mode.copy_on_write", True)
+
+HISTORY_WEEKS = 20 * 52
+
+
+def build_market(weeks, rng):
+    return derive_position_columns(pd.DataFrame({
+        'Date': pd.date_range(end='2026-02-03', periods=weeks, freq='7D'),
+        'Longs': rng.integers(1000, 400000, weeks),
+        'Shorts': rng.integers(1000, 400000, weeks),
+    }))
+
+
+def build_paste(df, n_rows, rng):
+    """n_rows editor rows: half overwrite existing weeks, half are new weeks"""
+    n_existing = min(n_rows // 2, len(df))
+    existing = df['Date'].sample(n_existing, random_state=1)
+    new = pd.date_range(df['Date'].iloc[-1] + pd.Timedelta(days=7), periods=n_rows - n_existing, freq='7D')
+    dates = pd.concat([existing, pd.Series(new)], ignore_index=True)
+    return pd.DataFrame({
+        'Date': dates.dt.strftime('%Y-%m-%d'),
+        'Longs': rng.integers(1000, 400000, len(dates)),
+        'Shorts': rng.integers(1000, 400000, len(dates)),
+    })
+
+
+def legacy_save(df, edited_df):
+    """The original per-row mask/concat loop from bulk_edit_mode"""
+    edited_df = edited_df.copy()
+    edited_df['Date'] = pd.to_datetime(edited_df['Date'])
+    full_df = df.copy()
+    for _, row in edited_df.iterrows():
+        mask = full_df['Date'] == row['Date']
+        if mask.any():
+            full_df.loc[mask, 'Longs'] = row['Longs']
+            full_df.loc[mask, 'Shorts'] = row['Shorts']
+        else:
+            total = row['Longs'] + row['Shorts']
+            new_row = pd.DataFrame([{
+                'Date': row['Date'],
+                'Longs': row['Longs'],
+                'Shorts': row['Shorts'],
+                'Total': total,
+                'Long %': round(row['Longs']/total*100, 1) if total > 0 else 0,
+                'Short %': round(row['Shorts']/total*100, 1) if total > 0 else 0,
+                'Net': row['Longs'] - row['Shorts']
+            }])
+            full_df = pd.concat([full_df, new_row], ignore_index=True)
+    return full_df.sort_values('Date').drop_duplicates('Date', keep='last').reset_index(drop=True)
+
+
+def _time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[500, 2000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(5)
+    df = build_market(HISTORY_WEEKS, rng)
+    print(f"market: {len(df)} weeks")
+    print(f"{'pasted rows':>11} {'legacy ms':>10} {'upsert ms':>10} {'speedup':>8}")
+    for n_rows in args.rows:
+        paste = build_paste(df, n_rows, rng)
+        legacy = legacy_save(df, paste)
+        upserted = upsert_positions(df, paste)
+        core = ['Date', 'Longs', 'Shorts']
+        assert legacy[core].astype({'Longs': 'int64', 'Shorts': 'int64'}).equals(upserted[core]), "results differ"
+        assert upserted.equals(derive_position_columns(upserted[core].copy())), "derived columns are stale"
+
+        legacy_s = _time(lambda: legacy_save(df, paste), args.repeat)
+        upsert_s = _time(lambda: upsert_positions(df, paste), args.repeat)
+        print(f"{n_rows:>11} {legacy_s * 1000:10.1f} {upsert_s * 1000:10.1f} {legacy_s / upsert_s:7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
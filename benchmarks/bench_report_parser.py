@@ -0,0 +1,169 @@
+"""Benchmark: streaming report parser vs the original regex-split parser.
+
+Builds a synthetic COT short-format report (same layout as the cftc.gov
+deacmesf.htm pages) with N contract blocks, checks both parsers agree and
+times them. The streaming figures include building the full ReportTable
+(every COMMITMENTS and CHANGES FROM field), which the legacy parser skips.
+
+    python benchmarks/bench_report_parser.py [--blocks 5000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cftc_extractor import CombinedCFTCExtractor  # noqa: E402
+
+CONTRACTS = [
+    ('CANADIAN DOLLAR', 'CHICAGO MERCANTILE EXCHANGE'),
+    ('EURO FX', 'CHICAGO MERCANTILE EXCHANGE'),
+    ('JAPANESE YEN', 'CHICAGO MERCANTILE EXCHANGE'),
+    ('GOLD', 'COMMODITY EXCHANGE INC.'),
+    ('COPPER- #1', 'COMMODITY EXCHANGE INC.'),
+    ('COFFEE C', 'ICE FUTURES U.S.'),
+    ('BRENT CRUDE OIL LAST DAY', 'ICE FUTURES EUROPE'),
+]
+
+BLOCK_TEMPLATE = """\
+{name} - {exchange}                              Code-{code:06d}
+FUTURES ONLY POSITIONS AS OF 02/03/26                                |
+---------------------------------------------------------------------| NONREPORTABLE
+         NON-COMMERCIAL          |   COMMERCIAL    |      TOTAL      |   POSITIONS
+---------------------------------|-----------------|-----------------|-----------------
+   LONG   |  SHORT   | SPREADING |  LONG  | SHORT  |  LONG  | SHORT  |  LONG  | SHORT
+------------------------------------------------------------------------------------------
+(CONTRACTS OF 100,000 UNITS)                               OPEN INTEREST:   {oi:,}
+COMMITMENTS
+{commitments}
+
+CHANGES FROM 01/27/26 (CHANGE IN OPEN INTEREST:     {doi:,})
+{changes}
+
+PERCENT OF OPEN INTEREST FOR EACH CATEGORY OF TRADERS
+   12.1     30.2      1.0     50.1     40.3     63.2     71.5     36.8     28.5
+
+NUMBER OF TRADERS IN EACH CATEGORY (TOTAL TRADERS:   {traders})
+      23       31        9       40       35       66       70
+
+"""
+
+
+def _row(values):
+    return "".join(f"{v:>9,}" for v in values)
+
+
+def build_report(n_blocks, seed=7):
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Commitments of Traders - Futures Only</title></head><body><pre>\n"]
+    for i in range(n_blocks):
+        name, exchange = CONTRACTS[i % len(CONTRACTS)]
+        commitments = [rng.randint(0, 400000) for _ in range(9)]
+        changes = [rng.randint(-20000, 20000) for _ in range(9)]
+        parts.append(BLOCK_TEMPLATE.format(
+            name=f"{name} {i}" if i >= len(CONTRACTS) else name,
+            exchange=exchange,
+            code=i,
+            oi=sum(commitments[5:7]),
+            doi=changes[0],
+            commitments=_row(commitments),
+            changes=_row(changes),
+            traders=rng.randint(20, 400),
+        ))
+    parts.append("</pre></body></html>\n")
+    return "".join(parts)
+
+
+def legacy_parse_report_text(text):
+    """The original re.split implementation of parse_report_text"""
+    commodity_blocks = re.split(r'NUMBER OF TRADERS IN EACH CATEGORY', text, flags=re.IGNORECASE)
+    data = {}
+    for block in commodity_blocks:
+        name_match = re.search(r'([A-Z][A-Z0-9#\s,\-\.]+)\s*-\s*(CHICAGO MERCANTILE EXCHANGE|COMMODITY EXCHANGE INC\.|ICE FUTURES EUROPE|ICE FUTURES U\.S\.)', block, re.IGNORECASE)
+        if name_match:
+            commodity_name = name_match.group(1).strip()
+            commitments_match = re.search(r'COMMITMENTS\s+([\d,\s-]+)', block, re.IGNORECASE)
+            if commitments_match:
+                numbers = re.findall(r'[-]?\d+', commitments_match.group(1).replace(',', ''))
+                if len(numbers) >= 8:
+                    noncomm_long = int(numbers[0])
+                    noncomm_short = int(numbers[1])
+                    total_positions = noncomm_long + noncomm_short
+                    data[commodity_name] = {
+                        'longs': noncomm_long,
+                        'shorts': noncomm_short,
+                        'net': noncomm_long - noncomm_short,
+                        'long_percent': round((noncomm_long / total_positions * 100) if total_positions > 0 else 0, 2),
+                        'short_percent': round((noncomm_short / total_positions * 100) if total_positions > 0 else 0, 2),
+                        'total': total_positions
+                    }
+    return data
+
+
+def _time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = build_report(args.blocks)
+    extractor = CombinedCFTCExtractor()
+
+    legacy = legacy_parse_report_text(text)
+    streamed = extractor.parse_report_text(text, 'BENCH')
+    assert legacy == streamed, "streaming parser output differs from the legacy parser"
+    assert extractor.report_date == '2026-02-03'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, 'report.htm')
+        with open(report_path, 'w') as f:
+            f.write(text)
+
+        def parse_file():
+            with open(report_path) as f:
+                return extractor.parse_report_stream(f, 'BENCH')
+
+        def parse_file_legacy():
+            with open(report_path) as f:
+                return legacy_parse_report_text(f.read())
+
+        assert parse_file() == legacy
+
+        rows = [
+            ("legacy re.split (text)", _time(lambda: legacy_parse_report_text(text), args.repeat),
+             _peak_memory(lambda: legacy_parse_report_text(text))),
+            ("streaming (text)", _time(lambda: extractor.parse_report_text(text, 'BENCH'), args.repeat),
+             _peak_memory(lambda: extractor.parse_report_text(text, 'BENCH'))),
+            ("legacy re.split (file)", _time(parse_file_legacy, args.repeat), _peak_memory(parse_file_legacy)),
+            ("streaming (file)", _time(parse_file, args.repeat), _peak_memory(parse_file)),
+        ]
+
+    print(f"report: {args.blocks} blocks, {len(text) / 1e6:.1f} MB, {len(streamed)} contracts")
+    for label, seconds, peak in rows:
+        print(f"{label:<24}: {seconds * 1000:8.1f} ms  peak {peak / 1e6:6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
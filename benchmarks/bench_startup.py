@@ -0,0 +1,123 @@
+"""Benchmark: cold start of the forex_data app, broken down by phase.
+
+Every repeat is a fresh interpreter that times the imports one group at a
+time (numpy, pandas, streamlit, the app's own modules) and then runs one
+pass of forex_data.py through Streamlit's AppTest against a temporary
+data directory. The script phases come from the app's startup_phases
+marks: its own imports, first paint (title drawn), data loaded and UI
+drawn. Time to first paint is the import groups plus the first paint mark.
+
+A priming run builds the store first (reported as "first launch"); the
+repeats then start against the existing store, as a normal launch does.
+The run fails with exit status 1 if a lazily imported module (requests,
+sqlite3, the process pool) was loaded, or if the median time to first
+paint exceeds --budget-ms, so it doubles as a startup regression check.
+The pytest suite (test_cot_store.py) guards the same lazy imports and the
+snapshot load path on every run.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--budget-ms 2500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, 'forex_data.py')
+
+IMPORT_GROUPS = [
+    ('import numpy', ['numpy']),
+    ('import pandas', ['pandas']),
+    ('import streamlit', ['streamlit']),
+    ('import app modules', ['cftc_extractor', 'cot_store', 'cot_analysis', 'cot_report']),
+]
+SCRIPT_PHASES = ['imports', 'first paint', 'data loaded', 'ui drawn']
+LAZY_MODULES = ['requests', 'sqlite3', 'concurrent.futures.process']
+
+
+def child(data_dir):
+    """One cold start; prints a JSON record of phase timings"""
+    timings = {}
+    sys.path.insert(0, ROOT)
+    for label, modules in IMPORT_GROUPS:
+        started = time.perf_counter()
+        for module in modules:
+            __import__(module)
+        timings[label] = (time.perf_counter() - started) * 1000
+
+    from datetime import datetime
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(data_dir)
+    at = AppTest.from_file(APP, default_timeout=120)
+    # Friday auto-fetch would hit the network; mark it as already done today
+    at.session_state['last_auto_fetch'] = datetime.now().date()
+    started = time.perf_counter()
+    at.run()
+    timings['script run'] = (time.perf_counter() - started) * 1000
+    phases = at.session_state['startup_phases']
+    print(json.dumps({
+        'imports': timings,
+        'phases': phases,
+        'exceptions': [e.value for e in at.exception],
+        'lazy_loaded': [m for m in LAZY_MODULES if m in sys.modules],
+    }))
+
+
+def run_child(data_dir):
+    # TMPDIR keeps the app's temp folder inside the benchmark's directory
+    env = dict(os.environ, TMPDIR=data_dir)
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', data_dir],
+                         capture_output=True, text=True, env=env, check=True).stdout
+    record = json.loads(out.strip().splitlines()[-1])
+    if record['exceptions']:
+        raise RuntimeError(f"app raised: {record['exceptions']}")
+    return record
+
+
+def first_paint_ms(record):
+    return sum(record['imports'][label] for label, _ in IMPORT_GROUPS) + record['phases']['first paint']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, help="fail if median time to first paint exceeds this")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return 0
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        priming = run_child(data_dir)
+        records = [run_child(data_dir) for _ in range(args.repeat)]
+
+    print(f"{'phase':<24} {'first launch':>12} {'median ms':>10} {'min ms':>8}")
+    rows = [(label, lambda r, label=label: r['imports'][label]) for label, _ in IMPORT_GROUPS]
+    rows += [(f"script: {phase}", lambda r, phase=phase: r['phases'][phase]) for phase in SCRIPT_PHASES]
+    rows += [('script run (total)', lambda r: r['imports']['script run']),
+             ('time to first paint', first_paint_ms)]
+    for label, value in rows:
+        values = [value(r) for r in records]
+        print(f"{label:<24} {value(priming):12.0f} {statistics.median(values):10.0f} {min(values):8.0f}")
+
+    failures = []
+    lazy = sorted({m for r in [priming, *records] for m in r['lazy_loaded']})
+    print(f"lazily imported modules loaded at startup: {', '.join(lazy) or 'none'}")
+    if lazy:
+        failures.append(f"eagerly imported: {', '.join(lazy)}")
+    median_paint = statistics.median(first_paint_ms(r) for r in records)
+    if args.budget_ms is not None and median_paint > args.budget_ms:
+        failures.append(f"time to first paint {median_paint:.0f} ms > budget {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
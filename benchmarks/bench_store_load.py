@@ -0,0 +1,102 @@
+"""Benchmark: cold-load time of the JSON, memory-mapped columnar and SQLite stores.
+
+Writes 21 synthetic markets at 13 weeks, 5 years and 20 years of weekly
+history to each backend and times a fresh store object's load(). "touch"
+adds summing every column, which is when mapped pages are actually read.
+The OS page cache is not dropped between runs.
+
+    python benchmarks/bench_store_load.py [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cot_store import MarketStore, ColumnarStore, SQLiteStore, migrate_json_store  # noqa: E402
+
+N_MARKETS = 21
+SIZES = [('13 weeks', 13), ('5 years', 5 * 52), ('20 years', 20 * 52)]
+
+
+def build_markets(weeks, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end='2026-02-03', periods=weeks, freq='7D')
+    markets = {}
+    for i in range(N_MARKETS):
+        longs = rng.integers(1000, 400000, weeks)
+        shorts = rng.integers(1000, 400000, weeks)
+        total = longs + shorts
+        markets[f'MKT{i:02d}/USD'] = pd.DataFrame({
+            'Date': dates,
+            'Longs': longs,
+            'Shorts': shorts,
+            'Total': total,
+            'Long %': np.round(longs / total * 100, 1),
+            'Short %': np.round(shorts / total * 100, 1),
+            'Net': longs - shorts,
+        })
+    return markets
+
+
+def _time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _touch(markets_df):
+    return sum(float(df[c].to_numpy().sum()) for df in markets_df.values() for c in df.columns if c != 'Date')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'history':<10} {'backend':<20} {'load ms':>9} {'touch ms':>9} {'disk KB':>9}")
+    for label, weeks in SIZES:
+        markets = build_markets(weeks)
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, 'store.json')
+            json_store = MarketStore(json_path)
+            json_store.sync(markets)
+            json_store.compact()
+            migrate_json_store(json_path, ColumnarStore(os.path.join(tmp, 'columnar')))
+            migrate_json_store(json_path, ColumnarStore(os.path.join(tmp, 'columnar_z'), compress=True))
+            sqlite_path = os.path.join(tmp, 'store.sqlite')
+            migrate_json_store(json_path, SQLiteStore(sqlite_path))
+
+            backends = [
+                ('json', lambda: MarketStore(json_path).load(), [json_path]),
+                ('columnar mmap', lambda: ColumnarStore(os.path.join(tmp, 'columnar')).load(),
+                 [os.path.join(tmp, 'columnar')]),
+                ('columnar npz', lambda: ColumnarStore(os.path.join(tmp, 'columnar_z')).load(),
+                 [os.path.join(tmp, 'columnar_z')]),
+                ('sqlite', lambda: SQLiteStore(sqlite_path).load(), [sqlite_path]),
+            ]
+            for name, load, paths in backends:
+                loaded = load()
+                assert all(loaded[m].equals(markets[m]) for m in markets), f"{name} round trip differs"
+                disk = 0
+                for path in paths:
+                    if os.path.isdir(path):
+                        disk += sum(os.path.getsize(os.path.join(root, f))
+                                    for root, _, files in os.walk(path) for f in files)
+                    else:
+                        disk += os.path.getsize(path)
+                load_s = _time(load, args.repeat)
+                touch_s = _time(lambda: _touch(load()), args.repeat)
+                print(f"{label:<10} {name:<20} {load_s * 1000:9.1f} {touch_s * 1000:9.1f} {disk / 1024:9.0f}")
+
+
+if __name__ == '__main__':
+    main()
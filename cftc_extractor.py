@@ -0,0 +1,870 @@
+"""CFTC Commitments of Traders report fetching and parsing.
+
+Kept free of Streamlit so it can be imported by worker processes,
+benchmarks and scripts as well as by the forex_data app.
+"""
+import re
+import io
+import csv
+import json
+import os
+import time
+import hashlib
+import zipfile
+from itertools import islice
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# -------------------------------
+# RAW REPORT CACHE
+# -------------------------------
+class RawReportCache:
+    """On-disk cache of raw CFTC report pages with their HTTP validators.
+
+    Each source keeps up to ``max_versions`` distinct page bodies (newest first).
+    Older versions are evicted once they exceed the cap or ``max_age_days``;
+    the newest version is always kept so the app can run offline from it.
+    """
+
+    def __init__(self, cache_dir, max_versions=4, max_age_days=120):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+        self.max_versions = max_versions
+        self.max_age_days = max_age_days
+        self.index = self._load_index()
+
+    def _load_index(self):
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r') as f:
+                    return json.load(f)
+            except Exception:
+                return {}
+        return {}
+
+    def latest(self, source):
+        versions = self.index.get(source, [])
+        return versions[0] if versions else None
+
+    def conditional_headers(self, source):
+        """If-None-Match / If-Modified-Since headers for the newest cached page"""
+        entry = self.latest(source)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read(self, source):
+        entry = self.latest(source)
+        if entry is None:
+            return None
+        path = self.cache_dir / entry['file']
+        if not path.exists():
+            return None
+        return path.read_text(encoding='utf-8')
+
+    def store(self, source, url, text, content_hash, etag=None, last_modified=None, report_date=""):
+        """Record a downloaded page, reusing the newest version if the body is unchanged"""
+        now = datetime.now().isoformat(timespec='seconds')
+        entry = self.latest(source)
+        if entry and entry['sha256'] == content_hash:
+            entry.update({'etag': etag, 'last_modified': last_modified, 'checked_at': now})
+        else:
+            file_name = f"{source}_{content_hash[:16]}.htm"
+            (self.cache_dir / file_name).write_text(text, encoding='utf-8')
+            self.index.setdefault(source, []).insert(0, {
+                'url': url,
+                'file': file_name,
+                'sha256': content_hash,
+                'etag': etag,
+                'last_modified': last_modified,
+                'report_date': report_date,
+                'fetched_at': now,
+                'checked_at': now,
+            })
+        self._evict(source)
+
+    def touch(self, source):
+        """Mark the newest cached page as confirmed current (HTTP 304)"""
+        entry = self.latest(source)
+        if entry:
+            entry['checked_at'] = datetime.now().isoformat(timespec='seconds')
+
+    def _evict(self, source):
+        versions = self.index.get(source, [])
+        cutoff = datetime.now() - timedelta(days=self.max_age_days)
+        keep = versions[:1] + [
+            v for v in versions[1:self.max_versions]
+            if datetime.fromisoformat(v['fetched_at']) >= cutoff
+        ]
+        kept_files = {v['file'] for v in keep}
+        for v in versions:
+            if v['file'] not in kept_files:
+                (self.cache_dir / v['file']).unlink(missing_ok=True)
+        self.index[source] = keep
+
+    def flush(self):
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def clear(self):
+        for path in self.cache_dir.glob('*'):
+            path.unlink(missing_ok=True)
+        self.index = {}
+
+# -------------------------------
+# STREAMING REPORT PARSER
+# -------------------------------
+REPORT_DATE_PATTERN = re.compile(r'FUTURES ONLY POSITIONS AS OF (\d{2}/\d{2}/\d{2})', re.IGNORECASE)
+# Exchanges of the contracts the app reads, in the order of the report pages
+# (CombinedCFTCExtractor.REPORT_URLS)
+REPORT_EXCHANGES = ('CHICAGO MERCANTILE EXCHANGE', 'COMMODITY EXCHANGE INC.', 'ICE FUTURES U.S.', 'ICE FUTURES EUROPE')
+CONTRACT_NAME_PATTERN = re.compile(
+    r'([A-Z][A-Z0-9#\s,\-\.]+)\s*-\s*(' + '|'.join(re.escape(exchange) for exchange in REPORT_EXCHANGES) + ')',
+    re.IGNORECASE
+)
+# Keywords are looked up with str.find on the upper-cased text; the patterns
+# then only run on the line holding a keyword
+COMMITMENTS_KEYWORD = 'COMMITMENTS'
+TRADERS_KEYWORD = 'NUMBER OF TRADERS IN EACH CATEGORY'
+OPEN_INTEREST_PATTERN = re.compile(r'(?<!CHANGE IN )OPEN INTEREST:\s*([\d,]+)', re.IGNORECASE)
+CHANGES_PATTERN = re.compile(r'CHANGES FROM\s+\d{2}/\d{2}/\d{2}.*?OPEN INTEREST:\s*(-?[\d,]+)', re.IGNORECASE)
+NUMERIC_PREFIX_PATTERN = re.compile(r'[\d,\s-]*')
+# Chunk size: characters of a file or string, lines of any other iterable
+REPORT_CHUNK_CHARS = 1 << 16
+REPORT_CHUNK_LINES = 1024
+
+
+def _format_report_date(mmddyy):
+    month, day, year = mmddyy.split('/')
+    return f"20{year}-{month}-{day}"
+
+
+def _build_position_record(numbers):
+    """Non-commercial positioning record from the numbers of a COMMITMENTS row"""
+    noncomm_long = int(numbers[0])
+    noncomm_short = int(numbers[1])
+    net_position = noncomm_long - noncomm_short
+    total_positions = noncomm_long + noncomm_short
+    long_percent = (noncomm_long / total_positions * 100) if total_positions > 0 else 0
+    short_percent = (noncomm_short / total_positions * 100) if total_positions > 0 else 0
+    return {
+        'longs': noncomm_long,
+        'shorts': noncomm_short,
+        'net': net_position,
+        'long_percent': round(long_percent, 2),
+        'short_percent': round(short_percent, 2),
+        'total': total_positions
+    }
+
+
+def iter_report_chunks(source):
+    """Report text in chunks from a string, a text file object or an iterable of lines"""
+    if isinstance(source, str):
+        for start in range(0, len(source), REPORT_CHUNK_CHARS):
+            yield source[start:start + REPORT_CHUNK_CHARS]
+        return
+    read = getattr(source, 'read', None)
+    if read is not None:
+        for chunk in iter(lambda: read(REPORT_CHUNK_CHARS), ''):
+            yield chunk
+        return
+    lines = iter(source)
+    for chunk in iter(lambda: ''.join(islice(lines, REPORT_CHUNK_LINES)), ''):
+        yield chunk
+
+
+def _upper_for_search(text):
+    """Upper-cased text with the same length, so keyword offsets index ``text``"""
+    upper = text.upper()
+    if len(upper) != len(text):
+        # Some non-ASCII characters upper-case to several; the keywords are ASCII
+        upper = text.encode('ascii', 'replace').decode('ascii').upper()
+    return upper
+
+
+def _signed_ints(prefix):
+    """Integer strings of a run of [\\d,\\s-] characters, as re.findall(r'-?\\d+') splits it"""
+    prefix = prefix.replace(',', '')
+    if '-' not in prefix:
+        return prefix.split()
+    return [value for value in prefix.replace('-', ' -').split() if value != '-']
+
+
+def _search_keyword_lines(pattern, text, upper, keyword, start, end):
+    """First match of ``pattern`` on a line of text[start:end] that contains ``keyword``"""
+    pos = upper.find(keyword, start, end)
+    while pos >= 0:
+        line_start = text.rfind('\n', start, pos) + 1 or start
+        line_end = text.find('\n', pos, end) + 1 or end
+        match = pattern.search(text, line_start, line_end)
+        if match:
+            return match
+        pos = upper.find(keyword, line_end, end)
+    return None
+
+
+def _parse_block(text, upper, start, end):
+    """iter_report_blocks tuple for the block text[start:end], or None"""
+    # Same acceptance rule as r'COMMITMENTS\s+([\d,\s-]+)': whitespace followed
+    # by at least one more digit/comma/space/minus, possibly over several lines
+    keyword = upper.find(COMMITMENTS_KEYWORD, start, end)
+    while keyword >= 0:
+        after = keyword + len(COMMITMENTS_KEYWORD)
+        if after < end and text[after].isspace():
+            prefix = NUMERIC_PREFIX_PATTERN.match(text, after, end).group(0)
+            if len(prefix) >= 2:
+                break
+        keyword = upper.find(COMMITMENTS_KEYWORD, after, end)
+    else:
+        return None
+    numbers = _signed_ints(prefix)
+    if len(numbers) < 8:
+        return None
+
+    name_match = None
+    for screen in ('EXCHANGE', 'ICE FUTURES'):
+        match = _search_keyword_lines(CONTRACT_NAME_PATTERN, text, upper, screen, start, end)
+        if match and (name_match is None or match.start() < name_match.start()):
+            name_match = match
+    if name_match is None:
+        return None
+
+    open_interest = None
+    oi_match = _search_keyword_lines(OPEN_INTEREST_PATTERN, text, upper, 'OPEN INTEREST', start, keyword)
+    if oi_match:
+        open_interest = oi_match.group(1).replace(',', '')
+
+    changes = None
+    change_in_open_interest = None
+    changes_match = _search_keyword_lines(CHANGES_PATTERN, text, upper, 'CHANGES FROM', after + len(prefix), end)
+    if changes_match:
+        change_in_open_interest = changes_match.group(1).replace(',', '')
+        # The row of changes starts on the following line
+        row_start = text.find('\n', changes_match.end(), end) + 1
+        changes = _signed_ints(NUMERIC_PREFIX_PATTERN.match(text, row_start, end).group(0)) if row_start else []
+
+    return name_match.group(1).strip(), numbers, open_interest, changes, change_in_open_interest
+
+
+def iter_report_blocks(source, meta=None):
+    """Single-pass parse of a COT short-format report.
+
+    ``source`` is the report text, a text file object or an iterable of
+    lines; it is read in chunks of REPORT_CHUNK_CHARS, so memory stays
+    bounded by a chunk plus one contract block. Yields one tuple per block
+    that has a name and a complete COMMITMENTS row:
+    ``(commodity_name, commitments, open_interest, changes, change_in_open_interest)``.
+    ``commitments`` and ``changes`` are the raw integer strings of the
+    COMMITMENTS and CHANGES FROM rows; ``changes``, ``open_interest`` and
+    ``change_in_open_interest`` are None when the block has no such line.
+    Blocks end at each "NUMBER OF TRADERS IN EACH CATEGORY" marker. The first
+    report date found is written to ``meta['report_date']`` when given.
+    """
+    want_date = meta is not None
+    tail = ''
+    chunks = iter_report_chunks(source)
+    while True:
+        chunk = next(chunks, None)
+        last = chunk is None
+        text = tail + chunk if not last else tail
+        upper = _upper_for_search(text)
+        start = 0
+        while start < len(text):
+            boundary = upper.find(TRADERS_KEYWORD, start)
+            if boundary < 0:
+                if not last:
+                    break
+                end = len(text)
+            else:
+                end = boundary
+            if want_date:
+                date_match = _search_keyword_lines(REPORT_DATE_PATTERN, text, upper, 'FUTURES ONLY POSITIONS', start, end)
+                if date_match:
+                    meta['report_date'] = _format_report_date(date_match.group(1))
+                    want_date = False
+            block = _parse_block(text, upper, start, end)
+            if block is not None:
+                yield block
+            start = end + len(TRADERS_KEYWORD)
+        if last:
+            return
+        # The unfinished block (possibly a split marker) carries over
+        tail = text[start:]
+
+
+def iter_report_records(lines, meta=None):
+    """``(commodity_name, record)`` per contract with the non-commercial positioning record"""
+    for commodity_name, numbers, _, _, _ in iter_report_blocks(lines, meta):
+        yield commodity_name, _build_position_record(numbers)
+
+
+# -------------------------------
+# COLUMNAR REPORT TABLE
+# -------------------------------
+# Column order of the COMMITMENTS and CHANGES FROM rows
+POSITION_FIELDS = [
+    'noncomm_long', 'noncomm_short', 'noncomm_spread',
+    'comm_long', 'comm_short',
+    'total_long', 'total_short',
+    'nonrept_long', 'nonrept_short',
+]
+REPORT_ROW_DTYPE = np.dtype(
+    [('open_interest', np.int32)]
+    + [(field, np.int32) for field in POSITION_FIELDS]
+    + [('chg_open_interest', np.int32)]
+    + [('chg_' + field, np.int32) for field in POSITION_FIELDS]
+    + [('has_changes', np.bool_)]
+)
+
+
+class ReportTable:
+    """Every COMMITMENTS and CHANGES FROM field of a report, one row per contract.
+
+    Rows live in a single NumPy structured array (REPORT_ROW_DTYPE), so a
+    column such as ``table['open_interest']`` is a view, not a copy. Fields
+    missing from a block are stored as 0 (``has_changes`` flags blocks with
+    a CHANGES FROM row).
+    """
+    __slots__ = ('report_date', 'contracts', 'rows', '_index')
+
+    def __init__(self, report_date, contracts, rows):
+        self.report_date = report_date
+        self.contracts = contracts
+        self.rows = rows
+        # Later blocks win on duplicate names, as in the parsed dict
+        self._index = {name: i for i, name in enumerate(contracts)}
+
+    @classmethod
+    def from_matrix(cls, report_date, contracts, matrix):
+        """Build from an (n, fields) integer array in REPORT_ROW_DTYPE field order"""
+        rows = np.zeros(len(contracts), dtype=REPORT_ROW_DTYPE)
+        for i, field in enumerate(REPORT_ROW_DTYPE.names):
+            rows[field] = matrix[:len(contracts), i]
+        return cls(report_date, contracts, rows)
+
+    @classmethod
+    def concat(cls, tables, report_date=""):
+        tables = [t for t in tables if t is not None]
+        if not tables:
+            return cls(report_date, [], np.zeros(0, dtype=REPORT_ROW_DTYPE))
+        contracts = [name for t in tables for name in t.contracts]
+        rows = np.concatenate([t.rows for t in tables])
+        return cls(report_date or tables[-1].report_date, contracts, rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, field):
+        return self.rows[field]
+
+    def get(self, contract):
+        """Structured row for a contract name, or None"""
+        i = self._index.get(contract)
+        return None if i is None else self.rows[i]
+
+    def by_display_name(self):
+        """{display_name: row} using the same contract selection as get_grouped_data"""
+        selected = select_contracts(self._index)
+        return {display_name: self.rows[self._index[contract]]
+                for display_name, (group, contract) in selected.items()}
+
+
+class ReportTableBuilder:
+    """Collects iter_report_blocks tuples straight into an int32 matrix.
+
+    The matrix doubles when full, so a block costs a few slice assignments
+    rather than a per-row tuple; build() turns it into a ReportTable.
+    """
+    __slots__ = ('contracts', 'matrix')
+
+    def __init__(self, capacity=128):
+        self.contracts = []
+        self.matrix = np.zeros((capacity, len(REPORT_ROW_DTYPE.names)), dtype=np.int32)
+
+    def append(self, block):
+        commodity_name, numbers, open_interest, changes, change_in_open_interest = block
+        n = len(self.contracts)
+        if n == len(self.matrix):
+            self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)])
+        row = self.matrix[n]
+        width = len(POSITION_FIELDS)
+        # numpy parses the integer strings on assignment
+        numbers = numbers[:width]
+        row[1:1 + len(numbers)] = numbers
+        if open_interest is not None:
+            row[0] = open_interest
+        if changes is not None:
+            changes = changes[:width]
+            row[width + 1] = change_in_open_interest
+            row[width + 2:width + 2 + len(changes)] = changes
+            row[-1] = 1
+        self.contracts.append(commodity_name)
+
+    def build(self, report_date):
+        return ReportTable.from_matrix(report_date, self.contracts, self.matrix)
+
+
+# -------------------------------
+# CONTRACT NAME MAPPING
+# -------------------------------
+USD_BASE_MARKETS = ['USD/CAD', 'USD/CHF', 'USD/JPY', 'USD/MXN', 'USD/BRL', 'USD/ZAR']
+
+
+CURRENCY_NAMES = {
+    'EURO FX': 'EUR/USD',
+    'BRITISH POUND': 'GBP/USD',
+    'AUSTRALIAN DOLLAR': 'AUD/USD',
+    'NZ DOLLAR': 'NZD/USD',
+    'CANADIAN DOLLAR': 'USD/CAD',
+    'SWISS FRANC': 'USD/CHF',
+    'MEXICAN PESO': 'USD/MXN',
+    'BRAZILIAN REAL': 'USD/BRL',
+    'SO AFRICAN RAND': 'USD/ZAR',
+    'JAPANESE YEN': 'USD/JPY',
+}
+METAL_NAMES = {
+    'GOLD': 'XAU/USD',
+    'SILVER': 'XAG/USD',
+    'COPPER- #1': 'COPPER/USD',
+    'STEEL-HRC': 'STEEL-HRC/USD',
+    'LITHIUM HYDROXIDE': 'LITHIUM/USD',
+}
+ENERGY_NAMES = {
+    'CRUDE OIL': 'CRUDE OIL/USD',
+    'NATURAL GAS': 'NAT GAS/USD',
+}
+AGRICULTURE_NAMES = {
+    'COFFEE': 'COFFEE/USD',
+    'WHEAT-SRW': 'WHEAT SRW/USD',
+    'WHEAT-HRW': 'WHEAT HRW/USD',
+}
+CRYPTO_NAMES = {
+    'MICRO BITCOIN': 'MICRO-BTC/USD',
+}
+GROUP_NAMES = ['Currencies', 'Metals', 'Energies', 'Agriculture', 'Crypto']
+
+
+class ContractNameResolver:
+    """Resolves parsed contract names to (group, display name) in one lookup.
+
+    Exact names go through a dict, everything else through a single compiled
+    alternation of name fragments (longest fragment first). When several
+    contracts resolve to the same display name the best-ranked one wins:
+    an exact fragment match, then a name starting with the fragment, then a
+    name containing it; shorter names and then alphabetical order break
+    remaining ties, so the choice never depends on report order.
+    """
+
+    def __init__(self, exact_names, fragment_names):
+        self.exact = {
+            contract: (group, display_name)
+            for group, mapping in exact_names.items()
+            for contract, display_name in mapping.items()
+        }
+        self.fragments = {
+            fragment: (group, display_name)
+            for group, mapping in fragment_names.items()
+            for fragment, display_name in mapping.items()
+        }
+        self.fragment_pattern = self._alternation(self.fragments)
+        # Matches any name the resolver could accept (used to screen raw text)
+        self.screen_pattern = self._alternation(list(self.exact) + list(self.fragments))
+        self._cache = {}
+
+    @staticmethod
+    def _alternation(names):
+        ordered = sorted(set(names), key=lambda name: (-len(name), name))
+        return re.compile('|'.join(re.escape(name) for name in ordered))
+
+    def resolve(self, contract):
+        """(group, display_name, rank) for a contract name, or None if unmapped"""
+        try:
+            return self._cache[contract]
+        except KeyError:
+            pass
+
+        result = None
+        if contract in self.exact:
+            group, display_name = self.exact[contract]
+            result = (group, display_name, (0, len(contract), contract))
+        else:
+            upper = contract.upper()
+            match = self.fragment_pattern.search(upper)
+            if match:
+                group, display_name = self.fragments[match.group(0)]
+                if match.group(0) == upper:
+                    quality = 0
+                elif match.start() == 0:
+                    quality = 1
+                else:
+                    quality = 2
+                result = (group, display_name, (quality, len(contract), contract))
+
+        self._cache[contract] = result
+        return result
+
+
+CONTRACT_RESOLVER = ContractNameResolver(
+    {'Currencies': CURRENCY_NAMES},
+    {
+        'Metals': METAL_NAMES,
+        'Energies': ENERGY_NAMES,
+        'Agriculture': AGRICULTURE_NAMES,
+        'Crypto': CRYPTO_NAMES,
+    },
+)
+
+
+def select_contracts(contract_names):
+    """{display_name: (group, contract_name)} choosing one contract per display name"""
+    resolve = CONTRACT_RESOLVER.resolve
+    best = {}
+    for contract in contract_names:
+        resolved = resolve(contract)
+        if resolved is None:
+            continue
+        group, display_name, rank = resolved
+        current = best.get(display_name)
+        if current is None or rank < current[0]:
+            best[display_name] = (rank, group, contract)
+    return {display_name: (group, contract) for display_name, (rank, group, contract) in best.items()}
+
+
+def group_commodity_data(commodity_data):
+    """Map parsed contract names to display names, grouped by asset class"""
+    groups = {group: {} for group in GROUP_NAMES}
+    for display_name, (group, contract) in select_contracts(commodity_data).items():
+        groups[group][display_name] = commodity_data[contract].copy()
+    return groups
+
+
+def switch_position_record(data):
+    """Swap the long/short sides of a record for a USD-based pair"""
+    return {
+        'longs': data['shorts'],
+        'shorts': data['longs'],
+        'net': -data['net'],
+        'long_percent': data['short_percent'],
+        'short_percent': data['long_percent'],
+        'total': data['total']
+    }
+
+
+# -------------------------------
+# YOUR EXACT CFTC EXTRACTOR
+# -------------------------------
+class CombinedCFTCExtractor:
+    REPORT_URLS = {
+        'CME': "https://www.cftc.gov/dea/futures/deacmesf.htm",
+        'COMEX': "https://www.cftc.gov/dea/futures/deacmxsf.htm",
+        'ICE_US': "https://www.cftc.gov/dea/futures/deanybtsf.htm",
+        'ICE_EU': "https://www.cftc.gov/dea/futures/deaiceusf.htm",
+    }
+
+    def __init__(self, concurrent=True, timeout=30, cache=None, offline=False):
+        self.commodity_data = {}
+        self.report_date = ""
+        self.concurrent = concurrent
+        self.timeout = timeout
+        # Raw page cache: enables conditional GETs and offline runs
+        self.cache = cache
+        self.offline = offline and cache is not None
+        # Per-source fetch stats: {source: {'seconds', 'records', 'status', 'error'}}
+        self.source_stats = {}
+        self.fetch_seconds = 0.0
+        self.all_unchanged = False
+        self._pending_cache = []
+        # Full COMMITMENTS/CHANGES rows per parsed source, and all of them combined
+        self.report_tables = {}
+        self.report_table = None
+
+    @staticmethod
+    def parse_report_date(text):
+        date_match = REPORT_DATE_PATTERN.search(text)
+        if date_match:
+            return _format_report_date(date_match.group(1))
+        return ""
+
+    def parse_report_stream(self, lines, source):
+        """Parse a report from a file object or any iterable of lines.
+
+        Returns the positioning dict per contract; the full rows are kept in
+        ``self.report_tables[source]``.
+        """
+        meta = {}
+        data = {}
+        table = ReportTableBuilder()
+        for block in iter_report_blocks(lines, meta):
+            data[block[0]] = _build_position_record(block[1])
+            table.append(block)
+        report_date = meta.get('report_date', "")
+        if report_date:
+            self.report_date = report_date
+        self.report_tables[source] = table.build(report_date)
+        return data
+
+    def parse_report_text(self, text, source):
+        return self.parse_report_stream(text, source)
+
+    def _make_session(self):
+        """One pooled HTTP session shared by every source in a fetch"""
+        # Imported here: requests is the slowest import of the app and only fetching needs it
+        import requests
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=len(self.REPORT_URLS))
+        session.mount("https://", adapter)
+        return session
+
+    def _fetch_source(self, session, source, url, headers=None, cached_hash=None):
+        """Download and parse a single report page, timing the round trip.
+
+        Pages that come back 304 or with the same content hash as the cached
+        copy are reported as 'unchanged' and are not parsed.
+        """
+        started = time.perf_counter()
+        result = {'source': source, 'url': url, 'data': {}, 'report_date': "", 'status': 'fetched',
+                  'error': None, 'text': None, 'hash': None, 'etag': None, 'last_modified': None}
+        try:
+            if session is None:
+                text = self.cache.read(source)
+                if text is None:
+                    raise ValueError("no cached copy available offline")
+                result['status'] = 'cached'
+            else:
+                response = session.get(url, headers=headers or {}, timeout=self.timeout)
+                if response.status_code == 304:
+                    result['status'] = 'unchanged'
+                    text = None
+                else:
+                    text = response.text
+                    result['text'] = text
+                    result['hash'] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                    result['etag'] = response.headers.get('ETag')
+                    result['last_modified'] = response.headers.get('Last-Modified')
+                    if result['hash'] == cached_hash:
+                        result['status'] = 'unchanged'
+                        text = None
+            if text is not None:
+                result['data'] = self.parse_report_text(text, source)
+                result['report_date'] = self.parse_report_date(text)
+        except Exception as e:
+            result['error'] = str(e)
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    def fetch_current_reports(self):
+        started = time.perf_counter()
+        self.report_tables = {}
+        jobs = []
+        for source, url in self.REPORT_URLS.items():
+            headers, cached_hash = {}, None
+            if self.cache is not None and not self.offline:
+                headers = self.cache.conditional_headers(source)
+                entry = self.cache.latest(source)
+                cached_hash = entry['sha256'] if entry else None
+            jobs.append((source, url, headers, cached_hash))
+
+        if self.offline:
+            results = [self._fetch_source(None, source, url) for source, url, _, _ in jobs]
+        else:
+            with self._make_session() as session:
+                if self.concurrent:
+                    from concurrent.futures import ThreadPoolExecutor
+                    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+                        futures = [pool.submit(self._fetch_source, session, *job) for job in jobs]
+                        results = [future.result() for future in futures]
+                else:
+                    results = [self._fetch_source(session, *job) for job in jobs]
+
+        # Merge in source order so the result matches a sequential fetch
+        all_current = {}
+        report_date = ""
+        self.source_stats = {}
+        self._pending_cache = []
+        for result in results:
+            source = result['source']
+            source_date = result['report_date']
+            if result['status'] == 'unchanged':
+                entry = self.cache.latest(source)
+                source_date = entry.get('report_date', "") if entry else ""
+            all_current.update(result['data'])
+            if source_date:
+                report_date = source_date
+            if self.cache is not None and result['status'] in ('fetched', 'unchanged'):
+                self._pending_cache.append(result)
+            self.source_stats[source] = {
+                'seconds': round(result['seconds'], 3),
+                'records': len(result['data']),
+                'status': result['status'],
+                'error': result['error'],
+            }
+
+        self.report_table = ReportTable.concat(
+            [self.report_tables.get(source) for source in self.REPORT_URLS], report_date
+        )
+        self.all_unchanged = all(r['status'] == 'unchanged' for r in results)
+        self.fetch_seconds = round(time.perf_counter() - started, 3)
+        self.report_date = report_date or self.report_date
+        self.commodity_data = all_current
+        return all_current
+
+    def commit_cache(self):
+        """Persist fetched pages once their data has been merged into the store"""
+        if self.cache is None or not self._pending_cache:
+            return
+        for result in self._pending_cache:
+            if result['text'] is not None:
+                self.cache.store(result['source'], result['url'], result['text'], result['hash'],
+                                 etag=result['etag'], last_modified=result['last_modified'],
+                                 report_date=result['report_date'])
+            else:
+                self.cache.touch(result['source'])
+        self.cache.flush()
+        self._pending_cache = []
+
+    def extract_all(self):
+        self.fetch_current_reports()
+        return self.get_grouped_data()
+
+    def get_grouped_data(self):
+        return group_commodity_data(self.commodity_data)
+
+
+# -------------------------------
+# HISTORICAL ARCHIVE BACKFILL
+# -------------------------------
+# Column headers of the CFTC legacy "futures only" annual files
+# (deacot<year>.zip -> annual.txt, deacot1986_2016.zip -> FUT86_16.txt)
+ARCHIVE_NAME_COLUMN = 'Market and Exchange Names'
+ARCHIVE_DATE_COLUMNS = ('As of Date in Form YYYY-MM-DD', 'As of Date in Form YYMMDD')
+ARCHIVE_LONG_COLUMN = 'Noncommercial Positions-Long (All)'
+ARCHIVE_SHORT_COLUMN = 'Noncommercial Positions-Short (All)'
+ARCHIVE_NAME_WIDTH = 160
+ARCHIVE_EXCHANGE_RANK = {exchange: rank for rank, exchange in enumerate(REPORT_EXCHANGES)}
+BACKFILL_COLUMNS = ['Date', 'Longs', 'Shorts', 'Total', 'Long %', 'Short %', 'Net']
+
+
+def find_archive_members(paths):
+    """(zip path, member) pairs for every data file in the given zips or folders"""
+    zip_paths = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            zip_paths.extend(sorted(path.glob('*.zip')))
+        elif path.suffix.lower() == '.zip':
+            zip_paths.append(path)
+
+    members = []
+    for zip_path in zip_paths:
+        with zipfile.ZipFile(zip_path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(('.txt', '.csv')):
+                    members.append((str(zip_path), info.filename))
+    return members
+
+
+def _archive_date(value):
+    """YYYY-MM-DD from either archive date column"""
+    value = value.strip()
+    if len(value) == 6 and value.isdigit():
+        century = '19' if value[:2] >= '50' else '20'
+        return f"{century}{value[:2]}-{value[2:4]}-{value[4:]}"
+    return value[:10]
+
+
+def parse_archive_member(zip_path, member):
+    """Decode one annual archive file straight from the zip.
+
+    Returns ``{display_name: [row, ...]}`` with rows laid out as
+    BACKFILL_COLUMNS, already switched for USD-based pairs.
+    """
+    by_date = {}
+    with zipfile.ZipFile(zip_path) as zf, zf.open(member) as raw:
+        lines = io.TextIOWrapper(raw, encoding='latin-1', newline='')
+        header = [column.strip() for column in next(csv.reader([next(lines)]))]
+        name_idx = header.index(ARCHIVE_NAME_COLUMN)
+        date_idx = next(header.index(c) for c in ARCHIVE_DATE_COLUMNS if c in header)
+        long_idx = header.index(ARCHIVE_LONG_COLUMN)
+        short_idx = header.index(ARCHIVE_SHORT_COLUMN)
+        width = max(name_idx, date_idx, long_idx, short_idx)
+
+        # Only rows naming a mapped contract are worth a full CSV decode;
+        # the market name is the first column
+        screen = CONTRACT_RESOLVER.screen_pattern.search
+        relevant = (line for line in lines if screen(line[:ARCHIVE_NAME_WIDTH].upper()))
+        for row in csv.reader(relevant):
+            if len(row) <= width:
+                continue
+            try:
+                numbers = [int(row[long_idx]), int(row[short_idx])]
+            except ValueError:
+                continue
+            # Same exchanges as the live report pages: NYMEX, CBOT etc. list
+            # contracts with the same names that are not the app's series
+            contract, _, exchange = row[name_idx].rpartition(' - ')
+            exchange_rank = ARCHIVE_EXCHANGE_RANK.get(exchange.strip().upper())
+            if exchange_rank is None:
+                continue
+            report_date = _archive_date(row[date_idx])
+            by_date.setdefault(report_date, {})[(contract.strip(), exchange_rank)] = _build_position_record(numbers)
+
+    rows = {}
+    for report_date, listed in by_date.items():
+        # One record per contract name; as in a live fetch, the later report page wins
+        commodity_data = {}
+        for (contract, _), record in sorted(listed.items(), key=lambda item: item[0][1]):
+            commodity_data[contract] = record
+        for markets in group_commodity_data(commodity_data).values():
+            for display_name, data in markets.items():
+                if display_name in USD_BASE_MARKETS:
+                    data = switch_position_record(data)
+                rows.setdefault(display_name, []).append((
+                    report_date, data['longs'], data['shorts'], data['total'],
+                    data['long_percent'], data['short_percent'], data['net']
+                ))
+    return rows
+
+
+def backfill_from_archives(paths, max_workers=None):
+    """Parse CFTC annual archives in parallel, one process per archive file.
+
+    ``paths`` may mix zip files and folders of zip files. Returns
+    ``{display_name: {column: [values]}}`` sorted by date with one row per
+    week, in the same column layout as the JSON store.
+    """
+    members = find_archive_members(paths)
+    if not members:
+        return {}
+
+    if len(members) == 1 or max_workers == 1:
+        results = [parse_archive_member(*member) for member in members]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        workers = min(len(members), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_archive_member, *zip(*members)))
+
+    merged = {}
+    for result in results:
+        for display_name, rows in result.items():
+            by_date = merged.setdefault(display_name, {})
+            for row in rows:
+                by_date[row[0]] = row
+
+    backfill = {}
+    for display_name, by_date in merged.items():
+        ordered = [by_date[d] for d in sorted(by_date)]
+        backfill[display_name] = {
+            column: [row[i] for row in ordered] for i, column in enumerate(BACKFILL_COLUMNS)
+        }
+    return backfill
@@ -0,0 +1,933 @@
+"""Positioning metrics computed across every market at once.
+
+Kept free of Streamlit so the same numbers back the app's screener, its
+per-market analysis and any script that wants them.
+"""
+import hashlib
+import threading
+from bisect import bisect_right, insort
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+AVERAGE_WEEKS = 13
+BIAS_SHIFT_PCT = 15
+EXTREME_PCT = 70
+PEAK_LEVELS = ((98, 'AT ALL-TIME HIGH'), (95, 'APPROACHING ALL-TIME HIGH'), (90, 'NEAR PEAK'))
+HISTORIC_LOW_MARGIN = 1.1
+PEAK_WINDOWS_YEARS = (1, 3, 5)
+MIN_PEAK_WEEKS = 52
+COT_INDEX_WEEKS = (26, 52, 156)
+ZSCORE_WEEKS = 52
+RSI_PERIOD = 14
+RSI_LEVELS = (30, 40, 60, 70)
+
+SCREENER_COLUMNS = [
+    'Market', 'Date', 'Longs', 'Shorts', 'Net', 'Long %', 'Short %',
+    'Longs vs Avg %', 'Shorts vs Avg %', 'Bias Shift', 'Extreme',
+    'Net RSI', 'Long % RSI', 'Net StochRSI', 'Longs % of Peak', 'Shorts % of Peak', 'Peak Status', 'Near Extremes',
+    'Longs at Lows', 'Shorts at Lows',
+]
+
+
+# -------------------------------
+# STACKING
+# -------------------------------
+def stack_tails(markets_df, columns, weeks=AVERAGE_WEEKS):
+    """The last ``weeks`` rows of every market as (markets, {column: array (markets, weeks)}).
+
+    Shorter histories are right-aligned and NaN-padded on the left, so
+    column -1 is always each market's latest week. One concatenation and
+    one scatter per column, whatever the number of markets.
+    """
+    markets = [m for m, df in markets_df.items() if len(df)]
+    lengths = np.array([min(len(markets_df[m]), weeks) for m in markets], dtype=np.intp)
+    rows = np.repeat(np.arange(len(markets)), lengths)
+    # position within each market's tail, shifted so the last row lands in column weeks - 1
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    cols = np.arange(lengths.sum()) - starts + np.repeat(weeks - lengths, lengths)
+    stacked = {}
+    for column in columns:
+        values = np.concatenate([markets_df[m][column].to_numpy(dtype=float)[-weeks:] for m in markets]) \
+            if markets else np.empty(0)
+        grid = np.full((len(markets), weeks), np.nan)
+        grid[rows, cols] = values
+        stacked[column] = grid
+    return markets, stacked
+
+
+def _peak_array(markets, peaks, key):
+    """Per-market peak/min value from a PeakIndex.peaks-style dict; NaN when unknown"""
+    values = []
+    for market in markets:
+        info = peaks.get(market, {})
+        value = info.get(key) if info.get('has_peaks') else None
+        values.append(float(value) if value else np.nan)
+    return np.array(values, dtype=float)
+
+
+# -------------------------------
+# SCREENER
+# -------------------------------
+def screen_markets(markets_df, peaks=None, weeks=AVERAGE_WEEKS):
+    """One summary row per market with the analyze_market_with_peaks metrics.
+
+    13-week averages and the latest week's deviation from them, the >15%
+    bias-shift flag, 70% extreme concentration, Wilder RSI and peak/min
+    proximity are computed for all markets in one vectorized pass. Returns a DataFrame
+    with SCREENER_COLUMNS, ready to sort or filter.
+    """
+    peaks = peaks or {}
+    markets, grid = stack_tails(markets_df, ['Longs', 'Shorts', 'Net', 'Long %', 'Short %'], weeks)
+    if not markets:
+        return pd.DataFrame(columns=SCREENER_COLUMNS)
+
+    latest = {column: values[:, -1] for column, values in grid.items()}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_longs = np.nanmean(grid['Longs'], axis=1)
+        avg_shorts = np.nanmean(grid['Shorts'], axis=1)
+        longs_vs_avg = (latest['Longs'] - avg_longs) / avg_longs * 100
+        shorts_vs_avg = (latest['Shorts'] - avg_shorts) / avg_shorts * 100
+
+        peak_longs = _peak_array(markets, peaks, 'peak_longs')
+        peak_shorts = _peak_array(markets, peaks, 'peak_shorts')
+        longs_of_peak = latest['Longs'] / peak_longs * 100
+        shorts_of_peak = latest['Shorts'] / peak_shorts * 100
+        min_longs = _peak_array(markets, peaks, 'min_longs')
+        min_shorts = _peak_array(markets, peaks, 'min_shorts')
+
+    bias_shift = (np.abs(longs_vs_avg) > BIAS_SHIFT_PCT) | (np.abs(shorts_vs_avg) > BIAS_SHIFT_PCT)
+    extreme = np.select(
+        [latest['Long %'] >= EXTREME_PCT, latest['Short %'] >= EXTREME_PCT],
+        ['BULLISH', 'BEARISH'], default='',
+    )
+    closest_to_peak = np.fmax(longs_of_peak, shorts_of_peak)
+    peak_status = np.select(
+        [closest_to_peak >= level for level, _ in PEAK_LEVELS],
+        [label for _, label in PEAK_LEVELS], default='',
+    )
+
+    rsi = rsi_all_markets(markets_df).reindex(markets)
+    dates = [markets_df[m]['Date'].iloc[-1] for m in markets]
+    return pd.DataFrame({
+        'Market': markets,
+        'Date': pd.to_datetime(dates),
+        'Longs': latest['Longs'],
+        'Shorts': latest['Shorts'],
+        'Net': latest['Net'],
+        'Long %': latest['Long %'],
+        'Short %': latest['Short %'],
+        'Longs vs Avg %': longs_vs_avg.round(1),
+        'Shorts vs Avg %': shorts_vs_avg.round(1),
+        'Bias Shift': bias_shift,
+        'Extreme': extreme,
+        'Net RSI': rsi['Net RSI'].round(1).to_numpy(),
+        'Long % RSI': rsi['Long % RSI'].round(1).to_numpy(),
+        'Net StochRSI': rsi['Net StochRSI'].round(1).to_numpy(),
+        'Longs % of Peak': longs_of_peak.round(1),
+        'Shorts % of Peak': shorts_of_peak.round(1),
+        'Peak Status': peak_status,
+        'Near Extremes': closest_to_peak >= 95,
+        'Longs at Lows': latest['Longs'] <= min_longs * HISTORIC_LOW_MARGIN,
+        'Shorts at Lows': latest['Shorts'] <= min_shorts * HISTORIC_LOW_MARGIN,
+    }, columns=SCREENER_COLUMNS)
+
+
+# -------------------------------
+# PEAK / TROUGH INDEX
+# -------------------------------
+def _suffix_extremes(dates, values):
+    """Monotonic deque of (date, value) holding each value larger than every later one.
+
+    This is exactly what a sliding-window max deque holds after pushing the
+    rows in order, built with one reversed cumulative max instead.
+    """
+    if not len(values):
+        return deque()
+    later_max = np.maximum.accumulate(values[::-1])[::-1]
+    later_max = np.append(later_max[1:], -np.inf)
+    keep = values > later_max
+    return deque(zip(list(dates[keep]), values[keep].tolist()))
+
+
+class RunningExtremes:
+    """Peak and trough of Longs and Shorts over a trailing window (None = all history).
+
+    Each (column, max|min) pair is a monotonic deque of (date, value), so
+    appending a week is amortised O(1) and the current extreme is always
+    at the front.
+    """
+
+    KEYS = [(column, kind) for column in ('Longs', 'Shorts') for kind in ('peak', 'min')]
+
+    def __init__(self, years=None):
+        self.years = years
+        self.deques = {key: deque() for key in self.KEYS}
+
+    def cutoff(self, latest):
+        """Rows dated on or before this fall outside the window ending at ``latest``"""
+        return None if self.years is None else latest - pd.DateOffset(years=self.years)
+
+    def rebuild(self, dates, columns):
+        """Reset from full date-sorted arrays ({column: values})"""
+        if not len(dates):
+            self.deques = {key: deque() for key in self.KEYS}
+            return
+        cutoff = self.cutoff(pd.Timestamp(dates[-1]))
+        start = 0 if cutoff is None else int(np.searchsorted(dates, np.datetime64(cutoff), side='right'))
+        window_dates = dates[start:].astype('datetime64[ns]')
+        for column, kind in self.KEYS:
+            values = columns[column][start:].astype(float)
+            if kind == 'peak':
+                self.deques[column, kind] = _suffix_extremes(window_dates, values)
+            else:
+                self.deques[column, kind] = deque((d, -v) for d, v in _suffix_extremes(window_dates, -values))
+
+    def push(self, date, longs, shorts):
+        """Append one week (dates must arrive in order)"""
+        date = np.datetime64(pd.Timestamp(date), 'ns')
+        for (column, kind), queue in self.deques.items():
+            value = float(longs if column == 'Longs' else shorts)
+            if kind == 'peak':
+                while queue and queue[-1][1] <= value:
+                    queue.pop()
+            else:
+                while queue and queue[-1][1] >= value:
+                    queue.pop()
+            queue.append((date, value))
+        cutoff = self.cutoff(pd.Timestamp(date))
+        if cutoff is not None:
+            cutoff = np.datetime64(cutoff, 'ns')
+            for queue in self.deques.values():
+                while queue and queue[0][0] <= cutoff:
+                    queue.popleft()
+
+    def extreme_dates(self):
+        return {queue[0][0] for queue in self.deques.values() if queue}
+
+    def beaten_by(self, dates, longs, shorts, latest):
+        """True if any of these rows would set a new extreme inside the window"""
+        cutoff = self.cutoff(pd.Timestamp(latest))
+        inside = np.ones(len(dates), dtype=bool) if cutoff is None else dates > np.datetime64(cutoff, 'ns')
+        for (column, kind), queue in self.deques.items():
+            if not queue:
+                return bool(inside.any())
+            values = (longs if column == 'Longs' else shorts)[inside]
+            current = queue[0][1]
+            if (values > current).any() if kind == 'peak' else (values < current).any():
+                return True
+        return False
+
+    def stats(self):
+        stats = {}
+        for (column, kind), queue in self.deques.items():
+            key = f"{kind}_{column.lower()}"
+            stats[key] = queue[0][1] if queue else None
+            stats[f"{key}_date"] = pd.Timestamp(queue[0][0]) if queue else None
+        return stats
+
+
+class PeakIndex:
+    """Peak/trough statistics derived from each market's stored history.
+
+    Keeps RunningExtremes for all history and for each PEAK_WINDOWS_YEARS
+    trailing window. ``update`` compares the new frame with the one it
+    last saw: appended weeks are pushed onto the deques, and edits only
+    force a vectorized rebuild when they touch a current extreme row or
+    set a new one. ``counts`` tallies which path each update took.
+    """
+
+    def __init__(self, windows=PEAK_WINDOWS_YEARS, min_weeks=MIN_PEAK_WEEKS):
+        self.windows = tuple(windows)
+        self.min_weeks = min_weeks
+        self._markets = {}
+        self.counts = {'unchanged': 0, 'appended': 0, 'edited': 0, 'rebuilt': 0}
+
+    def _arrays(self, df):
+        return (df['Date'].to_numpy().astype('datetime64[ns]'),
+                {c: df[c].to_numpy(dtype=float) for c in ('Longs', 'Shorts')})
+
+    def _rebuild(self, market, df):
+        dates, columns = self._arrays(df)
+        extremes = {years: RunningExtremes(years) for years in (None, *self.windows)}
+        for window in extremes.values():
+            window.rebuild(dates, columns)
+        self._markets[market] = {'frame': df, 'extremes': extremes, 'stale': False}
+        self.counts['rebuilt'] += 1
+
+    def update(self, market, df):
+        """Bring one market up to date with ``df``; returns its all-history peaks"""
+        state = self._markets.get(market)
+        if state is None or not len(state['frame']) or not len(df):
+            self._rebuild(market, df)
+            return self.peaks(market)
+        prev = state['frame']
+        if prev is df or _same_positions(prev, df):
+            state['frame'] = df
+            self.counts['unchanged'] += 1
+            return self.peaks(market)
+
+        n = len(prev)
+        if len(df) > n and _same_positions(prev, df.iloc[:n]) and df['Date'].iloc[n] > prev['Date'].iloc[-1]:
+            if state['stale']:
+                self._rebuild(market, df)
+                return self.peaks(market)
+            added = df.iloc[n:]
+            for date, longs, shorts in zip(added['Date'], added['Longs'], added['Shorts']):
+                for window in state['extremes'].values():
+                    window.push(date, longs, shorts)
+            state['frame'] = df
+            self.counts['appended'] += 1
+            return self.peaks(market)
+
+        # an edit: rows removed or changed in prev, rows new or changed in df
+        merged = prev[['Date', 'Longs', 'Shorts']].merge(
+            df[['Date', 'Longs', 'Shorts']], on='Date', how='outer', suffixes=('_old', '_new'), indicator=True
+        )
+        changed = (merged['_merge'] != 'both') | (merged['Longs_old'] != merged['Longs_new']) \
+            | (merged['Shorts_old'] != merged['Shorts_new'])
+        touched = merged[changed]
+        extreme_dates = set().union(*(w.extreme_dates() for w in state['extremes'].values()))
+        old_dates = touched.loc[touched['_merge'] != 'right_only', 'Date'].to_numpy().astype('datetime64[ns]')
+        new_rows = touched[touched['_merge'] != 'left_only']
+        latest = df['Date'].iloc[-1]
+        if (latest != prev['Date'].iloc[-1]
+                or any(d in extreme_dates for d in list(old_dates))
+                or any(w.beaten_by(new_rows['Date'].to_numpy().astype('datetime64[ns]'),
+                                   new_rows['Longs_new'].to_numpy(dtype=float),
+                                   new_rows['Shorts_new'].to_numpy(dtype=float), latest)
+                       for w in state['extremes'].values())):
+            self._rebuild(market, df)
+            return self.peaks(market)
+        # current extremes stand; deque tails may not, so rebuild before the next append
+        state.update(frame=df, stale=True)
+        self.counts['edited'] += 1
+        return self.peaks(market)
+
+    def update_all(self, markets_df):
+        for market, df in markets_df.items():
+            self.update(market, df)
+        for market in set(self._markets) - set(markets_df):
+            del self._markets[market]
+
+    def peaks(self, market, years=None):
+        """{'peak_longs', 'peak_shorts', 'min_longs', 'min_shorts', their '_date's, 'weeks', 'has_peaks'}
+
+        ``years`` picks a trailing window (None = all stored history). A
+        window has peaks once it holds ``min_weeks`` of history, or for
+        rolling windows once the history reaches back past its start.
+        """
+        state = self._markets.get(market)
+        if state is None or not len(state['frame']):
+            return {'has_peaks': False, 'weeks': 0}
+        dates = state['frame']['Date']
+        window = state['extremes'][years]
+        cutoff = window.cutoff(dates.iloc[-1])
+        start = 0 if cutoff is None else int(dates.searchsorted(cutoff, side='right'))
+        weeks = len(dates) - start
+        covered = weeks >= self.min_weeks if cutoff is None else dates.iloc[0] <= cutoff
+        return dict(window.stats(), weeks=weeks, has_peaks=bool(covered))
+
+    def all_peaks(self, years=None):
+        return {market: self.peaks(market, years) for market in self._markets}
+
+
+def _same_positions(a, b, columns=('Date', 'Longs', 'Shorts')):
+    """Whether two frames hold identical ``columns`` (shared buffers short-circuit)"""
+    if len(a) != len(b):
+        return False
+    for column in columns:
+        x, y = a[column].to_numpy(), b[column].to_numpy()
+        if x.__array_interface__['data'][0] == y.__array_interface__['data'][0] and x.strides == y.strides:
+            continue
+        if not np.array_equal(x, y):
+            return False
+    return True
+
+
+# -------------------------------
+# WILDER RSI
+# -------------------------------
+def stack_histories(markets_df, column):
+    """Every market's full ``column`` as one left-aligned (weeks, markets) array plus lengths"""
+    markets = [m for m, df in markets_df.items() if len(df)]
+    lengths = np.array([len(markets_df[m]) for m in markets], dtype=np.intp)
+    grid = np.full((int(lengths.max()) if len(lengths) else 0, len(markets)), np.nan)
+    for i, market in enumerate(markets):
+        grid[:lengths[i], i] = markets_df[market][column].to_numpy(dtype=float)
+    return markets, grid, lengths
+
+
+def wilder_rsi(values, period=RSI_PERIOD):
+    """Wilder RSI down the rows of a 1-D series or a (weeks, markets) array.
+
+    The first average gain/loss is the simple mean of the first ``period``
+    changes, then each week is smoothed with alpha = 1/period; every column
+    is computed at once by pandas' ewm. NaN until ``period`` changes exist.
+    """
+    values = np.asarray(values, dtype=float)
+    grid = values.reshape(len(values), -1)
+    change = np.diff(grid, axis=0, prepend=np.nan)
+    averages = []
+    for moves in (np.clip(change, 0, None), np.clip(-change, 0, None)):
+        seeded = moves.copy()
+        seeded[:period] = np.nan
+        if len(moves) > period:
+            seeded[period] = moves[1:period + 1].mean(axis=0)
+        smoothed = pd.DataFrame(seeded).ewm(alpha=1 / period, adjust=False, ignore_na=True).mean().to_numpy(copy=True)
+        smoothed[np.isnan(moves)] = np.nan
+        averages.append(smoothed)
+    gain, loss = averages
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = np.where(loss > 0, 100 - 100 / (1 + gain / np.where(loss > 0, loss, 1)), np.where(gain > 0, 100.0, 50.0))
+    rsi[np.isnan(gain) | np.isnan(loss)] = np.nan
+    return rsi.reshape(values.shape)
+
+
+def stochastic(values, period=RSI_PERIOD):
+    """Stochastic %K of a series or (weeks, markets) array over ``period`` rows (50 on a flat range)"""
+    frame = pd.DataFrame(np.asarray(values, dtype=float).reshape(len(values), -1))
+    low = frame.rolling(period).min().to_numpy()
+    high = frame.rolling(period).max().to_numpy()
+    k = _cot_index(frame.to_numpy(), low, high)
+    k[np.isnan(low)] = np.nan
+    return k.reshape(np.shape(values))
+
+
+def rsi_all_markets(markets_df, period=RSI_PERIOD):
+    """Latest Net RSI, Long % RSI and Net StochRSI for every market from one stacked pass"""
+    columns = {}
+    markets, net, lengths = stack_histories(markets_df, 'Net')
+    if not markets:
+        return pd.DataFrame(columns=['Net RSI', 'Long % RSI', 'Net StochRSI'])
+    _, long_pct, _ = stack_histories(markets_df, 'Long %')
+    last = (lengths - 1, np.arange(len(markets)))
+    net_rsi = wilder_rsi(net, period)
+    columns['Net RSI'] = net_rsi[last]
+    columns['Long % RSI'] = wilder_rsi(long_pct, period)[last]
+    columns['Net StochRSI'] = stochastic(net_rsi, period)[last]
+    return pd.DataFrame(columns, index=pd.Index(markets, name='Market'))
+
+
+def rsi_crossings(rsi, levels=RSI_LEVELS):
+    """Most recent crossing of each level in an RSI series: {level: (weeks ago, 'up'|'down') or None}"""
+    rsi = np.asarray(rsi, dtype=float)
+    crossings = {}
+    for level in levels:
+        above = rsi > level
+        valid = ~np.isnan(rsi)
+        moved = np.flatnonzero(valid[1:] & valid[:-1] & (above[1:] != above[:-1])) + 1
+        if len(moved):
+            i = moved[-1]
+            crossings[level] = (len(rsi) - 1 - i, 'up' if above[i] else 'down')
+        else:
+            crossings[level] = None
+    return crossings
+
+
+class WilderRSIState:
+    """Wilder RSI advanced one value at a time from its smoothed gain/loss"""
+
+    def __init__(self, period=RSI_PERIOD):
+        self.period = period
+        self.previous = None
+        self.changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def push(self, value):
+        value = float(value)
+        previous, self.previous = self.previous, value
+        if previous is None or np.isnan(previous) or np.isnan(value):
+            return np.nan
+        change = value - previous
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.changes += 1
+        if self.changes <= self.period:
+            # seed: simple mean of the first ``period`` changes
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.changes < self.period:
+                return np.nan
+        else:
+            self.avg_gain += (gain - self.avg_gain) / self.period
+            self.avg_loss += (loss - self.avg_loss) / self.period
+        if self.avg_loss > 0:
+            return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        return 100.0 if self.avg_gain > 0 else 50.0
+
+
+# -------------------------------
+# ROLLING POSITIONING INDICATORS
+# -------------------------------
+INDICATOR_COLUMNS = (
+    [f'COT Index {w}w' for w in COT_INDEX_WEEKS]
+    + [f'Net z {ZSCORE_WEEKS}w', f'Long % z {ZSCORE_WEEKS}w', 'Net Percentile']
+    + ['Net RSI', 'Long % RSI', 'Net StochRSI']
+)
+
+
+def _cot_index(net, low, high):
+    """Williams COT Index: where Net sits in its [low, high] range, 0-100 (50 on a flat range)"""
+    span = high - low
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(span > 0, (net - low) / np.where(span > 0, span, 1) * 100, 50.0)
+
+
+def positioning_indicators(df):
+    """Rolling indicators for every week of a market, computed vectorized.
+
+    COT Index of Net over each COT_INDEX_WEEKS window, z-scores of Net and
+    Long % over ZSCORE_WEEKS, the percentile rank of Net within all
+    history up to that week, and Wilder RSI of Net and Long % with the
+    stochastic of the Net RSI. Windows report NaN until they are full.
+    """
+    net = df['Net'].astype(float).reset_index(drop=True)
+    long_pct = df['Long %'].astype(float).reset_index(drop=True)
+    out = {'Date': df['Date'].reset_index(drop=True)}
+    for weeks in COT_INDEX_WEEKS:
+        low = net.rolling(weeks).min().to_numpy()
+        high = net.rolling(weeks).max().to_numpy()
+        index = _cot_index(net.to_numpy(), low, high)
+        out[f'COT Index {weeks}w'] = np.where(np.isnan(low), np.nan, index)
+    for name, values in (('Net', net), ('Long %', long_pct)):
+        rolling = values.rolling(ZSCORE_WEEKS)
+        std = rolling.std()
+        out[f'{name} z {ZSCORE_WEEKS}w'] = ((values - rolling.mean()) / std.where(std > 0)).to_numpy()
+    out['Net Percentile'] = net.expanding().rank(method='max', pct=True).to_numpy() * 100
+    out['Net RSI'] = wilder_rsi(net.to_numpy())
+    out['Long % RSI'] = wilder_rsi(long_pct.to_numpy())
+    out['Net StochRSI'] = stochastic(out['Net RSI'])
+    return pd.DataFrame(out)
+
+
+class _RollingWindow:
+    """Last ``weeks`` values with O(1) amortised min, max, mean and std"""
+
+    def __init__(self, weeks):
+        self.weeks = weeks
+        self.values = deque()
+        self.lows = deque()
+        self.highs = deque()
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value):
+        i = self.count
+        self.count += 1
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        while self.lows and self.lows[-1][1] >= value:
+            self.lows.pop()
+        self.lows.append((i, value))
+        while self.highs and self.highs[-1][1] <= value:
+            self.highs.pop()
+        self.highs.append((i, value))
+        if len(self.values) > self.weeks:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+        first = self.count - self.weeks
+        for queue in (self.lows, self.highs):
+            while queue[0][0] < first:
+                queue.popleft()
+
+    @property
+    def full(self):
+        return len(self.values) == self.weeks
+
+    def range(self):
+        return self.lows[0][1], self.highs[0][1]
+
+    def zscore(self, value):
+        n = len(self.values)
+        variance = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return (value - self.total / n) / variance ** 0.5 if variance > 0 else np.nan
+
+
+class IndicatorState:
+    """Running indicator state for one market, advanced one week at a time.
+
+    Min/max come from monotonic deques, z-scores from running sums and
+    RSI from the carried Wilder averages, so each push is O(1) amortised;
+    the percentile keeps every Net seen in a sorted list (O(log n) search,
+    memmove insert).
+    """
+
+    def __init__(self):
+        self.cot = {weeks: _RollingWindow(weeks) for weeks in COT_INDEX_WEEKS}
+        self.net_window = _RollingWindow(ZSCORE_WEEKS)
+        self.long_pct_window = _RollingWindow(ZSCORE_WEEKS)
+        self.history = []
+        self.net_rsi = WilderRSIState()
+        self.long_pct_rsi = WilderRSIState()
+        self.net_rsi_window = _RollingWindow(RSI_PERIOD)
+
+    def push(self, date, net, long_pct):
+        """Advance by one week and return that week's indicator row"""
+        net, long_pct = float(net), float(long_pct)
+        row = {'Date': date}
+        for weeks, window in self.cot.items():
+            window.push(net)
+            row[f'COT Index {weeks}w'] = float(_cot_index(net, *window.range())) if window.full else np.nan
+        for name, window, value in (('Net', self.net_window, net), ('Long %', self.long_pct_window, long_pct)):
+            window.push(value)
+            row[f'{name} z {ZSCORE_WEEKS}w'] = window.zscore(value) if window.full else np.nan
+        insort(self.history, net)
+        row['Net Percentile'] = bisect_right(self.history, net) / len(self.history) * 100
+        row['Net RSI'] = rsi = self.net_rsi.push(net)
+        row['Long % RSI'] = self.long_pct_rsi.push(long_pct)
+        if np.isnan(rsi):
+            row['Net StochRSI'] = np.nan
+        else:
+            self.net_rsi_window.push(rsi)
+            row['Net StochRSI'] = float(_cot_index(rsi, *self.net_rsi_window.range())) if self.net_rsi_window.full else np.nan
+        return row
+
+    @classmethod
+    def from_frame(cls, df):
+        state = cls()
+        for date, net, long_pct in zip(df['Date'], df['Net'], df['Long %']):
+            state.push(date, net, long_pct)
+        return state
+
+
+class IndicatorCache:
+    """Per-market indicator frames kept current as weeks arrive.
+
+    A market seen for the first time, or changed anywhere but its tail, is
+    computed with positioning_indicators; weeks appended since the last
+    call are pushed through the market's IndicatorState (built lazily on
+    the first append). ``counts`` tallies which path each call took.
+    """
+
+    COLUMNS = ('Date', 'Net', 'Long %')
+
+    def __init__(self):
+        self._markets = {}
+        self.counts = {'cached': 0, 'appended': 0, 'computed': 0}
+
+    def get(self, market, df):
+        """Indicator frame for ``df`` (one row per week)"""
+        entry = self._markets.get(market)
+        if entry is not None and _same_positions(entry['frame'], df, self.COLUMNS):
+            entry['frame'] = df
+            self.counts['cached'] += 1
+            return entry['result']
+        n = len(entry['frame']) if entry is not None else 0
+        if (entry is not None and n and len(df) > n and _same_positions(entry['frame'], df.iloc[:n], self.COLUMNS)
+                and df['Date'].iloc[n] > entry['frame']['Date'].iloc[-1]):
+            if entry['state'] is None:
+                entry['state'] = IndicatorState.from_frame(entry['frame'])
+            added = df.iloc[n:]
+            rows = [entry['state'].push(d, net, lp) for d, net, lp in zip(added['Date'], added['Net'], added['Long %'])]
+            entry['result'] = pd.concat([entry['result'], pd.DataFrame(rows)], ignore_index=True)
+            entry['frame'] = df
+            self.counts['appended'] += 1
+            return entry['result']
+        result = positioning_indicators(df)
+        self._markets[market] = {'frame': df, 'result': result, 'state': None}
+        self.counts['computed'] += 1
+        return result
+
+    def latest(self, market, df):
+        """The latest week's indicators as a dict (NaN where a window is not full)"""
+        result = self.get(market, df)
+        return result.iloc[-1].to_dict() if len(result) else {}
+
+
+# -------------------------------
+# MARKET ANALYSIS
+# -------------------------------
+class MarketAnalysis:
+    """Everything the per-market analysis reports, computed once and rendered by cot_report.
+
+    Numbers are plain floats (NaN where a window is not full). ``peaks``
+    maps None (all history) and each PEAK_WINDOWS_YEARS to PeakIndex.peaks
+    output; ``indicators`` is the latest positioning_indicators row.
+    """
+
+    __slots__ = (
+        'market', 'date', 'weeks', 'history_weeks',
+        'longs', 'shorts', 'net', 'long_pct', 'short_pct',
+        'avg_longs', 'avg_shorts', 'avg_net', 'longs_vs_avg', 'shorts_vs_avg', 'bias_shift',
+        'extreme', 'bias', 'zone',
+        'longs_pct_of_peak', 'shorts_pct_of_peak', 'longs_peak_status', 'shorts_peak_status',
+        'near_extremes', 'longs_at_lows', 'shorts_at_lows', 'peaks',
+        'indicators', 'rsi_crossings',
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"MarketAnalysis({self.market!r}, {self.date:%Y-%m-%d}, bias={self.bias!r})"
+
+
+def _peak_status(pct_of_peak):
+    if pct_of_peak is None:
+        return ''
+    return next((label for level, label in PEAK_LEVELS if pct_of_peak >= level), '')
+
+
+def analyze_market(market, df, peak_index=None, indicator_cache=None, weeks=AVERAGE_WEEKS):
+    """MarketAnalysis of one market's frame (at least one week).
+
+    ``peak_index`` and ``indicator_cache`` only make repeat calls cheaper;
+    fresh ones are used when not given, with the same result.
+    """
+    peak_index = peak_index if peak_index is not None else PeakIndex()
+    indicator_cache = indicator_cache if indicator_cache is not None else IndicatorCache()
+    recent = df.tail(weeks)
+    latest = recent.iloc[-1]
+    longs, shorts = float(latest['Longs']), float(latest['Shorts'])
+    long_pct, short_pct = float(latest['Long %']), float(latest['Short %'])
+
+    avg_longs = float(recent['Longs'].mean())
+    avg_shorts = float(recent['Shorts'].mean())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        longs_vs_avg = float(np.float64(longs - avg_longs) / avg_longs * 100)
+        shorts_vs_avg = float(np.float64(shorts - avg_shorts) / avg_shorts * 100)
+
+    all_history = peak_index.update(market, df)
+    peaks = {None: all_history}
+    peaks.update((years, peak_index.peaks(market, years)) for years in PEAK_WINDOWS_YEARS)
+    has_peaks = all_history['has_peaks']
+    peak_longs = all_history.get('peak_longs') if has_peaks else None
+    peak_shorts = all_history.get('peak_shorts') if has_peaks else None
+    min_longs = all_history.get('min_longs') if has_peaks else None
+    min_shorts = all_history.get('min_shorts') if has_peaks else None
+    longs_pct_of_peak = longs / peak_longs * 100 if peak_longs else None
+    shorts_pct_of_peak = shorts / peak_shorts * 100 if peak_shorts else None
+
+    if long_pct >= EXTREME_PCT:
+        extreme, zone = 'BULLISH', 'DEMAND'
+    elif short_pct >= EXTREME_PCT:
+        extreme, zone = 'BEARISH', 'SUPPLY'
+    else:
+        extreme, zone = '', 'RANGE'
+
+    indicators = indicator_cache.get(market, df)
+    return MarketAnalysis(
+        market=market,
+        date=pd.Timestamp(latest['Date']),
+        weeks=len(recent),
+        history_weeks=len(df),
+        longs=longs,
+        shorts=shorts,
+        net=float(latest['Net']),
+        long_pct=long_pct,
+        short_pct=short_pct,
+        avg_longs=avg_longs,
+        avg_shorts=avg_shorts,
+        avg_net=float(recent['Net'].mean()),
+        longs_vs_avg=longs_vs_avg,
+        shorts_vs_avg=shorts_vs_avg,
+        bias_shift=abs(longs_vs_avg) > BIAS_SHIFT_PCT or abs(shorts_vs_avg) > BIAS_SHIFT_PCT,
+        extreme=extreme,
+        bias=extreme or 'NEUTRAL',
+        zone=zone,
+        longs_pct_of_peak=longs_pct_of_peak,
+        shorts_pct_of_peak=shorts_pct_of_peak,
+        longs_peak_status=_peak_status(longs_pct_of_peak),
+        shorts_peak_status=_peak_status(shorts_pct_of_peak),
+        near_extremes=bool((peak_longs and longs >= peak_longs * 0.95)
+                           or (peak_shorts and shorts >= peak_shorts * 0.95)),
+        longs_at_lows=bool(min_longs and longs <= min_longs * HISTORIC_LOW_MARGIN),
+        shorts_at_lows=bool(min_shorts and shorts <= min_shorts * HISTORIC_LOW_MARGIN),
+        peaks=peaks,
+        indicators={k: v if k == 'Date' else float(v) for k, v in indicators.iloc[-1].items()},
+        rsi_crossings=rsi_crossings(indicators['Net RSI']),
+    )
+
+
+def analyze_markets(markets_df, peak_index=None, indicator_cache=None, weeks=AVERAGE_WEEKS):
+    """{market: MarketAnalysis} for every market with data, sharing one PeakIndex and IndicatorCache"""
+    peak_index = peak_index if peak_index is not None else PeakIndex()
+    indicator_cache = indicator_cache if indicator_cache is not None else IndicatorCache()
+    return {market: analyze_market(market, df, peak_index, indicator_cache, weeks)
+            for market, df in markets_df.items() if len(df)}
+
+
+# -------------------------------
+# HISTORICAL BACKTEST
+# -------------------------------
+BACKTEST_HORIZONS = (1, 4, 13)
+
+
+def backtest_columns(horizons=BACKTEST_HORIZONS):
+    return (['Market', 'Date', 'Rule', 'Signal', 'Direction', 'Value', 'New', 'Net', 'Long %']
+            + [f'Net +{h}w' for h in horizons] + [f'Long % +{h}w' for h in horizons])
+
+
+def _trailing_mean(grid, weeks):
+    """Mean of the non-NaN values among up to the last ``weeks`` rows down a left-aligned grid.
+
+    Matches ``rolling(weeks, min_periods=1).mean()`` per column, from one
+    cumulative sum of the values and one of the valid-value counts; a window
+    with no values gives NaN.
+    """
+    def window_sums(values):
+        sums = np.cumsum(values, axis=0)
+        lagged = np.zeros_like(sums)
+        lagged[weeks:] = sums[:-weeks]
+        return sums - lagged
+
+    valid = ~np.isnan(grid)
+    return window_sums(np.where(valid, grid, 0.0)) / window_sums(valid.astype(np.int64))
+
+
+def _forward_change(grid, weeks):
+    """Change from each row to the row ``weeks`` later (NaN past the end of a history)"""
+    change = np.full_like(grid, np.nan)
+    change[:-weeks] = grid[weeks:] - grid[:-weeks]
+    return change
+
+
+def backtest_alerts(markets_df, weeks=AVERAGE_WEEKS, horizons=BACKTEST_HORIZONS):
+    """Every past week on which the bias-shift or 70% extreme alert would have fired.
+
+    The rules analyze_market applies to the latest week are evaluated on
+    every week of every market at once. The averages are trailing
+    ``weeks``-week means from a single cumulative sum down the stacked
+    histories (shorter at the start of a history, as for a short market).
+    Returns one row per trigger with backtest_columns(), sorted by market and
+    date: ``New`` marks the first week of a run of the same signal, and
+    the horizon columns hold the change in Net and Long % over the weeks
+    that followed (NaN past the end of the history).
+    """
+    columns = backtest_columns(horizons)
+    markets, longs, lengths = stack_histories(markets_df, 'Longs')
+    if not markets:
+        return pd.DataFrame(columns=columns)
+    shorts = stack_histories(markets_df, 'Shorts')[1]
+    net = stack_histories(markets_df, 'Net')[1]
+    long_pct = stack_histories(markets_df, 'Long %')[1]
+    short_pct = stack_histories(markets_df, 'Short %')[1]
+    dates = np.full(longs.shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+    for i, market in enumerate(markets):
+        dates[:lengths[i], i] = markets_df[market]['Date'].to_numpy().astype('datetime64[ns]')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_longs = _trailing_mean(longs, weeks)
+        avg_shorts = _trailing_mean(shorts, weeks)
+        longs_vs_avg = (longs - avg_longs) / avg_longs * 100
+        shorts_vs_avg = (shorts - avg_shorts) / avg_shorts * 100
+    forward = {f'Net +{h}w': _forward_change(net, h) for h in horizons}
+    forward.update({f'Long % +{h}w': _forward_change(long_pct, h).round(1) for h in horizons})
+
+    signals = [
+        ('Bias Shift', 'LONGS BULLISH', 'BULLISH', longs_vs_avg > BIAS_SHIFT_PCT, longs_vs_avg),
+        ('Bias Shift', 'LONGS BEARISH', 'BEARISH', longs_vs_avg < -BIAS_SHIFT_PCT, longs_vs_avg),
+        ('Bias Shift', 'SHORTS BEARISH', 'BEARISH', shorts_vs_avg > BIAS_SHIFT_PCT, shorts_vs_avg),
+        ('Bias Shift', 'SHORTS BULLISH', 'BULLISH', shorts_vs_avg < -BIAS_SHIFT_PCT, shorts_vs_avg),
+        ('Extreme', 'EXTREME BULLISH', 'BULLISH', long_pct >= EXTREME_PCT, long_pct),
+        ('Extreme', 'EXTREME BEARISH', 'BEARISH', short_pct >= EXTREME_PCT, short_pct),
+    ]
+    market_names = np.array(markets, dtype=object)
+    frames = []
+    for rule, signal, direction, fired, value in signals:
+        started = fired.copy()
+        started[1:] &= ~fired[:-1]
+        rows, cols = np.nonzero(fired)
+        frames.append(pd.DataFrame({
+            'Market': market_names[cols],
+            'Date': dates[rows, cols],
+            'Rule': rule,
+            'Signal': signal,
+            'Direction': direction,
+            'Value': value[rows, cols].round(1),
+            'New': started[rows, cols],
+            'Net': net[rows, cols],
+            'Long %': long_pct[rows, cols],
+            **{name: change[rows, cols] for name, change in forward.items()},
+        }, columns=columns))
+    triggers = pd.concat(frames, ignore_index=True)
+    return triggers.sort_values(['Market', 'Date'], kind='mergesort').reset_index(drop=True)
+
+
+def backtest_summary(triggers, horizons=BACKTEST_HORIZONS):
+    """Per signal: how often it fired, in how many runs and markets, and how Net moved afterwards.
+
+    ``Net with signal`` is the share of triggers whose Net moved the
+    signal's way (up for BULLISH, down for BEARISH) over the horizon,
+    counting only triggers with that much history after them.
+    """
+    keys = ['Rule', 'Signal', 'Direction']
+    if not len(triggers):
+        return pd.DataFrame(columns=keys + ['Triggers', 'Runs', 'Markets'])
+    bullish = triggers['Direction'].eq('BULLISH')
+    measures = {'Triggers': ('Market', 'size'), 'Runs': ('New', 'sum'), 'Markets': ('Market', 'nunique')}
+    data = triggers[keys + ['Market', 'New']].copy()
+    for h in horizons:
+        change = triggers[f'Net +{h}w']
+        data[f'Avg Net +{h}w'] = change
+        data[f'Net with signal {h}w %'] = ((change > 0) == bullish).astype(float).where(change.notna() & change.ne(0)) * 100
+        measures[f'Avg Net +{h}w'] = (f'Avg Net +{h}w', 'mean')
+        measures[f'Net with signal {h}w %'] = (f'Net with signal {h}w %', 'mean')
+    summary = data.groupby(keys, sort=False).agg(**measures).reset_index()
+    return summary.round(1)
+
+
+# -------------------------------
+# MEMOIZED RESULTS
+# -------------------------------
+def frame_fingerprint(df):
+    """Content hash of a market frame: equal data -> equal fingerprint, whatever the object"""
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.blake2b(rows.tobytes(), digest_size=16)
+    digest.update(repr(list(df.columns)).encode())
+    return digest.hexdigest()
+
+
+class LRUMemo:
+    """Bounded least-recently-used memo with hit/miss/eviction counters (thread-safe)"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, compute):
+        """Cached value for ``key``, calling ``compute()`` and storing it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
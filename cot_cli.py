@@ -0,0 +1,197 @@
+"""Headless fetch, analysis and export for the COT store, without Streamlit.
+
+Works on the same store as the forex_data app (COT_STORE_BACKEND picks
+the backend), so the weekly ingest can run from cron or a worker:
+
+    python -m cot_cli fetch [--offline]
+    python -m cot_cli analyze [--market EUR/USD ...] [--format markdown|json|table]
+    python -m cot_cli export --out reports [--format csv json markdown]
+    python -m cot_cli backtest [--market EUR/USD ...] [--out triggers.csv]
+
+Exit status is 0 on success (including "nothing new"), 1 on failure.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from cot_store import RAW_REPORT_CACHE_NAME, StoreConflict, ingest_report, open_shared_data, report_already_stored
+
+pd.set_option("mode.copy_on_write", True)
+
+DATA_DIR = Path("cftc_data_store")
+EXPORT_FORMATS = ('csv', 'json', 'markdown')
+
+
+def load_markets(args):
+    """(shared data, base version, {market: frame}); exits if the store is empty"""
+    shared = open_shared_data(args.data_dir, args.backend)
+    version, markets_df = shared.view()
+    if not markets_df:
+        sys.exit(f"No market data in {args.data_dir} ({args.backend} store); open the app once to initialise it")
+    return shared, version, markets_df
+
+
+def select_markets(markets_df, names):
+    if not names:
+        return markets_df
+    missing = [m for m in names if m not in markets_df]
+    if missing:
+        sys.exit(f"Unknown market(s): {', '.join(missing)}")
+    return {m: markets_df[m] for m in names}
+
+
+# -------------------------------
+# FETCH
+# -------------------------------
+def cmd_fetch(args):
+    """Fetch the latest CFTC week and append it to every market that lacks it"""
+    from cftc_extractor import CombinedCFTCExtractor, RawReportCache
+
+    shared, version, markets_df = load_markets(args)
+    cache = RawReportCache(Path(args.data_dir) / RAW_REPORT_CACHE_NAME)
+    extractor = CombinedCFTCExtractor(cache=cache, offline=args.offline)
+    grouped_data = extractor.extract_all()
+    if extractor.all_unchanged:
+        print("CFTC reports unchanged since the last fetch")
+        return 0
+    if not extractor.report_date:
+        print("Failed to fetch data", file=sys.stderr)
+        return 1
+
+    report_date = datetime.strptime(extractor.report_date, '%Y-%m-%d')
+    if report_already_stored(markets_df, report_date, grouped_data):
+        extractor.commit_cache()
+        print(f"Data for {extractor.report_date} already exists in the store")
+        return 0
+
+    added = ingest_report(markets_df, report_date, grouped_data)
+    try:
+        shared.sync(markets_df, added, version)
+    except StoreConflict as e:
+        print(f"Not saved: {', '.join(e.markets)} changed while fetching; run again", file=sys.stderr)
+        return 1
+    extractor.commit_cache()
+    print(f"Added {len(added)} new data points for {extractor.report_date}")
+    return 0
+
+
+# -------------------------------
+# ANALYZE / EXPORT / BACKTEST
+# -------------------------------
+def _analyses(markets_df):
+    from cot_analysis import analyze_markets
+    return analyze_markets(markets_df)
+
+
+def cmd_analyze(args):
+    """Print the analysis of every (or each selected) market"""
+    from cot_report import REPORT_SECTIONS, render_json, render_markdown, render_table
+
+    _, _, markets_df = load_markets(args)
+    results = _analyses(select_markets(markets_df, args.market))
+    if args.format == 'json':
+        print(render_json(results))
+    elif args.format == 'table':
+        with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+            print(render_table(results).to_string(index=False))
+    else:
+        sections = args.sections or REPORT_SECTIONS
+        unknown = set(sections) - set(REPORT_SECTIONS)
+        if unknown:
+            sys.exit(f"Unknown section(s): {', '.join(sorted(unknown))} (choose from {', '.join(REPORT_SECTIONS)})")
+        print("\n\n".join(render_markdown(r, sections) for r in results.values()))
+    return 0
+
+
+def cmd_export(args):
+    """Write CSV history, analysis JSON and markdown reports for all markets in one run"""
+    from cot_report import render_json, render_markdown, render_table
+
+    _, _, markets_df = load_markets(args)
+    markets_df = select_markets(markets_df, args.market)
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    written = []
+    if 'csv' in args.format:
+        for market, df in sorted(markets_df.items()):
+            df_download = df.copy()
+            df_download['Date'] = df_download['Date'].dt.strftime('%Y-%m-%d')
+            path = out / f"{market.replace('/', '_')}_cot_data.csv"
+            df_download.to_csv(path, index=False)
+            written.append(path)
+    if 'json' in args.format or 'markdown' in args.format:
+        results = _analyses(markets_df)
+        if 'json' in args.format:
+            path = out / "cot_analysis.json"
+            path.write_text(render_json(results), encoding='utf-8')
+            written.append(path)
+            path = out / "cot_summary.csv"
+            render_table(results).to_csv(path, index=False)
+            written.append(path)
+        if 'markdown' in args.format:
+            path = out / "cot_analysis.md"
+            path.write_text("\n\n".join(render_markdown(r) for r in results.values()), encoding='utf-8')
+            written.append(path)
+    print(f"Wrote {len(written)} file(s) to {out}")
+    return 0
+
+
+def cmd_backtest(args):
+    """Replay the bias-shift and extreme alerts over all stored history"""
+    from cot_analysis import backtest_alerts, backtest_summary
+
+    _, _, markets_df = load_markets(args)
+    triggers = backtest_alerts(select_markets(markets_df, args.market))
+    if args.out:
+        triggers.assign(Date=triggers['Date'].dt.strftime('%Y-%m-%d')).to_csv(args.out, index=False)
+        print(f"Wrote {len(triggers)} triggers to {args.out}")
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(backtest_summary(triggers).to_string(index=False))
+    return 0
+
+
+# -------------------------------
+# ENTRY POINT
+# -------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cot_cli', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help="store directory (default: %(default)s)")
+    parser.add_argument('--backend', default=os.environ.get("COT_STORE_BACKEND", "json"),
+                        choices=('json', 'columnar', 'sqlite'), help="store backend (default: COT_STORE_BACKEND or json)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fetch = commands.add_parser('fetch', help=cmd_fetch.__doc__)
+    fetch.add_argument('--offline', action='store_true', help="parse the last downloaded reports instead of cftc.gov")
+    fetch.set_defaults(run=cmd_fetch)
+
+    analyze = commands.add_parser('analyze', help=cmd_analyze.__doc__)
+    analyze.add_argument('--market', nargs='+', help="markets to analyze (default: all)")
+    analyze.add_argument('--format', default='markdown', choices=('markdown', 'json', 'table'))
+    analyze.add_argument('--sections', nargs='+', help="markdown report sections (default: all)")
+    analyze.set_defaults(run=cmd_analyze)
+
+    export = commands.add_parser('export', help=cmd_export.__doc__)
+    export.add_argument('--out', required=True, help="directory to write the files to")
+    export.add_argument('--market', nargs='+', help="markets to export (default: all)")
+    export.add_argument('--format', nargs='+', default=list(EXPORT_FORMATS), choices=EXPORT_FORMATS)
+    export.set_defaults(run=cmd_export)
+
+    backtest = commands.add_parser('backtest', help=cmd_backtest.__doc__)
+    backtest.add_argument('--market', nargs='+', help="markets to replay (default: all)")
+    backtest.add_argument('--out', help="also write every trigger to this CSV file")
+    backtest.set_defaults(run=cmd_backtest)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""Views of cot_analysis.MarketAnalysis results: markdown, JSON and table.
+
+Rendering never recomputes anything, so one batch of analyses can back
+the app's report tabs, a JSON export and a summary table alike.
+"""
+import json
+import math
+
+import pandas as pd
+
+from cot_analysis import (
+    AVERAGE_WEEKS, BIAS_SHIFT_PCT, COT_INDEX_WEEKS, MIN_PEAK_WEEKS, PEAK_WINDOWS_YEARS, RSI_PERIOD, ZSCORE_WEEKS,
+)
+
+REPORT_SECTIONS = ('positioning', 'peak', 'comparison', 'indicators', 'zones', 'rsi', 'myfxbook', 'news', 'plan')
+
+TABLE_INDICATORS = [*(f'COT Index {w}w' for w in COT_INDEX_WEEKS), f'Net z {ZSCORE_WEEKS}w', 'Net Percentile', 'Net RSI']
+TABLE_COLUMNS = [
+    'Market', 'Date', 'Longs', 'Shorts', 'Net', 'Long %', 'Short %',
+    'Longs vs Avg %', 'Shorts vs Avg %', 'Bias Shift', 'Bias', 'Zone',
+    'Longs % of Peak', 'Shorts % of Peak', 'Near Extremes', 'Longs at Lows', 'Shorts at Lows',
+    *TABLE_INDICATORS,
+]
+
+
+# -------------------------------
+# MARKDOWN
+# -------------------------------
+def _fmt(value, spec, suffix=""):
+    return "n/a" if pd.isna(value) else format(value, spec) + suffix
+
+
+def _bias_shift_lines(r):
+    lines = ["### ⚠️ **BIAS SHIFT DETECTED!**"]
+    if r.longs_vs_avg > BIAS_SHIFT_PCT:
+        lines.append(f"🔥 **LONGS shifting BULLISH** - {r.longs_vs_avg:+.1f}% above {AVERAGE_WEEKS}-week average")
+        lines.append("🎯 **Watch DEMAND ZONES carefully as price approaches**")
+    elif r.longs_vs_avg < -BIAS_SHIFT_PCT:
+        lines.append(f"📉 **LONGS shifting BEARISH** - {r.longs_vs_avg:+.1f}% below {AVERAGE_WEEKS}-week average")
+        lines.append("🎯 **Watch SUPPLY ZONES carefully as price approaches**")
+
+    if r.shorts_vs_avg > BIAS_SHIFT_PCT:
+        lines.append(f"🔥 **SHORTS shifting BEARISH** - {r.shorts_vs_avg:+.1f}% above {AVERAGE_WEEKS}-week average")
+        lines.append("🎯 **Watch SUPPLY ZONES carefully as price approaches**")
+    elif r.shorts_vs_avg < -BIAS_SHIFT_PCT:
+        lines.append(f"📈 **SHORTS shifting BULLISH** - {r.shorts_vs_avg:+.1f}% below {AVERAGE_WEEKS}-week average")
+        lines.append("🎯 **Watch DEMAND ZONES carefully as price approaches**")
+    lines.append("---")
+    return lines
+
+
+def _positioning_lines(r):
+    lines = [
+        "### 🎯 CURRENT INSTITUTIONAL POSITIONING",
+        f"- **Longs:** {r.longs:,.0f} ({r.long_pct:.1f}%)",
+        f"- **Shorts:** {r.shorts:,.0f} ({r.short_pct:.1f}%)",
+        f"- **Net Position:** {r.net:+,.0f}",
+    ]
+    if r.extreme == 'BULLISH':
+        lines.append("🔥 **EXTREME BULLISH** - 70%+ long concentration")
+    elif r.extreme == 'BEARISH':
+        lines.append("🔥 **EXTREME BEARISH** - 70%+ short concentration")
+    return lines
+
+
+_LONGS_PEAK_LINES = {
+    'AT ALL-TIME HIGH': ["🔴 **CRITICAL: AT ALL-TIME HIGH** - Swift reversal expected!",
+                         "   → Look for **SUPPLY ZONES** above current price"],
+    'APPROACHING ALL-TIME HIGH': ["⚠️ **CRITICAL: APPROACHING ALL-TIME HIGH**",
+                                  "   → Prepare for potential reversal at supply zones"],
+    'NEAR PEAK': ["📊 **Near peak levels** - Monitor for exhaustion at supply"],
+}
+_SHORTS_PEAK_LINES = {
+    'AT ALL-TIME HIGH': ["🔴 **CRITICAL: SHORTS AT ALL-TIME HIGH** - Short squeeze imminent!",
+                         "   → Look for **DEMAND ZONES** below current price"],
+    'APPROACHING ALL-TIME HIGH': ["⚠️ **CRITICAL: SHORTS APPROACHING ALL-TIME HIGH**",
+                                  "   → Prepare for potential short squeeze at demand zones"],
+    'NEAR PEAK': ["📊 **Shorts near peak** - Monitor for covering at demand"],
+}
+
+
+def _peak_lines(r):
+    lines = ["### 📈 PEAK VOLUME ANALYSIS"]
+    peaks = r.peaks[None]
+    if not peaks['has_peaks']:
+        lines.append(f"📊 Not enough history for peak analysis ({peaks['weeks']} weeks stored, "
+                     f"{MIN_PEAK_WEEKS} needed) - import the CFTC archives to backfill")
+        return lines
+
+    if r.longs_pct_of_peak is not None:
+        lines.append(f"\n**Longs:** {r.longs:,.0f} vs Peak {peaks['peak_longs']:,.0f} on "
+                     f"{peaks['peak_longs_date']:%Y-%m-%d} ({r.longs_pct_of_peak:.1f}%)")
+        lines.extend(_LONGS_PEAK_LINES.get(r.longs_peak_status, []))
+    if r.shorts_pct_of_peak is not None:
+        lines.append(f"\n**Shorts:** {r.shorts:,.0f} vs Peak {peaks['peak_shorts']:,.0f} on "
+                     f"{peaks['peak_shorts_date']:%Y-%m-%d} ({r.shorts_pct_of_peak:.1f}%)")
+        lines.extend(_SHORTS_PEAK_LINES.get(r.shorts_peak_status, []))
+    if r.longs_at_lows:
+        lines.append("\n🟢 **Longs at historic lows** - Potential **DEMAND ZONE** forming")
+    if r.shorts_at_lows:
+        lines.append("\n🔴 **Shorts at historic lows** - Potential **SUPPLY ZONE** forming")
+
+    lines.append(f"\n**Ranges** (all {peaks['weeks']} weeks stored, then rolling windows):")
+    for years in (None, *PEAK_WINDOWS_YEARS):
+        window = r.peaks[years]
+        if window['has_peaks']:
+            label = "All history" if years is None else f"Last {years}y"
+            lines.append(f"- **{label}:** Longs {window['min_longs']:,.0f} – {window['peak_longs']:,.0f} · "
+                         f"Shorts {window['min_shorts']:,.0f} – {window['peak_shorts']:,.0f}")
+    return lines
+
+
+def _comparison_lines(r):
+    lines = [
+        f"### 📊 {AVERAGE_WEEKS}-WEEK AVERAGE COMPARISON",
+        f"- **Longs:** {r.longs:,.0f} vs {AVERAGE_WEEKS}wk avg {r.avg_longs:,.0f} ({r.longs_vs_avg:+.1f}%)",
+        f"- **Shorts:** {r.shorts:,.0f} vs {AVERAGE_WEEKS}wk avg {r.avg_shorts:,.0f} ({r.shorts_vs_avg:+.1f}%)",
+        f"- **Net:** {r.net:+,.0f} vs {AVERAGE_WEEKS}wk avg {r.avg_net:+,.0f}",
+    ]
+    if abs(r.longs_vs_avg) > 20:
+        lines.append(f"\n{'📈' if r.longs_vs_avg > 0 else '📉'} **Significant deviation** in long positioning")
+    if abs(r.shorts_vs_avg) > 20:
+        lines.append(f"{'📉' if r.shorts_vs_avg > 0 else '📈'} **Significant deviation** in short positioning")
+    return lines
+
+
+def _indicator_lines(r):
+    ind = r.indicators
+    cot_values = " / ".join(_fmt(ind[f'COT Index {w}w'], '.0f') for w in COT_INDEX_WEEKS)
+    lines = [
+        "### 📐 POSITIONING INDICATORS",
+        f"- **COT Index ({' / '.join(f'{w}w' for w in COT_INDEX_WEEKS)}):** {cot_values}",
+        f"- **Net z-score ({ZSCORE_WEEKS}w):** {_fmt(ind[f'Net z {ZSCORE_WEEKS}w'], '+.2f', 'σ')}",
+        f"- **Long % z-score ({ZSCORE_WEEKS}w):** {_fmt(ind[f'Long % z {ZSCORE_WEEKS}w'], '+.2f', 'σ')}",
+        f"- **Net percentile:** {_fmt(ind['Net Percentile'], '.0f')} (of {r.history_weeks} weeks stored)",
+    ]
+    for weeks in COT_INDEX_WEEKS:
+        value = ind[f'COT Index {weeks}w']
+        if value >= 90:
+            lines.append(f"\n🔥 **Net long at the top of its {weeks}-week range** - crowded, watch SUPPLY ZONES")
+            break
+        if value <= 10:
+            lines.append(f"\n🧊 **Net long at the bottom of its {weeks}-week range** - washed out, watch DEMAND ZONES")
+            break
+    if abs(ind[f'Net z {ZSCORE_WEEKS}w']) >= 2:
+        lines.append(f"⚠️ **Net positioning {ind[f'Net z {ZSCORE_WEEKS}w']:+.1f}σ from its {ZSCORE_WEEKS}-week mean**")
+    if any(pd.isna(ind[f'COT Index {w}w']) for w in COT_INDEX_WEEKS):
+        lines.append("\n*n/a: not enough weeks stored yet - import the CFTC archives to backfill*")
+    return lines
+
+
+def _zone_lines(r):
+    lines = ["### 🎯 KEY SUPPLY/DEMAND ZONES"]
+    if r.zone == 'DEMAND':
+        lines += [
+            "**📈 DEMAND ZONE** (Institutional Buying)",
+            "- **Location:** Recent swing lows",
+            "- **Strategy:** Buy on pullbacks to demand zone",
+            "- **Stop Loss:** Below the demand zone low",
+            "- **RSI Confirmation:** Look for RSI > 40 to confirm demand zone holding",
+        ]
+    elif r.zone == 'SUPPLY':
+        lines += [
+            "**📉 SUPPLY ZONE** (Institutional Selling)",
+            "- **Location:** Recent swing highs",
+            "- **Strategy:** Sell on rallies to supply zone",
+            "- **Stop Loss:** Above the supply zone high",
+            "- **RSI Confirmation:** Look for RSI < 60 to confirm supply zone holding",
+        ]
+    else:
+        lines += [
+            "**📊 RANGE BOUNDARIES**",
+            "- **Demand Zone:** Recent swing lows",
+            "- **Supply Zone:** Recent swing highs",
+            "- **Strategy:** Buy at demand, sell at supply",
+            "- **RSI Confirmation:** RSI < 30 at demand, RSI > 70 at supply",
+        ]
+    return lines
+
+
+def _rsi_lines(r):
+    lines = [
+        "### 📊 RSI CONFIRMATION LEVELS",
+        "**RSI (Relative Strength Index) Rules:**",
+        "- **RSI > 40** suggests DEMAND ZONE will likely hold (bullish)",
+        "- **RSI < 60** suggests SUPPLY ZONE will likely hold (bearish)",
+        "- **RSI < 30** at demand zone = oversold bounce potential",
+        "- **RSI > 70** at supply zone = overbought reversal potential",
+        f"\n**Positioning RSI** (Wilder, {RSI_PERIOD} weeks):",
+    ]
+    net_rsi = r.indicators['Net RSI']
+    if pd.isna(net_rsi):
+        lines.append(f"- Needs {RSI_PERIOD + 1} weeks of history ({r.history_weeks} stored)")
+        return lines
+    stoch_rsi = r.indicators['Net StochRSI']
+    lines.append(f"- **Net RSI:** {net_rsi:.1f}" + (f" · StochRSI {stoch_rsi:.0f}" if not pd.isna(stoch_rsi) else ""))
+    lines.append(f"- **Long % RSI:** {r.indicators['Long % RSI']:.1f}")
+    if net_rsi >= 70:
+        lines.append("🔥 **Net positioning overbought** (RSI ≥ 70) - reversal risk at supply")
+    elif net_rsi <= 30:
+        lines.append("🧊 **Net positioning oversold** (RSI ≤ 30) - bounce potential at demand")
+    for level, crossing in r.rsi_crossings.items():
+        if crossing is not None and crossing[0] <= 4:
+            weeks_ago, direction = crossing
+            when = "this week" if weeks_ago == 0 else f"{weeks_ago} week{'s' if weeks_ago > 1 else ''} ago"
+            lines.append(f"- Net RSI crossed {'above' if direction == 'up' else 'below'} {level} {when}")
+    return lines
+
+
+def _myfxbook_lines(r):
+    lines = ["### 👥 MYFXBOOK RETAIL SENTIMENT", "**Contrarian Trading Signals:**"]
+    if r.extreme == 'BULLISH':
+        lines += [
+            "- **🔥 Institutional long extreme** → Check MyFxBook for retail long crowd",
+            "- **CONTRARIAN:** If retail is also long, consider fading the move",
+            "- **Confirmation:** Wait for retail sentiment to peak before trading against",
+        ]
+    elif r.extreme == 'BEARISH':
+        lines += [
+            "- **🔥 Institutional short extreme** → Check MyFxBook for retail short crowd",
+            "- **CONTRARIAN:** If retail is also short, prepare for reversal",
+            "- **Confirmation:** Look for retail capitulation",
+        ]
+    else:
+        lines += [
+            "- Monitor MyFxBook for extreme retail positioning (80%+ in one direction)",
+            "- Use as additional confluence with COT data",
+        ]
+    lines += [
+        "\n**Trading Against Sentiment Rules:**",
+        "1. Identify extreme retail positioning (70-80%+ on MyFxBook)",
+        "2. Confirm with COT institutional extreme (70%+ longs/shorts)",
+        "3. Wait for price to reach key supply/demand zone",
+        "4. Look for reversal candlestick patterns",
+        "5. Execute trade in opposite direction of retail crowd",
+    ]
+    return lines
+
+
+def _news_lines(r):
+    return [
+        "### 📰 NEWS & FUNDAMENTAL CONTEXT",
+        "**Check MyFxBook News Section for:**",
+        "- Central bank decisions (Fed, ECB, BOE, etc.)",
+        "- Economic data releases (CPI, NFP, GDP, etc.)",
+        "- Geopolitical events",
+        "- Market sentiment shifts",
+        "\n**Integration with COT Data:**",
+        "- Strong COT positioning + major news event = increased volatility",
+        "- News can trigger the reversal at extreme COT levels",
+        "- Use news as confluence for supply/demand zone trades",
+    ]
+
+
+_BIAS_TEXT = {
+    'BULLISH': "BULLISH (but watch for reversal at supply)",
+    'BEARISH': "BEARISH (but watch for reversal at demand)",
+    'NEUTRAL': "NEUTRAL - range trading",
+}
+
+
+def _plan_lines(r):
+    lines = [
+        "### 📋 COMPLETE TRADING PLAN",
+        f"**Primary Bias:** {_BIAS_TEXT[r.bias]}",
+        "\n**✅ ENTRY CONDITIONS (ALL must be met):**",
+        "1. **COT Confirmation:** Institutional positioning aligns with bias",
+        "2. **Price Action:** Price reaches key supply/demand zone",
+        "3. **RSI Confirmation:**",
+        "   - For DEMAND zone longs: RSI > 40 (zone likely to hold)",
+        "   - For SUPPLY zone shorts: RSI < 60 (zone likely to hold)",
+        "4. **MyFxBook Sentiment:** Retail crowd is on opposite side (contrarian)",
+        "5. **Candlestick Pattern:** Reversal signal at the zone",
+        "\n**🛑 STOP LOSS PLACEMENT:**",
+    ]
+    if r.bias == 'BULLISH':
+        lines += ["- Below the DEMAND ZONE low", "- Add 1.5x ATR buffer for volatility"]
+    elif r.bias == 'BEARISH':
+        lines += ["- Above the SUPPLY ZONE high", "- Add 1.5x ATR buffer for volatility"]
+    else:
+        lines.append("- Beyond range boundaries (below demand or above supply)")
+    lines += [
+        "\n**🎯 TAKE PROFIT TARGETS:**",
+        "- **Target 1:** Nearest opposite zone (1:2 risk/reward)",
+        "- **Target 2:** Next major supply/demand level",
+        "- **Target 3:** Trail stop after 1:1 achieved",
+        "\n**⚖️ RISK MANAGEMENT:**",
+        "- Maximum risk: 1-2% of account per trade",
+        "- Avoid trading 30 minutes before/after major news",
+        "- Correlated markets should confirm (e.g., EUR/USD and GBP/USD)",
+    ]
+    if r.near_extremes:
+        lines += [
+            "\n⚠️ **⚠️ CRITICAL WARNING: NEAR HISTORICAL EXTREMES! ⚠️**",
+            "**Action:** Prepare for swift reversal at nearest supply/demand zone",
+            "**Confirmation:** Wait for RSI divergence and MyFxBook retail extreme",
+        ]
+    return lines
+
+
+_SECTION_LINES = {
+    'positioning': _positioning_lines,
+    'peak': _peak_lines,
+    'comparison': _comparison_lines,
+    'indicators': _indicator_lines,
+    'zones': _zone_lines,
+    'rsi': _rsi_lines,
+    'myfxbook': _myfxbook_lines,
+    'news': _news_lines,
+    'plan': _plan_lines,
+}
+
+
+def render_section(result, section):
+    """Markdown for one of REPORT_SECTIONS, rendered on its own so it can be cached per toggle"""
+    return "\n".join(_SECTION_LINES[section](result) + [""])
+
+
+def join_sections(result, section_texts):
+    """The analysis tab's markdown around already rendered sections (in REPORT_SECTIONS order)"""
+    lines = [f"## 📊 COMPLETE ANALYSIS: {result.market}", "---"]
+    if result.bias_shift:
+        lines += _bias_shift_lines(result)
+    lines += section_texts
+    lines += [
+        "---",
+        f"*Analysis based on last {result.weeks} weeks of COT data*",
+        "*Combine with technical analysis on your charts*",
+    ]
+    return "\n".join(lines)
+
+
+def render_markdown(result, sections=REPORT_SECTIONS):
+    """The analysis tab's markdown for one MarketAnalysis, showing only ``sections``"""
+    return join_sections(result, [render_section(result, s) for s in REPORT_SECTIONS if s in sections])
+
+
+# -------------------------------
+# JSON
+# -------------------------------
+def _jsonable(value):
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {'all' if k is None else str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if hasattr(value, 'item'):
+        return _jsonable(value.item())
+    return value
+
+
+def analysis_record(result):
+    """A MarketAnalysis as plain JSON types (dates as YYYY-MM-DD, NaN as null)"""
+    return _jsonable(result.as_dict())
+
+
+def render_json(results, indent=2):
+    """JSON for a {market: MarketAnalysis} batch, or for a single MarketAnalysis"""
+    if hasattr(results, 'as_dict'):
+        return json.dumps(analysis_record(results), indent=indent, ensure_ascii=False)
+    return json.dumps({m: analysis_record(r) for m, r in results.items()}, indent=indent, ensure_ascii=False)
+
+
+# -------------------------------
+# TABLE
+# -------------------------------
+def render_table(results):
+    """One row per MarketAnalysis with TABLE_COLUMNS, rounded for display"""
+    rows = []
+    for r in results.values():
+        rows.append({
+            'Market': r.market,
+            'Date': r.date,
+            'Longs': r.longs,
+            'Shorts': r.shorts,
+            'Net': r.net,
+            'Long %': r.long_pct,
+            'Short %': r.short_pct,
+            'Longs vs Avg %': round(r.longs_vs_avg, 1),
+            'Shorts vs Avg %': round(r.shorts_vs_avg, 1),
+            'Bias Shift': r.bias_shift,
+            'Bias': r.bias,
+            'Zone': r.zone,
+            'Longs % of Peak': math.nan if r.longs_pct_of_peak is None else round(r.longs_pct_of_peak, 1),
+            'Shorts % of Peak': math.nan if r.shorts_pct_of_peak is None else round(r.shorts_pct_of_peak, 1),
+            'Near Extremes': r.near_extremes,
+            'Longs at Lows': r.longs_at_lows,
+            'Shorts at Lows': r.shorts_at_lows,
+            **{c: round(r.indicators[c], 1) for c in TABLE_INDICATORS},
+        })
+    return pd.DataFrame(rows, columns=TABLE_COLUMNS)
@@ -0,0 +1,1392 @@
+"""Persistent storage for the per-market COT history.
+
+Kept free of Streamlit so scripts and benchmarks can read and write the
+same store as the forex_data app.
+"""
+import re
+import json
+import mmap
+import os
+import shutil
+import hashlib
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+from cftc_extractor import USD_BASE_MARKETS, switch_position_record
+
+# -------------------------------
+# LOCKING & VERSIONS
+# -------------------------------
+class StoreConflict(Exception):
+    """Markets this write touches were changed by another writer since they were read"""
+
+    def __init__(self, markets):
+        self.markets = sorted(markets)
+        super().__init__(f"changed by another session: {', '.join(self.markets)}")
+
+
+@contextmanager
+def store_lock(lock_path):
+    """Exclusive cross-process lock on ``lock_path`` (flock, or msvcrt on Windows)"""
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_store_version(version_path):
+    """{'version': n, 'markets': {market: version it last changed in}}"""
+    try:
+        with open(version_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'version': 0, 'markets': {}}
+
+
+def write_store_version(version_path, version):
+    tmp_path = Path(f"{version_path}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(version, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, version_path)
+
+# -------------------------------
+# ROW HELPERS
+# -------------------------------
+INTERPOLATED = 'Interpolated'
+
+
+def _clean_values(values):
+    """NaN -> None so rows compare equal and serialize as JSON null"""
+    return [None if v != v else v for v in values]
+
+
+def frame_rows(df):
+    """Split a market DataFrame into (columns, {date: row tuple})"""
+    columns = tuple(c for c in df.columns if c != 'Date')
+    dates = df['Date'].dt.strftime('%Y-%m-%d').tolist()
+    values = zip(*(_clean_values(df[c].tolist()) for c in columns)) if columns else ((),) * len(dates)
+    return columns, dict(zip(dates, values))
+
+
+def frames_match(a, b):
+    """Same columns, dates and values, whatever the dtypes (an int64 1 matches a float64 1.0)"""
+    try:
+        pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True),
+                                      check_dtype=False, check_exact=True)
+    except AssertionError:
+        return False
+    return True
+
+
+def frame_has_date(df, date):
+    """Binary search for ``date`` in a date-sorted market frame"""
+    dates = df['Date'].to_numpy()
+    target = np.datetime64(pd.Timestamp(date), 'ns')
+    i = dates.searchsorted(target)
+    return bool(i < len(dates) and dates[i] == target)
+
+
+def rows_to_frame(columns, rows):
+    """Build a date-sorted market DataFrame from {date: row tuple}"""
+    dates = sorted(rows)
+    df = pd.DataFrame.from_records([rows[d] for d in dates], columns=list(columns))
+    df.insert(0, 'Date', pd.to_datetime(dates))
+    return df
+
+def derive_position_columns(df):
+    """Recompute Total, Long %, Short % and Net from Longs/Shorts in place"""
+    total = df['Longs'] + df['Shorts']
+    positive_total = total.where(total > 0)
+    df['Total'] = total
+    df['Long %'] = (df['Longs'] / positive_total * 100).round(1).fillna(0)
+    df['Short %'] = (df['Shorts'] / positive_total * 100).round(1).fillna(0)
+    df['Net'] = df['Longs'] - df['Shorts']
+    return df
+
+def upsert_positions(df, edited, deleted=()):
+    """A new date-sorted frame with ``edited`` Date/Longs/Shorts rows merged in on Date.
+
+    Dates already in ``df`` are replaced and new ones added, with Total,
+    percentages and Net recomputed for every upserted row (which count as
+    reported unless ``edited`` carries its own Interpolated flags); dates in
+    ``deleted`` that ``edited`` does not also carry are dropped. Blank rows
+    are ignored. Raises ValueError if a row has no date or a missing or
+    negative position.
+    """
+    core = ['Date', 'Longs', 'Shorts']
+    edited = edited[core + [INTERPOLATED] if INTERPOLATED in edited else core].dropna(how='all', subset=core)
+    edited = edited.assign(
+        Date=pd.to_datetime(edited['Date']),
+        Longs=pd.to_numeric(edited['Longs'], errors='coerce'),
+        Shorts=pd.to_numeric(edited['Shorts'], errors='coerce'),
+    )
+    positions = edited[['Longs', 'Shorts']]
+    bad = edited['Date'].isna() | positions.isna().any(axis=1) | (positions < 0).any(axis=1)
+    if bad.any():
+        rows = ", ".join('no date' if pd.isna(d) else f"{d:%Y-%m-%d}" for d in edited.loc[bad, 'Date'][:5])
+        raise ValueError(f"Longs and Shorts must be non-negative numbers ({rows})")
+    edited = edited.drop_duplicates('Date', keep='last')
+    for column in ('Longs', 'Shorts'):
+        # keep integer columns integer when every pasted value is whole
+        if column in df and df[column].dtype.kind in 'iu' and (edited[column] % 1 == 0).all():
+            edited[column] = edited[column].astype(df[column].dtype)
+    if INTERPOLATED in df and INTERPOLATED not in edited:
+        edited[INTERPOLATED] = False
+    columns = list(df.columns) + [c for c in edited.columns if c not in df.columns]
+    edited = derive_position_columns(edited).reindex(columns=columns)
+
+    removed = edited['Date']
+    if len(deleted):
+        removed = pd.concat([removed, pd.Series(pd.to_datetime(list(deleted)))], ignore_index=True)
+    kept = df[~df['Date'].isin(removed)]
+    merged = pd.concat([kept, edited], ignore_index=True) if len(edited) else kept
+    if INTERPOLATED in merged:
+        merged[INTERPOLATED] = merged[INTERPOLATED].eq(True)
+    return merged.sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+def editor_changes(shown, edited):
+    """(rows to upsert, dates to delete) from a Date/Longs/Shorts data editor.
+
+    ``shown`` is the frame the editor was given and ``edited`` what it
+    returned, matched on the index. Only new and changed rows are upserted
+    and only removed or re-dated rows deleted, so untouched rows keep their
+    Interpolated flag and the edit is stored as a row patch.
+    """
+    core = ['Date', 'Longs', 'Shorts']
+    before = shown[core].assign(Date=pd.to_datetime(shown['Date']))
+    after = edited[core].assign(Date=pd.to_datetime(edited['Date'], errors='coerce'))
+    kept = before.index.intersection(after.index)
+    differs = before.loc[kept].ne(after.loc[kept]).any(axis=1)
+    changed = kept[differs.to_numpy()]
+    upserts = after[~after.index.isin(kept) | after.index.isin(changed)]
+    deleted = before.loc[~before.index.isin(kept) | before.index.isin(changed), 'Date']
+    return upserts, deleted
+
+# -------------------------------
+# WEEKLY INGEST
+# -------------------------------
+def add_new_data(markets_df, display_name, new_date, new_data):
+    """Add one report week to a market (switching USD-based pairs); a week already stored is replaced"""
+    processed_data = switch_position_record(new_data) if display_name in USD_BASE_MARKETS else new_data
+
+    new_row = pd.DataFrame([{
+        'Date': new_date,
+        'Longs': processed_data['longs'],
+        'Shorts': processed_data['shorts'],
+        'Total': processed_data['total'],
+        'Long %': processed_data['long_percent'],
+        'Short %': processed_data['short_percent'],
+        'Net': processed_data['net']
+    }])
+
+    if display_name in markets_df:
+        updated_df = pd.concat([markets_df[display_name], new_row], ignore_index=True)
+        if INTERPOLATED in updated_df:
+            updated_df[INTERPOLATED] = updated_df[INTERPOLATED].eq(True)
+    else:
+        updated_df = new_row
+
+    updated_df = updated_df.sort_values('Date', ascending=True).reset_index(drop=True)
+    updated_df = updated_df.drop_duplicates(subset=['Date'], keep='last')
+    markets_df[display_name] = updated_df
+
+    return markets_df
+
+def _stored_date_check(markets_df, has_date):
+    if has_date is not None:
+        return has_date
+    return lambda market, date: market in markets_df and frame_has_date(markets_df[market], date)
+
+def report_already_stored(markets_df, report_date, grouped_data, has_date=None):
+    """Whether any market in a fetched report already holds ``report_date``"""
+    has_date = _stored_date_check(markets_df, has_date)
+    return any(has_date(display_name, report_date)
+               for markets in grouped_data.values() for display_name in markets)
+
+def ingest_report(markets_df, report_date, grouped_data, has_date=None):
+    """Add a fetched week (CombinedCFTCExtractor.extract_all output) to every market lacking it.
+
+    ``has_date(market, date)`` defaults to a binary search of the frame.
+    Returns the markets that were added to.
+    """
+    has_date = _stored_date_check(markets_df, has_date)
+    added = []
+    for markets in grouped_data.values():
+        for display_name, data in markets.items():
+            if not has_date(display_name, report_date):
+                add_new_data(markets_df, display_name, report_date, data)
+                added.append(display_name)
+    return added
+
+# -------------------------------
+# WEEKLY GAP REPAIR
+# -------------------------------
+def report_weeks(dates):
+    """Each date moved to the nearest Tuesday, the as-of day of COT reports"""
+    dates = pd.DatetimeIndex(dates)
+    return dates + pd.to_timedelta((1 - dates.dayofweek + 3) % 7 - 3, unit='D')
+
+
+def interpolate_missing_weeks(markets_df, markets=None):
+    """Every week missing inside each market's history, filled by interpolation.
+
+    All markets are laid on one weekly Tuesday calendar and interpolated
+    together, linearly in time between the reported weeks either side (as
+    ``np.interp`` would), so backfilled history with hundreds of holes is
+    repaired in one pass. Weeks before a market's first or after its last
+    report are left alone. Returns {market: Date/Longs/Shorts/Interpolated
+    frame of the filled weeks} for the markets that had gaps.
+    """
+    markets = [m for m in (markets_df if markets is None else markets) if len(markets_df.get(m, ())) > 1]
+    if not markets:
+        return {}
+    stacked = pd.concat({m: markets_df[m][['Date', 'Longs', 'Shorts']] for m in markets}, names=['Market', None])
+    stacked = stacked.reset_index(level=0).dropna(subset=['Longs', 'Shorts'])
+    stacked['Week'] = report_weeks(stacked['Date'])
+    stacked = stacked.drop_duplicates(['Market', 'Week'], keep='last')
+    calendar = pd.date_range(stacked['Week'].min(), stacked['Week'].max(), freq='W-TUE')
+
+    filled = {}
+    for column in ('Longs', 'Shorts'):
+        wide = stacked.pivot(index='Week', columns='Market', values=column).reindex(calendar).astype(float)
+        filled[column] = wide.interpolate(method='time', limit_area='inside').round()
+    missing = wide.isna() & filled['Shorts'].notna()
+    if not missing.to_numpy().any():
+        return {}
+
+    gaps = missing.stack()
+    gaps = gaps[gaps].index
+    rows = pd.DataFrame({
+        'Market': gaps.get_level_values(1),
+        'Date': gaps.get_level_values(0),
+        'Longs': filled['Longs'].stack().reindex(gaps).to_numpy(),
+        'Shorts': filled['Shorts'].stack().reindex(gaps).to_numpy(),
+        INTERPOLATED: True,
+    })
+    return {market: group.drop(columns='Market').reset_index(drop=True) for market, group in rows.groupby('Market', sort=False)}
+
+# -------------------------------
+# EDIT TRANSACTIONS
+# -------------------------------
+class MarketTransaction:
+    """Staged row upserts and deletes for one market.
+
+    Nothing is written until the caller commits; ``apply`` overlays the
+    staged changes on a frame and is idempotent, so it can be re-applied
+    to a freshly loaded frame on every rerun.
+    """
+
+    def __init__(self, market):
+        self.market = market
+        self.upserts = {}
+        self.deletes = set()
+        self.interpolated = set()
+
+    def __len__(self):
+        return len(self.upserts) + len(self.deletes)
+
+    def upsert(self, date, longs, shorts, interpolated=False):
+        date = pd.Timestamp(date)
+        self.deletes.discard(date)
+        self.upserts[date] = (longs, shorts)
+        if interpolated:
+            self.interpolated.add(date)
+        else:
+            self.interpolated.discard(date)
+
+    def delete(self, date):
+        date = pd.Timestamp(date)
+        self.upserts.pop(date, None)
+        self.interpolated.discard(date)
+        self.deletes.add(date)
+
+    def validate(self):
+        """Problems with the staged batch as a list of messages (empty if valid)"""
+        errors = []
+        for date, (longs, shorts) in sorted(self.upserts.items()):
+            try:
+                valid = np.isfinite([float(longs), float(shorts)]).all() and float(longs) >= 0 and float(shorts) >= 0
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                errors.append(f"{date:%Y-%m-%d}: Longs and Shorts must be non-negative numbers")
+        return errors
+
+    def apply(self, df):
+        """A new date-sorted frame with every staged change applied"""
+        if not len(self):
+            return df
+        dates = sorted(self.upserts)
+        staged = pd.DataFrame({
+            'Date': pd.to_datetime(dates),
+            'Longs': [float(self.upserts[d][0]) for d in dates],
+            'Shorts': [float(self.upserts[d][1]) for d in dates],
+        })
+        if self.interpolated or INTERPOLATED in df:
+            staged[INTERPOLATED] = [d in self.interpolated for d in dates]
+        return upsert_positions(df, staged, self.deletes)
+
+# -------------------------------
+# UNDO / REDO JOURNAL
+# -------------------------------
+def _as_list(values):
+    return None if values is None else list(values)
+
+
+def row_delta(before, after):
+    """Rows that differ between two versions of a market frame (either may be None).
+
+    Returns {'columns': [before columns, after columns], 'rows': [[date,
+    old row, new row], ...]} with None for a missing side, or None if the
+    frames hold the same rows.
+    """
+    old_columns, old_rows = frame_rows(before) if before is not None else (None, {})
+    new_columns, new_rows = frame_rows(after) if after is not None else (None, {})
+    rows = [
+        [date, _as_list(old_rows.get(date)), _as_list(new_rows.get(date))]
+        for date in sorted(set(old_rows) | set(new_rows))
+        if old_columns != new_columns or old_rows.get(date) != new_rows.get(date)
+    ]
+    if not rows and old_columns == new_columns:
+        return None
+    return {'columns': [_as_list(old_columns), _as_list(new_columns)], 'rows': rows}
+
+
+def _rows_at(df, dates):
+    """{date: row list} for the rows of a date-sorted frame at ``dates``; O(k log n)"""
+    positions = df['Date'].to_numpy().searchsorted(pd.to_datetime(dates).to_numpy())
+    found = {}
+    columns = [c for c in df.columns if c != 'Date']
+    for date, i in zip(dates, positions):
+        if i < len(df) and df['Date'].iloc[i] == pd.Timestamp(date):
+            values = [df[c].iloc[i] for c in columns]
+            found[date] = _clean_values([v.item() if isinstance(v, np.generic) else v for v in values])
+    return found
+
+
+def apply_row_delta(df, delta, side):
+    """Move a market frame across a delta: side 0 undoes it, side 1 redoes it.
+
+    Only the delta's dates are looked up and replaced. Raises ValueError if
+    the frame no longer holds the rows the delta expects on the other side
+    (someone edited them since). Returns None when the market should not
+    exist on the target side.
+    """
+    source_columns, target_columns = delta['columns'][1 - side], delta['columns'][side]
+    dates = [row[0] for row in delta['rows']]
+    current_columns = None if df is None else [c for c in df.columns if c != 'Date']
+    current = {} if df is None else _rows_at(df, dates)
+    expected = {row[0]: row[2 - side] for row in delta['rows'] if row[2 - side] is not None}
+    if current_columns != source_columns or current != expected:
+        raise ValueError("the data changed since this edit")
+    if target_columns is None:
+        return None
+    target = {row[0]: row[1 + side] for row in delta['rows'] if row[1 + side] is not None}
+    kept = df[~df['Date'].isin(pd.to_datetime(dates))] if df is not None else None
+    parts = [frame for frame in (kept, rows_to_frame(target_columns, target) if target else None)
+             if frame is not None and len(frame)]
+    if not parts:
+        return rows_to_frame(target_columns, {})
+    merged = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+    merged = merged.reindex(columns=['Date', *target_columns])
+    if INTERPOLATED in merged:
+        merged[INTERPOLATED] = merged[INTERPOLATED].eq(True)
+    return merged.sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+
+class EditJournal:
+    """Undo/redo stacks of committed edits, each stored as row-level deltas.
+
+    An entry is ``{'id', 'author', 'description', 'markets': {market:
+    row_delta}}``, so its size follows the edit rather than the market.
+    The stacks live in one JSON file (rewritten atomically under a lock)
+    and so survive reruns and restarts. Each author (an app session) only
+    sees, undoes and redoes its own entries, and undo refuses to run over
+    rows changed since.
+    """
+
+    def __init__(self, path, limit=50):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix('.lock')
+        self.limit = limit
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'seq': 0, 'undo': [], 'redo': []}
+
+    def _write(self, state):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def _trim(self, entries, author):
+        """``entries`` without ``author``'s oldest ones beyond the limit"""
+        excess = sum(entry.get('author') == author for entry in entries) - self.limit
+        if excess <= 0:
+            return entries
+        kept = []
+        for entry in entries:
+            if excess and entry.get('author') == author:
+                excess -= 1
+            else:
+                kept.append(entry)
+        return kept
+
+    @staticmethod
+    def _latest(entries, author):
+        return next((entry for entry in reversed(entries) if entry.get('author') == author), None)
+
+    def record(self, description, changes, author=None):
+        """Push ``author``'s edit given {market: (frame before, frame after)}; clears their redo"""
+        deltas = {}
+        for market, (before, after) in changes.items():
+            delta = row_delta(before, after)
+            if delta is not None:
+                deltas[market] = delta
+        if not deltas:
+            return None
+        with store_lock(self.lock_path):
+            state = self._read()
+            state['seq'] += 1
+            entry = {'id': state['seq'], 'author': author, 'description': description, 'markets': deltas}
+            state['undo'] = self._trim(state['undo'] + [entry], author)
+            state['redo'] = [e for e in state['redo'] if e.get('author') != author]
+            self._write(state)
+        return entry
+
+    def peek(self, author=None):
+        """(``author``'s next entry to undo, next entry to redo); either may be None"""
+        state = self._read()
+        return self._latest(state['undo'], author), self._latest(state['redo'], author)
+
+    def frames(self, entry, markets_df, undo=True):
+        """{market: frame (None = drop)} with ``entry`` undone or redone; ValueError if stale"""
+        side = 0 if undo else 1
+        frames = {}
+        for market, delta in entry['markets'].items():
+            try:
+                frames[market] = apply_row_delta(markets_df.get(market), delta, side)
+            except ValueError as e:
+                raise ValueError(f"{market}: {e}") from None
+        return frames
+
+    def done(self, entry, undo=True):
+        """Move ``entry`` to the other stack once its frames are saved"""
+        source, target = ('undo', 'redo') if undo else ('redo', 'undo')
+        author = entry.get('author')
+        with store_lock(self.lock_path):
+            state = self._read()
+            latest = self._latest(state[source], author)
+            if latest is None or latest['id'] != entry['id']:
+                return False
+            state[source] = [e for e in state[source] if e['id'] != entry['id']]
+            state[target] = self._trim(state[target] + [latest], author)
+            self._write(state)
+        return True
+
+    def clear(self):
+        with store_lock(self.lock_path):
+            if self.path.exists():
+                self.path.unlink()
+
+# -------------------------------
+# ROW-LEVEL DIFFS
+# -------------------------------
+class RowStateStore:
+    """Base for stores that persist row-level diffs.
+
+    Keeps the stored state as ``{market: {date: row tuple}}`` so ``diff``
+    can turn the app's DataFrames into upsert/delete/replace/drop ops;
+    subclasses persist those ops in ``append``.
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self._rows = {}
+        # Frames adopted from a startup snapshot, turned into rows on first use
+        self._baseline = {}
+
+    def export_state(self):
+        return {}
+
+    def adopt(self, markets_df, state):
+        """Take ``markets_df`` as the stored state without reading the files"""
+        self._columns, self._rows = {}, {}
+        self._baseline = {market: df.copy() for market, df in markets_df.items()}
+
+    def _materialize(self, market):
+        df = self._baseline.pop(market, None)
+        if df is not None:
+            self._columns[market], self._rows[market] = frame_rows(df)
+
+    def _apply(self, op):
+        market = op['market']
+        kind = op['op']
+        self._materialize(market)
+        if kind == 'drop':
+            self._columns.pop(market, None)
+            self._rows.pop(market, None)
+        elif kind == 'replace':
+            self._columns[market] = tuple(op['columns'])
+            self._rows[market] = {row[0]: tuple(row[1:]) for row in op['rows']}
+        elif kind == 'upsert':
+            rows = self._rows[market]
+            for row in op['rows']:
+                rows[row[0]] = tuple(row[1:])
+        elif kind == 'delete':
+            rows = self._rows[market]
+            for date in op['dates']:
+                rows.pop(date, None)
+
+    def diff(self, markets_df, markets=None):
+        """Row-level ops that turn the stored state into ``markets_df``"""
+        names = set(markets_df) | set(self._rows) | set(self._baseline) if markets is None else markets
+        ops = []
+        for market in sorted(names):
+            self._materialize(market)
+            if market not in markets_df:
+                if market in self._rows:
+                    ops.append({'op': 'drop', 'market': market})
+                continue
+            columns, current = frame_rows(markets_df[market])
+            stored = self._rows.get(market)
+            if stored is None or self._columns.get(market) != columns:
+                ops.append(self._replace_op(market, columns, current))
+                continue
+            changed = [[date, *row] for date, row in current.items() if stored.get(date) != row]
+            removed = [date for date in stored if date not in current]
+            if len(changed) + len(removed) > len(current) // 2 + 1:
+                ops.append(self._replace_op(market, columns, current))
+                continue
+            if changed:
+                ops.append({'op': 'upsert', 'market': market, 'rows': changed})
+            if removed:
+                ops.append({'op': 'delete', 'market': market, 'dates': removed})
+        return ops
+
+    @staticmethod
+    def _replace_op(market, columns, rows):
+        return {'op': 'replace', 'market': market, 'columns': list(columns),
+                'rows': [[date, *row] for date, row in rows.items()]}
+
+    def sync(self, markets_df, markets=None):
+        """Persist whatever changed in ``markets_df`` (optionally only ``markets``); returns the markets written"""
+        ops = self.diff(markets_df, markets)
+        self.append(ops)
+        return sorted({op['market'] for op in ops})
+
+    def _frame(self, market):
+        self._materialize(market)
+        if market not in self._rows:
+            return None
+        return rows_to_frame(self._columns[market], self._rows[market])
+
+# -------------------------------
+# WRITE-AHEAD LOG STORE
+# -------------------------------
+class MarketStore(RowStateStore):
+    """JSON snapshot plus an append-only log of row-level changes.
+
+    ``sync`` diffs the app's DataFrames against what is already on disk and
+    appends only the changed rows as one checksummed log record, so the cost
+    of a save follows the size of the edit. The log is folded back into the
+    snapshot once it grows past ``compact_records`` records or
+    ``compact_bytes``. ``load`` replays the log over the snapshot and stops
+    at a torn trailing record left by a crash mid-write; the next append
+    cuts it off.
+    """
+
+    def __init__(self, snapshot_path, compact_records=200, compact_bytes=2_000_000):
+        self.snapshot_path = Path(snapshot_path)
+        self.wal_path = self.snapshot_path.with_suffix('.wal')
+        self.lock_path = self.snapshot_path.with_suffix('.lock')
+        self.version_path = self.snapshot_path.with_suffix('.version')
+        self.compact_records = compact_records
+        self.compact_bytes = compact_bytes
+        self.seq = 0
+        self.wal_records = 0
+        super().__init__()
+
+    def files(self):
+        return [self.snapshot_path, self.wal_path]
+
+    def export_state(self):
+        return {'seq': self.seq, 'wal_records': self.wal_records}
+
+    def adopt(self, markets_df, state):
+        super().adopt(markets_df, state)
+        self.seq = state['seq']
+        self.wal_records = state['wal_records']
+
+    def load(self):
+        """Snapshot + log replay -> {market: DataFrame}, or None if nothing is stored"""
+        self._columns, self._rows = {}, {}
+        self._baseline = {}
+        self.seq = 0
+        self.wal_records = 0
+        found = False
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, 'r') as f:
+                data = json.load(f)
+            self.seq = data.get('_meta', {}).get('seq', 0)
+            for market, market_data in data.items():
+                if market.startswith('_'):
+                    continue
+                columns = tuple(c for c in market_data if c != 'Date')
+                values = zip(*(_clean_values(market_data[c]) for c in columns)) if columns else ((),) * len(market_data['Date'])
+                self._columns[market] = columns
+                self._rows[market] = dict(zip(market_data['Date'], values))
+            found = True
+        for record in self._read_wal():
+            if record['seq'] <= self.seq:
+                continue
+            for op in record['ops']:
+                self._apply(op)
+            self.seq = record['seq']
+            self.wal_records += 1
+            found = True
+        if not found:
+            return None
+        return {market: rows_to_frame(self._columns[market], rows) for market, rows in self._rows.items()}
+
+    def _read_wal(self):
+        """Yield intact log records, stopping at the first torn one"""
+        if not self.wal_path.exists():
+            return
+        with open(self.wal_path, 'rb') as f:
+            for line in f:
+                try:
+                    checksum, payload = line.rstrip(b'\n').split(b'\t', 1)
+                    if not line.endswith(b'\n') or int(checksum, 16) != zlib.crc32(payload):
+                        raise ValueError("torn record")
+                    record = json.loads(payload)
+                except ValueError:
+                    break
+                yield record
+
+    def _repair_tail(self):
+        """Cut a torn record (no trailing newline) off the log; caller holds the lock"""
+        if not self.wal_path.exists() or self.wal_path.stat().st_size == 0:
+            return
+        with open(self.wal_path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b'\n':
+                return
+            f.seek(0)
+            f.truncate(f.read().rfind(b'\n') + 1)
+
+    def refresh(self, markets):
+        """Catch up with other writers and return fresh frames for ``markets`` (None = dropped)"""
+        records = [r for r in self._read_wal() if r['seq'] > self.seq]
+        if not records or records[0]['seq'] != self.seq + 1:
+            # The records we missed were compacted away: re-read everything
+            self.load()
+        else:
+            for record in records:
+                for op in record['ops']:
+                    self._apply(op)
+                self.seq = record['seq']
+                self.wal_records += 1
+        return {market: self._frame(market) for market in markets}
+
+    def append(self, ops):
+        """Write ``ops`` as one durable log record and apply them to the stored state"""
+        if not ops:
+            return 0
+        self._repair_tail()
+        self.seq += 1
+        payload = json.dumps({'seq': self.seq, 'ops': ops}, separators=(',', ':')).encode('utf-8')
+        with open(self.wal_path, 'ab') as f:
+            f.write(b'%08x\t%s\n' % (zlib.crc32(payload), payload))
+            f.flush()
+            os.fsync(f.fileno())
+        for op in ops:
+            self._apply(op)
+        self.wal_records += 1
+        if self.wal_records >= self.compact_records or self.wal_path.stat().st_size >= self.compact_bytes:
+            self.compact()
+        return len(ops)
+
+    def compact(self):
+        """Fold the log into a fresh snapshot and empty it"""
+        for market in list(self._baseline):
+            self._materialize(market)
+        data = {'_meta': {'seq': self.seq}}
+        for market, rows in self._rows.items():
+            columns = self._columns[market]
+            dates = sorted(rows)
+            data[market] = {'Date': dates}
+            for i, column in enumerate(columns):
+                data[market][column] = [rows[d][i] for d in dates]
+        tmp_path = self.snapshot_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # A crash before this truncate is harmless: replay skips records <= _meta.seq
+        with open(self.wal_path, 'wb'):
+            pass
+        self.wal_records = 0
+
+    def clear(self):
+        for path in (self.snapshot_path, self.wal_path):
+            path.unlink(missing_ok=True)
+        self._columns, self._rows = {}, {}
+        self._baseline = {}
+        self.seq = 0
+        self.wal_records = 0
+
+# -------------------------------
+# SQLITE STORE
+# -------------------------------
+class SQLiteStore(RowStateStore):
+    """Rows in one SQLite table keyed on (market, date).
+
+    The composite primary key makes point lookups and date ranges index
+    seeks; ``sync`` writes only the diffed rows with ``executemany`` inside
+    a single transaction. WAL journal mode lets other sessions keep reading
+    while a write is in progress. Value columns are declared without a type
+    so ints and floats round-trip unchanged.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.lock_path = Path(f"{self.db_path}.lock")
+        self.version_path = Path(f"{self.db_path}.version")
+        self._conn = None
+        self._table_columns = None
+        super().__init__()
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            import sqlite3  # only this backend needs it
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS positions ("
+                "market TEXT NOT NULL, date TEXT NOT NULL, PRIMARY KEY (market, date)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS markets (market TEXT PRIMARY KEY, columns TEXT NOT NULL)")
+            self._conn.commit()
+        return self._conn
+
+    def files(self):
+        return [self.db_path, Path(f"{self.db_path}-wal")]
+
+    def exists(self):
+        return self.db_path.exists() and self.conn.execute("SELECT 1 FROM markets LIMIT 1").fetchone() is not None
+
+    def _ensure_columns(self, columns):
+        import sqlite3
+        if self._table_columns is None:
+            self._table_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(positions)")}
+        for column in columns:
+            if column not in self._table_columns:
+                try:
+                    self.conn.execute(f'ALTER TABLE positions ADD COLUMN "{column}"')
+                except sqlite3.OperationalError:
+                    pass  # added by another connection since we looked
+                self._table_columns.add(column)
+
+    def load(self):
+        """All markets as {market: DataFrame}, or None if the database is empty"""
+        self._columns, self._rows = {}, {}
+        market_columns = {market: json.loads(columns) for market, columns in self.conn.execute("SELECT market, columns FROM markets")}
+        if not market_columns:
+            self._baseline = {}
+            return None
+        markets_df = {}
+        for market, columns in market_columns.items():
+            markets_df[market] = self.date_range(market, columns=columns)
+        self._baseline = {market: df.copy() for market, df in markets_df.items()}
+        return markets_df
+
+    def date_range(self, market, start=None, end=None, columns=None):
+        """Rows of one market with ``start <= Date <= end`` via the primary key"""
+        if columns is None:
+            row = self.conn.execute("SELECT columns FROM markets WHERE market = ?", (market,)).fetchone()
+            columns = json.loads(row[0]) if row else []
+        selected = ", ".join(f'"{c}"' for c in ['date', *columns])
+        query = f"SELECT {selected} FROM positions WHERE market = ?"
+        params = [market]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+        rows = self.conn.execute(query + " ORDER BY date", params).fetchall()
+        df = pd.DataFrame.from_records(rows, columns=['Date', *columns])
+        df['Date'] = pd.to_datetime(df['Date'])
+        if INTERPOLATED in df:
+            # SQLite has no boolean type; flags come back as 0/1
+            df[INTERPOLATED] = df[INTERPOLATED].eq(1)
+        return df
+
+    def refresh(self, markets):
+        """Re-read ``markets`` from the database (None = dropped)"""
+        frames = {}
+        for market in markets:
+            row = self.conn.execute("SELECT columns FROM markets WHERE market = ?", (market,)).fetchone()
+            self._columns.pop(market, None)
+            self._rows.pop(market, None)
+            self._baseline.pop(market, None)
+            if row is None:
+                frames[market] = None
+                continue
+            frames[market] = self.date_range(market, columns=json.loads(row[0]))
+            self._baseline[market] = frames[market].copy()
+        return frames
+
+    def has_date(self, market, date):
+        return self.conn.execute(
+            "SELECT 1 FROM positions WHERE market = ? AND date = ?",
+            (market, pd.Timestamp(date).strftime('%Y-%m-%d'))
+        ).fetchone() is not None
+
+    def markets_with_date(self, date):
+        day = pd.Timestamp(date).strftime('%Y-%m-%d')
+        return {row[0] for row in self.conn.execute("SELECT market FROM positions WHERE date = ?", (day,))}
+
+    def append(self, ops):
+        """Apply ``ops`` to the database in one transaction"""
+        if not ops:
+            return 0
+        conn = self.conn
+        with conn:
+            for op in ops:
+                market = op['market']
+                kind = op['op']
+                self._materialize(market)
+                if kind in ('drop', 'replace'):
+                    conn.execute("DELETE FROM positions WHERE market = ?", (market,))
+                    conn.execute("DELETE FROM markets WHERE market = ?", (market,))
+                if kind == 'replace':
+                    conn.execute("INSERT INTO markets (market, columns) VALUES (?, ?)", (market, json.dumps(op['columns'])))
+                if kind in ('replace', 'upsert'):
+                    columns = op['columns'] if kind == 'replace' else list(self._columns[market])
+                    self._ensure_columns(columns)
+                    names = ", ".join(f'"{c}"' for c in ['market', 'date', *columns])
+                    marks = ", ".join("?" * (len(columns) + 2))
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO positions ({names}) VALUES ({marks})",
+                        [(market, *row) for row in op['rows']]
+                    )
+                elif kind == 'delete':
+                    conn.executemany("DELETE FROM positions WHERE market = ? AND date = ?",
+                                     [(market, date) for date in op['dates']])
+                self._apply(op)
+        return len(ops)
+
+    def compact(self):
+        """Checkpoint the SQLite WAL back into the main database file"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def clear(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._table_columns = None
+        for path in self.files():
+            path.unlink(missing_ok=True)
+        Path(f"{self.db_path}-shm").unlink(missing_ok=True)
+        self._columns, self._rows = {}, {}
+        self._baseline = {}
+
+# -------------------------------
+# FAST-START SNAPSHOT
+# -------------------------------
+def _file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StartupSnapshot:
+    """``{market: DataFrame}`` saved as one ``.npz`` file, tied to the store files it was built from.
+
+    The snapshot records the absolute path, size, mtime and content hash of
+    each store file. It is used only while every size and hash still match;
+    a bare mtime change (the file was touched or copied) does not invalidate
+    it. ``status`` says why the last ``load`` did or did not use it.
+
+    Columns are plain arrays read with ``allow_pickle=False`` and the header
+    is JSON, so loading a planted or corrupt file can fail but never runs
+    code; object columns (flags with gaps) are kept in the header as lists.
+    """
+    _rebuilding = set()
+    _lock = threading.Lock()
+
+    def __init__(self, path, store):
+        self.path = Path(path)
+        self.store = store
+        self.status = None
+        self.signature = None
+
+    def _stat(self):
+        stats = {}
+        for path in self.store.files():
+            if path.exists():
+                st = path.stat()
+                stats[str(path.resolve())] = [st.st_size, st.st_mtime_ns]
+        return stats
+
+    def current_signature(self):
+        stats = self._stat()
+        for path, values in stats.items():
+            values.append(_file_digest(path))
+        return stats
+
+    def load(self):
+        """Snapshot markets adopted by the store, or None (see ``status``).
+
+        On a miss the signature is taken now, before the caller reads the
+        store, so a rebuild can never vouch for newer files than it saw.
+        """
+        markets = self._load_valid()
+        if markets is None:
+            self.signature = self.current_signature()
+        return markets
+
+    def _load_valid(self):
+        if not self.path.exists():
+            self.status = 'missing'
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as npz:
+                # Header first, so a stale snapshot is rejected before reading the frames
+                header = json.loads(npz['header'].tobytes())
+                stats = self._stat()
+                recorded = header['signature']
+                if {p: v[0] for p, v in recorded.items()} != {p: v[0] for p, v in stats.items()}:
+                    self.status = 'stale'
+                    return None
+                for path, (size, mtime_ns, digest) in recorded.items():
+                    if _file_digest(path) != digest:
+                        self.status = 'stale'
+                        return None
+                    stats[path].append(digest)
+                markets = {}
+                for i, (market, columns, objects) in enumerate(header['markets']):
+                    arrays = {}
+                    for j, column in enumerate(columns):
+                        if column in objects:
+                            arrays[column] = np.array(objects[column], dtype=object)
+                        else:
+                            arrays[column] = npz[f"m{i}c{j}"]
+                    markets[market] = pd.DataFrame(arrays, columns=columns, copy=False)
+        except Exception:
+            self.status = 'unreadable'
+            return None
+        touched = any(stats[p][1] != v[1] for p, v in recorded.items())
+        self.status = 'valid (touched)' if touched else 'valid'
+        self.signature = stats
+        self.store.adopt(markets, header['state'])
+        return markets
+
+    def save(self, markets_df, signature, state):
+        arrays = {}
+        listed = []
+        for i, (market, df) in enumerate(markets_df.items()):
+            columns = [str(c) for c in df.columns]
+            objects = {}
+            for j, column in enumerate(columns):
+                values = df[column].to_numpy()
+                if values.dtype == object:
+                    objects[column] = _clean_values(values.tolist())
+                else:
+                    arrays[f"m{i}c{j}"] = values
+            listed.append([market, columns, objects])
+        header = json.dumps({'signature': signature, 'state': state, 'markets': listed}).encode('utf-8')
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, header=np.frombuffer(header, dtype=np.uint8), **arrays)
+        os.replace(tmp_path, self.path)
+
+    def rebuild_in_background(self, markets_df):
+        """Re-save freshly loaded markets on a daemon thread; returns False if one is already running"""
+        key = str(self.path)
+        with self._lock:
+            if key in self._rebuilding:
+                return False
+            self._rebuilding.add(key)
+        signature = self.signature
+        state = self.store.export_state()
+        frames = {market: df.copy() for market, df in markets_df.items()}
+
+        def run():
+            try:
+                self.save(frames, signature, state)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._rebuilding.discard(key)
+
+        threading.Thread(target=run, name="cot-startup-snapshot", daemon=True).start()
+        return True
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+# -------------------------------
+# MEMORY-MAPPED COLUMNAR STORE
+# -------------------------------
+class ColumnarStore:
+    """One fixed-width binary column file per market, opened memory-mapped.
+
+    Each market's Date and value columns sit back to back (8-byte aligned)
+    in ``<market>.<generation>.bin``; the manifest records every column's
+    dtype and offset. Loading maps each file once copy-on-write and hands
+    pandas zero-copy ``np.frombuffer`` views, so pages are only read when a
+    column is first touched and in-place edits stay private to the process.
+    With ``compress=True`` markets are ``.npz`` files instead, smaller on
+    disk but read eagerly.
+
+    A changed market is written to a new generation file and the manifest
+    is swapped in with a rename, so a crash leaves the previous version
+    intact.
+    """
+
+    def __init__(self, store_dir, compress=False):
+        self.store_dir = Path(store_dir)
+        self.manifest_path = self.store_dir / "manifest.json"
+        # Kept beside the folder so clear() can remove it while the lock is held
+        self.lock_path = self.store_dir.with_suffix('.lock')
+        self.version_path = self.store_dir.with_suffix('.version')
+        self.compress = compress
+        self.manifest = {}
+
+    def exists(self):
+        return self.manifest_path.exists()
+
+    def files(self):
+        return [self.manifest_path]
+
+    def load(self):
+        """Map every market -> {market: DataFrame}, or None if nothing is stored"""
+        if not self.exists():
+            return None
+        with open(self.manifest_path, 'r') as f:
+            self.manifest = json.load(f)
+        return {market: self._read_market(entry) for market, entry in self.manifest.items()}
+
+    def refresh(self, markets):
+        """Re-read the manifest and map ``markets`` (None = dropped)"""
+        self.manifest = {}
+        if self.exists():
+            with open(self.manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+        return {market: self._read_market(self.manifest[market]) if market in self.manifest else None
+                for market in markets}
+
+    def _read_market(self, entry):
+        path = self.store_dir / entry['file']
+        names = ['Date', *entry['columns']]
+        rows = entry['rows']
+        if entry.get('compressed'):
+            with np.load(path) as npz:
+                arrays = {name: npz[f"c{i}"] for i, name in enumerate(names)}
+        elif rows == 0:
+            arrays = {name: np.empty(0, dtype=dtype) for name, dtype in zip(names, entry['dtypes'])}
+        else:
+            with open(path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            arrays = {
+                name: np.frombuffer(buffer, dtype=dtype, count=rows, offset=offset)
+                for name, dtype, offset in zip(names, entry['dtypes'], entry['offsets'])
+            }
+        return pd.DataFrame(arrays, copy=False)
+
+    @staticmethod
+    def _column_array(series):
+        values = series.to_numpy()
+        if values.dtype == object:
+            values = values.astype(float)
+        return np.ascontiguousarray(values)
+
+    def _write_market(self, market, df):
+        previous = self.manifest.get(market, {})
+        generation = previous.get('generation', 0) + 1
+        suffix = "npz" if self.compress else "bin"
+        file_name = f"{re.sub(r'[^A-Za-z0-9]+', '_', market).strip('_')}.{generation}.{suffix}"
+        path = self.store_dir / file_name
+        columns = [c for c in df.columns if c != 'Date']
+        arrays = [df['Date'].to_numpy(dtype='datetime64[ns]')] + [self._column_array(df[c]) for c in columns]
+        offsets = []
+        if self.compress:
+            np.savez_compressed(path, **{f"c{i}": a for i, a in enumerate(arrays)})
+        else:
+            with open(path, 'wb') as f:
+                position = 0
+                for array in arrays:
+                    padding = -position % 8
+                    f.write(b'\0' * padding)
+                    position += padding
+                    offsets.append(position)
+                    f.write(array.tobytes())
+                    position += array.nbytes
+                f.flush()
+                os.fsync(f.fileno())
+        self.manifest[market] = {
+            'file': file_name,
+            'generation': generation,
+            'columns': columns,
+            'dtypes': [a.dtype.str for a in arrays],
+            'offsets': offsets,
+            'rows': len(df),
+            'compressed': self.compress,
+        }
+        return previous.get('file')
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def sync(self, markets_df, markets=None):
+        """Rewrite the markets whose frames differ from the stored ones; returns the markets written"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        names = set(markets_df) | set(self.manifest) if markets is None else markets
+        stale_files = []
+        changed = []
+        for market in sorted(names):
+            if market not in markets_df:
+                if market in self.manifest:
+                    stale_files.append(self.manifest.pop(market)['file'])
+                    changed.append(market)
+                continue
+            df = markets_df[market]
+            # A fresh mapping sees the file, not this process's private writes; the
+            # editor and upsert paths hand back float copies of integer columns
+            if market in self.manifest and frames_match(self._read_market(self.manifest[market]), df):
+                continue
+            old_file = self._write_market(market, df)
+            if old_file:
+                stale_files.append(old_file)
+            changed.append(market)
+        if changed:
+            self._write_manifest()
+            # Old generations may still be mapped by other sessions; best effort
+            for file_name in stale_files:
+                try:
+                    (self.store_dir / file_name).unlink()
+                except OSError:
+                    pass
+        return changed
+
+    def compact(self):
+        """Nothing to fold: every sync already writes whole markets"""
+
+    def clear(self):
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+        self.manifest = {}
+
+
+def migrate_json_store(json_path, store):
+    """Copy a JSON snapshot + change log store into another backend; returns the market count"""
+    markets_df = MarketStore(json_path).load()
+    if not markets_df:
+        return 0
+    store.load()
+    store.sync(markets_df)
+    return len(markets_df)
+
+# -------------------------------
+# PROCESS-WIDE SHARED DATA
+# -------------------------------
+class SharedMarketData:
+    """One in-memory copy of the store shared by every session in a process.
+
+    ``view`` hands each caller a fresh dict of shallow frame copies; with
+    pandas copy-on-write enabled those share the column buffers until a
+    session modifies one, at which point only that session pays for a
+    copy.
+
+    Writes hold the store's file lock and bump a version counter kept next
+    to the data (``{'version': n, 'markets': {market: n}}``). That small
+    file is the change signal: when its size or mtime moves, only the
+    markets stamped with a newer version are re-read. A write also passes
+    the version its frames were read at; if a market it touches changed
+    since then, the write is refused with StoreConflict instead of
+    overwriting the other change. Writes given a description are also
+    pushed onto the optional EditJournal, under the same lock.
+    """
+
+    def __init__(self, store, snapshot=None, journal=None):
+        self.store = store
+        self.snapshot = snapshot
+        self.journal = journal
+        self.markets = None
+        self.version = 0
+        self.market_versions = {}
+        self.last_load = None
+        self._version_stat = None
+        self._lock = threading.RLock()
+
+    def _stat_version_file(self):
+        try:
+            st = os.stat(self.store.version_path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def _refresh(self):
+        stat = self._stat_version_file()
+        if self.markets is not None and stat == self._version_stat:
+            self.last_load = dict(self.last_load, source='shared cache', seconds=0.0, changed=[])
+            return
+        started = time.perf_counter()
+        current = read_store_version(self.store.version_path)
+        changed = []
+        if self.markets is None:
+            markets = self.snapshot.load() if self.snapshot is not None else None
+            source = 'snapshot'
+            if markets is None:
+                markets = self.store.load()
+                source = 'store'
+                if markets and self.snapshot is not None:
+                    self.snapshot.rebuild_in_background(markets)
+            self.markets = markets or {}
+        else:
+            changed = sorted(m for m, v in current['markets'].items() if v > self.version)
+            for market, df in self.store.refresh(changed).items():
+                if df is None:
+                    self.markets.pop(market, None)
+                else:
+                    self.markets[market] = df
+            source = 'store changes'
+        self.version = current['version']
+        self.market_versions = dict(current['markets'])
+        self._version_stat = stat
+        self.last_load = {
+            'source': source,
+            'snapshot': self.snapshot.status if self.snapshot is not None else None,
+            'seconds': time.perf_counter() - started,
+            'changed': changed,
+        }
+
+    def view(self):
+        """(version, {market: copy-on-write view}); the dict is None if the store is empty"""
+        with self._lock:
+            self._refresh()
+            if not self.markets:
+                return self.version, None
+            return self.version, {market: df.copy(deep=False) for market, df in self.markets.items()}
+
+    def _publish(self, written, markets_df):
+        version = self.version + 1
+        for market in written:
+            self.market_versions[market] = version
+            if markets_df is not None and market in markets_df:
+                self.markets[market] = markets_df[market].copy(deep=False)
+            else:
+                self.markets.pop(market, None)
+        self.version = version
+        write_store_version(self.store.version_path, {'version': version, 'markets': self.market_versions})
+        self._version_stat = self._stat_version_file()
+
+    def sync(self, markets_df, markets=None, base_version=None, description=None, author=None):
+        """Persist a session's frames under the file lock and publish them.
+
+        Returns ``(markets written, new base version)``; the base only moves
+        forward when nobody else wrote since ``base_version``, so frames
+        that went stale meanwhile still conflict on their next write. A
+        described write is journaled as ``author``'s edit.
+        """
+        with self._lock, store_lock(self.store.lock_path):
+            self._refresh()
+            if base_version is not None:
+                targets = set(markets_df) | set(self.markets) if markets is None else set(markets)
+                conflicts = [m for m in targets if self.market_versions.get(m, 0) > base_version]
+                if conflicts:
+                    raise StoreConflict(conflicts)
+            current = base_version is None or self.version == base_version
+            written = self.store.sync(markets_df, markets)
+            if written:
+                if description and self.journal is not None:
+                    self.journal.record(description, {m: (self.markets.get(m), markets_df.get(m)) for m in written},
+                                        author=author)
+                self._publish(written, markets_df)
+            return written, (self.version if current else base_version)
+
+    def compact(self):
+        with self._lock, store_lock(self.store.lock_path):
+            self._refresh()
+            self.store.compact()
+
+    def clear(self):
+        with self._lock, store_lock(self.store.lock_path):
+            self._refresh()
+            dropped = list(self.markets)
+            self.store.clear()
+            if self.snapshot is not None:
+                self.snapshot.clear()
+            self._publish(dropped, None)
+
+# -------------------------------
+# STORE LAYOUT
+# -------------------------------
+JSON_STORE_NAME = "cot_historical_data.json"
+COLUMNAR_STORE_NAME = "columnar"
+SQLITE_STORE_NAME = "cot_history.sqlite"
+EDIT_JOURNAL_NAME = "edit_journal.json"
+RAW_REPORT_CACHE_NAME = "raw_reports"
+STARTUP_SNAPSHOT_NAME = "startup_snapshot.npz"
+
+def open_shared_data(data_dir, backend="json", compress=False, snapshot_path=None):
+    """SharedMarketData over the ``backend`` store in ``data_dir``, migrating a JSON store on first use.
+
+    ``backend`` is "json" (snapshot + change log), "columnar" (memory-mapped
+    binary per market) or "sqlite". A ``snapshot_path`` adds the ``.npz``
+    startup snapshot, which only pays off for the non-columnar backends.
+    """
+    data_dir = Path(data_dir)
+    json_path = data_dir / JSON_STORE_NAME
+    if backend == "columnar":
+        store = ColumnarStore(data_dir / COLUMNAR_STORE_NAME, compress=compress)
+    elif backend == "sqlite":
+        store = SQLiteStore(data_dir / SQLITE_STORE_NAME)
+    else:
+        store = MarketStore(json_path)
+    if backend != "json" and not store.exists() and json_path.exists():
+        migrate_json_store(json_path, store)
+    snapshot = StartupSnapshot(snapshot_path, store) if snapshot_path and backend != "columnar" else None
+    return SharedMarketData(store, snapshot, journal=EditJournal(data_dir / EDIT_JOURNAL_NAME))
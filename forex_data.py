@@ -1,26 +1,44 @@
+import time
+SCRIPT_STARTED = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import requests
-import re
-import json
+from datetime import datetime
 import os
-from io import BytesIO
-import zipfile
-import io as io_module
 from pathlib import Path
-import pickle
 import tempfile
 import hashlib
-import gzip
+
+# Sessions share one copy of the market frames; any write copies just what it touches
+pd.set_option("mode.copy_on_write", True)
+
+from cot_analysis import (
+    BIAS_SHIFT_PCT, EXTREME_PCT, IndicatorCache, LRUMemo, PeakIndex, analyze_market, backtest_alerts,
+    backtest_summary, frame_fingerprint, screen_markets,
+)
+from cot_report import REPORT_SECTIONS, join_sections, render_json, render_section
+from cftc_extractor import CombinedCFTCExtractor, RawReportCache, USD_BASE_MARKETS, backfill_from_archives
+from cot_store import (
+    MarketStore, SQLiteStore, MarketTransaction, StoreConflict, INTERPOLATED, JSON_STORE_NAME, RAW_REPORT_CACHE_NAME,
+    STARTUP_SNAPSHOT_NAME, editor_changes, frame_has_date, ingest_report, interpolate_missing_weeks, open_shared_data, report_already_stored,
+    upsert_positions,
+)
 
 # -------------------------------
 # PAGE CONFIG
 # -------------------------------
 st.set_page_config(page_title="CFTC COT Data Analyzer", layout="wide")
+
+def mark_startup_phase(name):
+    """Milliseconds from the start of this script run to ``name`` (read by benchmarks/bench_startup.py)"""
+    st.session_state.startup_phases[name] = (time.perf_counter() - SCRIPT_STARTED) * 1000
+
+st.session_state.startup_phases = {}
+mark_startup_phase('imports')
 st.title("📊 CFTC Commitments of Traders (COT) - Institutional Positioning")
 st.markdown("---")
+mark_startup_phase('first paint')
 
 # -------------------------------
 # DATA STORAGE SETUP
@@ -29,8 +47,17 @@ DATA_DIR = Path("cftc_data_store")
 DATA_DIR.mkdir(exist_ok=True)
 
 EXCEL_STORE_PATH = DATA_DIR / "cot_master_store.xlsx"
-JSON_STORE_PATH = DATA_DIR / "cot_historical_data.json"
+JSON_STORE_PATH = DATA_DIR / JSON_STORE_NAME
 BACKUP_EXCEL_PATH = DATA_DIR / "cot_backup_data.xlsx"
+RAW_REPORT_CACHE_DIR = DATA_DIR / RAW_REPORT_CACHE_NAME
+# Kept with the store files, not in the shared temp dir
+STARTUP_SNAPSHOT_PATH = DATA_DIR / STARTUP_SNAPSHOT_NAME
+ARCHIVE_DIR = DATA_DIR / "archives"
+
+# "json" (snapshot + change log), "columnar" (memory-mapped binary per market)
+# or "sqlite" (one table keyed on market + date)
+STORE_BACKEND = os.environ.get("COT_STORE_BACKEND", "json")
+STORE_COMPRESS = os.environ.get("COT_STORE_COMPRESS", "0") == "1"
 
 # PERSISTENT STORAGE LOCATIONS
 TEMP_STORE_PATH = Path(tempfile.gettempdir()) / "cftc_data_store"
@@ -53,14 +80,28 @@ def init_session_state():
         st.session_state.extracted_data_count = 0
     if 'fetch_history' not in st.session_state:
         st.session_state.fetch_history = []
+    if 'last_fetch_stats' not in st.session_state:
+        st.session_state.last_fetch_stats = None
+    if 'last_report_rows' not in st.session_state:
+        st.session_state.last_report_rows = None
+    if 'offline_mode' not in st.session_state:
+        st.session_state.offline_mode = False
     if 'edit_mode' not in st.session_state:
         st.session_state.edit_mode = False
     if 'editable_df' not in st.session_state:
         st.session_state.editable_df = None
+    if 'store_version' not in st.session_state:
+        st.session_state.store_version = None
+    if 'pending_edits' not in st.session_state:
+        st.session_state.pending_edits = {}
     if 'current_editing_market' not in st.session_state:
         st.session_state.current_editing_market = None
     if 'edit_submode' not in st.session_state:
         st.session_state.edit_submode = None
+    if 'peak_index' not in st.session_state:
+        st.session_state.peak_index = PeakIndex()
+    if 'indicator_cache' not in st.session_state:
+        st.session_state.indicator_cache = IndicatorCache()
     # Toggle states for analysis sections
     if 'show_positioning' not in st.session_state:
         st.session_state.show_positioning = False
@@ -68,6 +109,8 @@ def init_session_state():
         st.session_state.show_peak = False
     if 'show_comparison' not in st.session_state:
         st.session_state.show_comparison = False
+    if 'show_indicators' not in st.session_state:
+        st.session_state.show_indicators = False
     if 'show_zones' not in st.session_state:
         st.session_state.show_zones = False
     if 'show_rsi' not in st.session_state:
@@ -81,101 +124,66 @@ def init_session_state():
 
 init_session_state()
 
-# -------------------------------
-# PEAK VOLUME VALUES FROM YOUR EXCEL FILES (HARDCODED)
-# -------------------------------
-
-PEAK_VOLUME_VALUES = {
-    # ===== CURRENCIES =====
-    'USD/CAD': {
-        'peak_longs': 219989,
-        'peak_shorts': 105403,
-        'min_longs': 5203,
-        'min_shorts': 1641,
-        'has_peaks': True
-    },
-    'EUR/USD': {
-        'peak_longs': 318702,
-        'peak_shorts': 271608,
-        'min_longs': 17040,
-        'min_shorts': 8524,
-        'has_peaks': True
-    },
-    'GBP/USD': {
-        'peak_longs': 332405,
-        'peak_shorts': 154332,
-        'min_longs': None,
-        'min_shorts': None,
-        'has_peaks': True
-    },
-    'USD/JPY': {
-        'peak_longs': 237488,
-        'peak_shorts': 204008,
-        'min_longs': None,
-        'min_shorts': None,
-        'has_peaks': True
-    },
-    'AUD/USD': {
-        'peak_longs': 144966,
-        'peak_shorts': 145745,
-        'min_longs': 5922,
-        'min_shorts': 0,
-        'has_peaks': True
-    },
-    'USD/ZAR': {'has_peaks': False},
-    'USD/MXN': {'has_peaks': False},
-    'NZD/USD': {
-        'peak_longs': 47255,
-        'peak_shorts': None,
-        'min_longs': 75548,
-        'min_shorts': None,
-        'has_peaks': True
-    },
-    'USD/BRL': {'has_peaks': False},
-    'USD/CHF': {
-        'peak_longs': 89522,
-        'peak_shorts': 37165,
-        'min_longs': 2419,
-        'min_shorts': 698,
-        'has_peaks': True
-    },
-    
-    # ===== METALS =====
-    'XAU/USD': {
-        'peak_longs': 408349,
-        'peak_shorts': 222210,
-        'min_longs': 97630,
-        'min_shorts': 18549,
-        'has_peaks': True
-    },
-    'XAG/USD': {
-        'peak_longs': 131969,
-        'peak_shorts': 152035,
-        'min_longs': 41325,
-        'min_shorts': 16172,
-        'has_peaks': True
-    },
-    'COPPER/USD': {'has_peaks': False},
-    'STEEL-HRC/USD': {'has_peaks': False},
-    'LITHIUM/USD': {'has_peaks': False},
-    
-    # ===== ENERGIES =====
-    'CRUDE OIL/USD': {'has_peaks': False},
-    'NAT GAS/USD': {'has_peaks': False},
-    
-    # ===== AGRICULTURE =====
-    'COFFEE/USD': {'has_peaks': False},
-    'WHEAT SRW/USD': {'has_peaks': False},
-    'WHEAT HRW/USD': {'has_peaks': False},
-    
-    # ===== CRYPTO =====
-    'MICRO-BTC/USD': {'has_peaks': False}
-}
-
 # ============================================
 # ENHANCED DATA EDITING & ROW MANAGEMENT
 # ============================================
 
+def begin_edit(market):
+    """Open (or return) the pending edit transaction for a market"""
+    if market not in st.session_state.pending_edits:
+        st.session_state.pending_edits[market] = MarketTransaction(market)
+    return st.session_state.pending_edits[market]
+
+def stage_change(market, change, description):
+    """Apply one change through the market's transaction.
+
+    With a transaction already open the change is only staged (visible on
+    every rerun, written on commit); otherwise it is committed at once.
+    """
+    autocommit = market not in st.session_state.pending_edits
+    txn = begin_edit(market)
+    change(txn)
+    st.session_state.markets_df[market] = txn.apply(st.session_state.markets_df[market])
+    if autocommit:
+        success, message = commit_edit(market)
+        if not success:
+            discard_edit(market)
+        return success, (f"✅ Saved {description}" if success else message)
+    return True, f"📝 Staged {description} ({len(txn)} pending)"
+
+def commit_edit(market):
+    """Validate every staged change for a market and persist them in one write"""
+    txn = st.session_state.pending_edits.get(market)
+    if not txn:
+        return True, "Nothing to commit"
+    errors = txn.validate()
+    if errors:
+        return False, "; ".join(errors)
+    try:
+        save_to_json([market], f"{len(txn)} change{'s' if len(txn) != 1 else ''} to {market}")
+    except StoreConflict as e:
+        return False, f"⚠️ {', '.join(e.markets)} changed in another session since this page loaded. Discard and re-apply your changes."
+    return True, f"✅ Committed {len(txn)} changes to {market}"
+
+def discard_edit(market):
+    """Drop staged changes; the stored data is reloaded on the next rerun"""
+    st.session_state.pending_edits.pop(market, None)
+
+def apply_pending_edits(markets_df):
+    """Overlay uncommitted transactions on freshly loaded data"""
+    for market, txn in st.session_state.pending_edits.items():
+        if market in markets_df:
+            markets_df[market] = txn.apply(markets_df[market])
+    return markets_df
+
+def market_has_date(market, date):
+    """Indexed check for a week in a market (SQLite primary key or binary search)"""
+    if market not in st.session_state.markets_df:
+        return False
+    if isinstance(market_store, SQLiteStore) and market not in st.session_state.pending_edits:
+        return market_store.has_date(market, date)
+    return frame_has_date(st.session_state.markets_df[market], date)
+
 def add_new_row(market, new_date, new_longs, new_shorts):
     """Add a new row of data to a specific market"""
     try:
@@ -195,36 +203,10 @@ def add_new_row(market, new_date, new_longs, new_shorts):
         except:
             return False, "Longs and Shorts must be valid numbers"
         
-        df = st.session_state.markets_df[market]
-        if date_obj in df['Date'].values:
+        if market_has_date(market, date_obj):
             return False, f"Data for {new_date} already exists. Use edit instead."
         
-        total = longs + shorts
-        if total > 0:
-            long_pct = (longs / total * 100)
-            short_pct = (shorts / total * 100)
-        else:
-            long_pct = 0
-            short_pct = 0
-        net = longs - shorts
-        
-        new_row = pd.DataFrame([{
-            'Date': date_obj,
-            'Longs': longs,
-            'Shorts': shorts,
-            'Total': total,
-            'Long %': round(long_pct, 1),
-            'Short %': round(short_pct, 1),
-            'Net': net
-        }])
-        
-        updated_df = pd.concat([df, new_row], ignore_index=True)
-        updated_df = updated_df.sort_values('Date', ascending=True).reset_index(drop=True)
-        
-        st.session_state.markets_df[market] = updated_df
-        save_to_json()
-        
-        return True, f"✅ Added data for {new_date}"
+        return stage_change(market, lambda txn: txn.upsert(date_obj, longs, shorts), f"data for {new_date}")
         
     except Exception as e:
         return False, f"Error adding row: {str(e)}"
@@ -235,7 +217,7 @@ def edit_row(market, row_index, new_longs, new_shorts):
         if market not in st.session_state.markets_df:
             return False, f"Market {market} not found"
         
-        df = st.session_state.markets_df[market].copy()
+        df = st.session_state.markets_df[market]
         
         if row_index < 0 or row_index >= len(df):
             return False, f"Row index {row_index} out of range"
@@ -248,23 +230,8 @@ def edit_row(market, row_index, new_longs, new_shorts):
         except:
             return False, "Longs and Shorts must be valid numbers"
         
-        df.loc[row_index, 'Longs'] = longs
-        df.loc[row_index, 'Shorts'] = shorts
-        
-        total = longs + shorts
-        df.loc[row_index, 'Total'] = total
-        if total > 0:
-            df.loc[row_index, 'Long %'] = round(longs / total * 100, 1)
-            df.loc[row_index, 'Short %'] = round(shorts / total * 100, 1)
-        else:
-            df.loc[row_index, 'Long %'] = 0
-            df.loc[row_index, 'Short %'] = 0
-        df.loc[row_index, 'Net'] = longs - shorts
-        
-        st.session_state.markets_df[market] = df
-        save_to_json()
-        
-        return True, f"✅ Updated row {row_index + 1}"
+        row_date = df.iloc[row_index]['Date']
+        return stage_change(market, lambda txn: txn.upsert(row_date, longs, shorts), f"row {row_index + 1}")
         
     except Exception as e:
         return False, f"Error editing row: {str(e)}"
@@ -280,13 +247,8 @@ def delete_row(market, row_index):
         if row_index < 0 or row_index >= len(df):
             return False, f"Row index {row_index} out of range"
         
-        deleted_date = df.iloc[row_index]['Date'].strftime('%Y-%m-%d')
-        updated_df = df.drop(df.index[row_index]).reset_index(drop=True)
-        
-        st.session_state.markets_df[market] = updated_df
-        save_to_json()
-        
-        return True, f"✅ Deleted data for {deleted_date}"
+        row_date = df.iloc[row_index]['Date']
+        return stage_change(market, lambda txn: txn.delete(row_date), f"deletion of {row_date:%Y-%m-%d}")
         
     except Exception as e:
         return False, f"Error deleting row: {str(e)}"
@@ -300,40 +262,27 @@ def insert_missing_week(market, target_date):
         df = st.session_state.markets_df[market]
         date_obj = pd.to_datetime(target_date)
         
-        if date_obj in df['Date'].values:
+        if market_has_date(market, date_obj):
             return False, f"Data for {target_date} already exists"
         
-        all_dates = df['Date'].tolist()
-        all_dates.sort()
-        
-        before_date = None
-        after_date = None
-        
-        for d in all_dates:
-            if d < date_obj:
-                before_date = d
-            if d > date_obj and after_date is None:
-                after_date = d
-        
-        if before_date is None or after_date is None:
+        dates = df['Date'].to_numpy()
+        i = dates.searchsorted(np.datetime64(date_obj, 'ns'))
+        if i == 0 or i == len(dates):
             return False, "Need data before AND after the missing week to interpolate"
         
-        before_row = df[df['Date'] == before_date].iloc[0]
-        after_row = df[df['Date'] == after_date].iloc[0]
-        
-        total_days = (after_date - before_date).days
-        days_from_before = (date_obj - before_date).days
-        weight = days_from_before / total_days if total_days > 0 else 0.5
+        # linear in time between the neighbouring reports
+        x = dates[i - 1:i + 1].astype('int64')
+        longs = round(float(np.interp(date_obj.value, x, df['Longs'].to_numpy()[i - 1:i + 1])))
+        shorts = round(float(np.interp(date_obj.value, x, df['Shorts'].to_numpy()[i - 1:i + 1])))
         
-        interpolated_longs = before_row['Longs'] + weight * (after_row['Longs'] - before_row['Longs'])
-        interpolated_shorts = before_row['Shorts'] + weight * (after_row['Shorts'] - before_row['Shorts'])
-        
-        longs = round(interpolated_longs)
-        shorts = round(interpolated_shorts)
-        
-        success, message = add_new_row(market, target_date, longs, shorts)
+        success, message = stage_change(
+            market, lambda txn: txn.upsert(date_obj, longs, shorts, interpolated=True), f"data for {target_date}"
+        )
         
         if success:
+            txn = st.session_state.pending_edits.get(market)
+            if txn:
+                return True, f"📝 Staged interpolated data for {target_date} ({len(txn)} pending)"
             return True, f"✅ Inserted interpolated data for {target_date}"
         else:
             return False, message
@@ -341,11 +290,32 @@ def insert_missing_week(market, target_date):
     except Exception as e:
         return False, f"Error interpolating week: {str(e)}"
 
+def repair_missing_weeks():
+    """Interpolate every missing week in every market and save them in one write.
+
+    Markets with uncommitted edits are skipped so their transactions stay
+    intact. Returns (success, message).
+    """
+    pending = st.session_state.pending_edits
+    markets_df = st.session_state.markets_df
+    fills = interpolate_missing_weeks(markets_df, [m for m in markets_df if m not in pending])
+    skipped = f" (skipped {len(pending)} markets with uncommitted edits)" if pending else ""
+    if not fills:
+        return True, f"✅ No missing weeks found{skipped}"
+    for market, rows in fills.items():
+        markets_df[market] = upsert_positions(markets_df[market], rows)
+    try:
+        save_to_json(list(fills), f"repair of {sum(len(rows) for rows in fills.values())} missing weeks")
+    except StoreConflict as e:
+        return False, f"⚠️ Not saved: {', '.join(e.markets)} changed in another session. Repair again."
+    weeks = sum(len(rows) for rows in fills.values())
+    return True, f"✅ Interpolated {weeks} missing weeks across {len(fills)} markets{skipped}"
+
 def bulk_edit_mode(market):
     """Display bulk editing interface for a market"""
     st.subheader(f"✏️ BULK EDIT: {market}")
     
-    df = st.session_state.markets_df[market].copy()
+    df = st.session_state.markets_df[market]
     
     st.write("Current Data (showing last 20 rows):")
     display_df = df.tail(20).copy()
@@ -368,30 +338,9 @@ def bulk_edit_mode(market):
     with col1:
         if st.button("💾 Save All Changes", key=f"bulk_save_{market}"):
             try:
-                edited_df['Date'] = pd.to_datetime(edited_df['Date'])
-                
-                full_df = df.copy()
-                for _, row in edited_df.iterrows():
-                    mask = full_df['Date'] == row['Date']
-                    if mask.any():
-                        full_df.loc[mask, 'Longs'] = row['Longs']
-                        full_df.loc[mask, 'Shorts'] = row['Shorts']
-                    else:
-                        total = row['Longs'] + row['Shorts']
-                        new_row = pd.DataFrame([{
-                            'Date': row['Date'],
-                            'Longs': row['Longs'],
-                            'Shorts': row['Shorts'],
-                            'Total': total,
-                            'Long %': round(row['Longs']/total*100, 1) if total > 0 else 0,
-                            'Short %': round(row['Shorts']/total*100, 1) if total > 0 else 0,
-                            'Net': row['Longs'] - row['Shorts']
-                        }])
-                        full_df = pd.concat([full_df, new_row], ignore_index=True)
-                
-                full_df = full_df.sort_values('Date').drop_duplicates('Date', keep='last').reset_index(drop=True)
+                full_df = upsert_positions(df, *editor_changes(display_df, edited_df))
                 st.session_state.markets_df[market] = full_df
-                save_to_json()
+                save_to_json([market], f"bulk edit of {market}")
                 st.success("✅ All changes saved!")
                 st.rerun()
                 
@@ -417,63 +366,106 @@ def bulk_edit_mode(market):
 # DATA PERSISTENCE FUNCTIONS
 # -------------------------------
 
-def save_to_json():
-    """Save all market data to JSON format"""
-    data_to_save = {}
-    for market, df in st.session_state.markets_df.items():
-        data_to_save[market] = {
-            'Date': df['Date'].dt.strftime('%Y-%m-%d').tolist(),
-            'Longs': df['Longs'].tolist(),
-            'Shorts': df['Shorts'].tolist(),
-            'Total': df['Total'].tolist(),
-            'Long %': df['Long %'].tolist(),
-            'Short %': df['Short %'].tolist(),
-            'Net': df['Net'].tolist()
-        }
-    
-    with open(JSON_STORE_PATH, 'w') as f:
-        json.dump(data_to_save, f, indent=2)
+def save_to_json(markets=None, description=None):
+    """Append the rows that changed (in ``markets``, or everywhere) to the store log.
+
+    Saving a market explicitly also commits its staged edits; a full save
+    leaves markets with an open transaction alone. A ``description`` makes
+    the write an undoable step in this session's edit journal. Raises
+    StoreConflict if another session changed one of these markets since
+    this rerun loaded it.
+    """
+    pending = st.session_state.pending_edits
+    if markets is None:
+        if pending:
+            markets = [m for m in st.session_state.markets_df if m not in pending]
+    written, st.session_state.store_version = shared_market_data.sync(
+        st.session_state.markets_df, markets, st.session_state.store_version, description,
+        author=st.session_state.instance_id,
+    )
+    if markets is not None:
+        for market in markets:
+            pending.pop(market, None)
+    return written
 
 def load_from_json():
-    """Load market data from JSON if it exists"""
-    if JSON_STORE_PATH.exists():
-        try:
-            with open(JSON_STORE_PATH, 'r') as f:
-                data = json.load(f)
-            
-            markets_df = {}
-            for market, market_data in data.items():
-                if market.startswith('_'):
-                    continue
-                df = pd.DataFrame({
-                    'Date': pd.to_datetime(market_data['Date']),
-                    'Longs': market_data['Longs'],
-                    'Shorts': market_data['Shorts'],
-                    'Total': market_data['Total'],
-                    'Long %': market_data['Long %'],
-                    'Short %': market_data['Short %'],
-                    'Net': market_data['Net']
-                })
-                markets_df[market] = df
-            return markets_df
-        except Exception as e:
-            return None
-    return None
+    """This session's copy-on-write view of the shared market data"""
+    try:
+        st.session_state.store_version, markets_df = shared_market_data.view()
+        return markets_df
+    except Exception as e:
+        return None
+
+def merge_backfill(markets_df, backfill, overwrite=False):
+    """Merge archive history into the markets dict, one concat per market.
+
+    Rows already in the store win unless ``overwrite`` is set, except
+    interpolated weeks, which reported ones always replace.
+    Returns the number of rows added or replaced.
+    """
+    changed = 0
+    for market, columns in backfill.items():
+        archive_df = pd.DataFrame(columns)
+        archive_df['Date'] = pd.to_datetime(archive_df['Date'])
+        if market in markets_df:
+            existing = markets_df[market]
+            if INTERPOLATED in existing and not overwrite:
+                # reported weeks always replace interpolated ones
+                existing = existing[~(existing[INTERPOLATED].eq(True) & existing['Date'].isin(archive_df['Date']))]
+            parts = [existing, archive_df] if overwrite else [archive_df, existing]
+            merged = pd.concat(parts, ignore_index=True).drop_duplicates('Date', keep='last')
+            if INTERPOLATED in merged:
+                merged[INTERPOLATED] = merged[INTERPOLATED].eq(True)
+            changed += len(merged) - len(existing) if not overwrite else len(archive_df)
+        else:
+            merged = archive_df
+            changed += len(archive_df)
+        markets_df[market] = merged.sort_values('Date', ascending=True).reset_index(drop=True)
+    return changed
 
 def save_edited_data(market, edited_df):
     """Save edited data back to session state"""
     st.session_state.markets_df[market] = edited_df
-    save_to_json()
+    save_to_json([market], f"edit of {market}")
     st.session_state.edit_mode = False
     st.session_state.current_editing_market = None
     st.success(f"✅ Data for {market} updated successfully!")
 
 def cancel_edit():
-    """Cancel editing mode"""
+    """Cancel editing mode, dropping only the open market's staged changes"""
+    market = st.session_state.current_editing_market
+    if market is not None:
+        discard_edit(market)
     st.session_state.edit_mode = False
     st.session_state.current_editing_market = None
     st.session_state.edit_submode = None
 
+def undo_last_edit(undo=True):
+    """Undo (or redo) this session's most recent committed edit from the journal"""
+    entry = edit_journal.peek(st.session_state.instance_id)[0 if undo else 1]
+    verb = "undo" if undo else "redo"
+    if entry is None:
+        return False, f"Nothing to {verb}"
+    markets = list(entry['markets'])
+    busy = [m for m in markets if m in st.session_state.pending_edits]
+    if busy:
+        return False, f"⚠️ Commit or discard the pending edits to {', '.join(busy)} first"
+    try:
+        frames = edit_journal.frames(entry, st.session_state.markets_df, undo=undo)
+    except ValueError as e:
+        return False, f"⚠️ Can't {verb} {entry['description']}: {e}"
+    for market, df in frames.items():
+        if df is None:
+            st.session_state.markets_df.pop(market, None)
+        else:
+            st.session_state.markets_df[market] = df
+    try:
+        save_to_json(markets)
+    except StoreConflict as e:
+        return False, f"⚠️ Not {'undone' if undo else 'redone'}: {', '.join(e.markets)} changed in another session. Try again."
+    edit_journal.done(entry, undo=undo)
+    return True, f"{'↶ Undid' if undo else '↷ Redid'} {entry['description']}"
+
 # -------------------------------
 # HISTORICAL DATA ARRAYS - 16+ WEEKS FROM YOUR EXCEL FILES
 # -------------------------------
@@ -763,9 +755,7 @@ def load_historical_data():
 
 def apply_switch_logic(markets_df):
     """Apply long/short switching for currencies with USD as base"""
-    switch_markets = ['USD/CAD', 'USD/CHF', 'USD/JPY', 'USD/MXN', 'USD/BRL', 'USD/ZAR']
-    
-    for market in switch_markets:
+    for market in USD_BASE_MARKETS:
         if market in markets_df:
             df = markets_df[market].copy()
             # Swap longs and shorts
@@ -778,424 +768,96 @@ def apply_switch_logic(markets_df):
     return markets_df
 
 # -------------------------------
-# YOUR EXACT CFTC EXTRACTOR
+# ENHANCED MARKET ANALYSIS WITH PEAK VALUES AND TOGGLE SECTIONS
 # -------------------------------
-class CombinedCFTCExtractor:
-    def __init__(self):
-        self.commodity_data = {}
-        self.report_date = ""
-
-    def parse_report_text(self, text, source):
-        date_match = re.search(r'FUTURES ONLY POSITIONS AS OF (\d{2}/\d{2}/\d{2})', text, re.IGNORECASE)
-        if date_match:
-            report_date_str = date_match.group(1)
-            month, day, year = report_date_str.split('/')
-            self.report_date = f"20{year}-{month}-{day}"
-
-        commodity_blocks = re.split(r'NUMBER OF TRADERS IN EACH CATEGORY', text, flags=re.IGNORECASE)
-
-        data = {}
-        for block in commodity_blocks:
-            name_match = re.search(r'([A-Z][A-Z0-9#\s,\-\.]+)\s*-\s*(CHICAGO MERCANTILE EXCHANGE|COMMODITY EXCHANGE INC\.|ICE FUTURES EUROPE|ICE FUTURES U\.S\.)', block, re.IGNORECASE)
-            if name_match:
-                commodity_name = name_match.group(1).strip()
-                
-                commitments_match = re.search(r'COMMITMENTS\s+([\d,\s-]+)', block, re.IGNORECASE)
-                if commitments_match:
-                    numbers_str = commitments_match.group(1)
-                    numbers = re.findall(r'[-]?\d+', numbers_str.replace(',', ''))
-                    if len(numbers) >= 8:
-                        noncomm_long = int(numbers[0])
-                        noncomm_short = int(numbers[1])
-                        net_position = noncomm_long - noncomm_short
-                        total_positions = noncomm_long + noncomm_short
-                        long_percent = (noncomm_long / total_positions * 100) if total_positions > 0 else 0
-                        short_percent = (noncomm_short / total_positions * 100) if total_positions > 0 else 0
-
-                        data[commodity_name] = {
-                            'longs': noncomm_long,
-                            'shorts': noncomm_short,
-                            'net': net_position,
-                            'long_percent': round(long_percent, 2),
-                            'short_percent': round(short_percent, 2),
-                            'total': total_positions
-                        }
-        return data
-
-    def fetch_current_reports(self):
-        urls = {
-            'CME': "https://www.cftc.gov/dea/futures/deacmesf.htm",
-            'COMEX': "https://www.cftc.gov/dea/futures/deacmxsf.htm",
-            'ICE_US': "https://www.cftc.gov/dea/futures/deanybtsf.htm",
-            'ICE_EU': "https://www.cftc.gov/dea/futures/deaiceusf.htm",
-        }
 
-        all_current = {}
-        for source, url in urls.items():
-            try:
-                response = requests.get(url, timeout=30)
-                text = response.text
-                data = self.parse_report_text(text, source)
-                all_current.update(data)
-            except Exception:
-                pass
-
-        self.commodity_data = all_current
-        return all_current
-
-    def extract_all(self):
-        self.fetch_current_reports()
-        return self.get_grouped_data()
-
-    def get_grouped_data(self):
-        currency_mapping = {
-            'EURO FX': 'EUR/USD',
-            'BRITISH POUND': 'GBP/USD',
-            'AUSTRALIAN DOLLAR': 'AUD/USD',
-            'NZ DOLLAR': 'NZD/USD',
-            'CANADIAN DOLLAR': 'USD/CAD',
-            'SWISS FRANC': 'USD/CHF',
-            'MEXICAN PESO': 'USD/MXN',
-            'BRAZILIAN REAL': 'USD/BRL',
-            'SO AFRICAN RAND': 'USD/ZAR',
-            'JAPANESE YEN': 'USD/JPY',
-        }
+def active_report_sections():
+    """The report sections whose show_* toggle is on"""
+    return tuple(s for s in REPORT_SECTIONS if st.session_state[f'show_{s}'])
 
-        groups = {
-            'Currencies': {},
-            'Metals': {},
-            'Energies': {},
-            'Agriculture': {},
-            'Crypto': {}
-        }
+@st.cache_resource
+def get_analysis_memo():
+    """Analysis results and per-section markdown shared by every session, keyed on data content"""
+    return LRUMemo(maxsize=512)
 
-        for cme_name, user_name in currency_mapping.items():
-            if cme_name in self.commodity_data:
-                data = self.commodity_data[cme_name].copy()
-                groups['Currencies'][user_name] = data
-
-        metal_names = {
-            'GOLD': 'XAU/USD',
-            'SILVER': 'XAG/USD',
-            'COPPER- #1': 'COPPER/USD',
-            'STEEL-HRC': 'STEEL-HRC/USD',
-            'LITHIUM HYDROXIDE': 'LITHIUM/USD',
-        }
-        for orig_name, display_name in metal_names.items():
-            for key in self.commodity_data:
-                if orig_name in key:
-                    groups['Metals'][display_name] = self.commodity_data[key]
-                    break
-
-        for key in self.commodity_data:
-            if 'CRUDE OIL' in key.upper():
-                groups['Energies']['CRUDE OIL/USD'] = self.commodity_data[key]
-            if 'NATURAL GAS' in key.upper():
-                groups['Energies']['NAT GAS/USD'] = self.commodity_data[key]
-
-        for key in self.commodity_data:
-            if 'COFFEE' in key.upper():
-                groups['Agriculture']['COFFEE/USD'] = self.commodity_data[key]
-            if 'WHEAT-SRW' in key.upper():
-                groups['Agriculture']['WHEAT SRW/USD'] = self.commodity_data[key]
-            if 'WHEAT-HRW' in key.upper():
-                groups['Agriculture']['WHEAT HRW/USD'] = self.commodity_data[key]
-
-        for key in self.commodity_data:
-            if 'MICRO BITCOIN' in key.upper():
-                groups['Crypto']['MICRO-BTC/USD'] = self.commodity_data[key]
-                break
-
-        return groups
+analysis_memo = get_analysis_memo()
 
-# -------------------------------
-# FUNCTION TO ADD NEW DATA
-# -------------------------------
+def memoized_result(df, market_name, fingerprint=None):
+    """MarketAnalysis for one market, reused while its data is unchanged"""
+    fingerprint = fingerprint or frame_fingerprint(df)
+    return analysis_memo.get(
+        ('result', market_name, fingerprint),
+        lambda: analyze_market(market_name, df, st.session_state.peak_index, st.session_state.indicator_cache),
+    )
 
-def add_new_data(markets_df, display_name, new_date, new_data):
-    """Add new data and maintain rolling 13 weeks"""
-    
-    switch_markets = ['USD/CAD', 'USD/CHF', 'USD/JPY', 'USD/MXN', 'USD/BRL', 'USD/ZAR']
-    
-    if display_name in switch_markets:
-        processed_data = {
-            'longs': new_data['shorts'],
-            'shorts': new_data['longs'],
-            'net': -new_data['net'],
-            'long_percent': new_data['short_percent'],
-            'short_percent': new_data['long_percent'],
-            'total': new_data['total']
-        }
-    else:
-        processed_data = new_data
-    
-    new_row = pd.DataFrame([{
-        'Date': new_date,
-        'Longs': processed_data['longs'],
-        'Shorts': processed_data['shorts'],
-        'Total': processed_data['total'],
-        'Long %': processed_data['long_percent'],
-        'Short %': processed_data['short_percent'],
-        'Net': processed_data['net']
-    }])
-    
-    if display_name in markets_df:
-        updated_df = pd.concat([markets_df[display_name], new_row], ignore_index=True)
-    else:
-        updated_df = new_row
-    
-    updated_df = updated_df.sort_values('Date', ascending=True).reset_index(drop=True)
-    updated_df = updated_df.drop_duplicates(subset=['Date'], keep='last')
-    markets_df[display_name] = updated_df
-    
-    return markets_df
+def memoized_analysis(df, market_name):
+    """Analysis markdown joined from per-section texts, each reused while the market's data is unchanged.
+
+    Sections are keyed on their own, so flipping one toggle renders at most
+    that section; the rest come from the memo.
+    """
+    fingerprint = frame_fingerprint(df)
+    result = memoized_result(df, market_name, fingerprint)
+    texts = [
+        analysis_memo.get(('section', market_name, fingerprint, section),
+                          lambda section=section: render_section(result, section))
+        for section in active_report_sections()
+    ]
+    return join_sections(result, texts)
 
 # -------------------------------
-# ENHANCED MARKET ANALYSIS WITH PEAK VALUES AND TOGGLE SECTIONS
+# LOAD OR INITIALIZE DATA
 # -------------------------------
+raw_report_cache = RawReportCache(RAW_REPORT_CACHE_DIR)
 
-def analyze_market_with_peaks(df, market_name):
-    """Comprehensive market analysis including peak/min values with toggle sections"""
-    
-    recent_13 = df.tail(13).copy()
-    latest = recent_13.iloc[-1]
-    
-    avg_longs = recent_13['Longs'].mean()
-    avg_shorts = recent_13['Shorts'].mean()
-    avg_net = recent_13['Net'].mean()
-    
-    longs_vs_avg = ((latest['Longs'] - avg_longs) / avg_longs * 100)
-    shorts_vs_avg = ((latest['Shorts'] - avg_shorts) / avg_shorts * 100)
-    
-    peaks = PEAK_VOLUME_VALUES.get(market_name, {'has_peaks': False})
-    
-    analysis = []
-    
-    analysis.append(f"## 📊 COMPLETE ANALYSIS: {market_name}")
-    analysis.append("---")
-    
-    if abs(longs_vs_avg) > 15 or abs(shorts_vs_avg) > 15:
-        analysis.append("### ⚠️ **BIAS SHIFT DETECTED!**")
-        if longs_vs_avg > 15:
-            analysis.append(f"🔥 **LONGS shifting BULLISH** - {longs_vs_avg:+.1f}% above 13-week average")
-            analysis.append("🎯 **Watch DEMAND ZONES carefully as price approaches**")
-        elif longs_vs_avg < -15:
-            analysis.append(f"📉 **LONGS shifting BEARISH** - {longs_vs_avg:+.1f}% below 13-week average")
-            analysis.append("🎯 **Watch SUPPLY ZONES carefully as price approaches**")
-        
-        if shorts_vs_avg > 15:
-            analysis.append(f"🔥 **SHORTS shifting BEARISH** - {shorts_vs_avg:+.1f}% above 13-week average")
-            analysis.append("🎯 **Watch SUPPLY ZONES carefully as price approaches**")
-        elif shorts_vs_avg < -15:
-            analysis.append(f"📈 **SHORTS shifting BULLISH** - {shorts_vs_avg:+.1f}% below 13-week average")
-            analysis.append("🎯 **Watch DEMAND ZONES carefully as price approaches**")
-        analysis.append("---")
-    
-    if st.session_state.show_positioning:
-        analysis.append("### 🎯 CURRENT INSTITUTIONAL POSITIONING")
-        analysis.append(f"- **Longs:** {latest['Longs']:,.0f} ({latest['Long %']:.1f}%)")
-        analysis.append(f"- **Shorts:** {latest['Shorts']:,.0f} ({latest['Short %']:.1f}%)")
-        analysis.append(f"- **Net Position:** {latest['Net']:+,.0f}")
-        
-        if latest['Long %'] >= 70:
-            analysis.append("🔥 **EXTREME BULLISH** - 70%+ long concentration")
-        elif latest['Short %'] >= 70:
-            analysis.append("🔥 **EXTREME BEARISH** - 70%+ short concentration")
-        analysis.append("")
-    
-    if st.session_state.show_peak:
-        analysis.append("### 📈 PEAK VOLUME ANALYSIS")
-        
-        if peaks['has_peaks']:
-            if peaks.get('peak_longs'):
-                longs_pct_of_peak = (latest['Longs'] / peaks['peak_longs'] * 100)
-                analysis.append(f"\n**Longs:** {latest['Longs']:,.0f} vs Peak {peaks['peak_longs']:,.0f} ({longs_pct_of_peak:.1f}%)")
-                
-                if longs_pct_of_peak >= 98:
-                    analysis.append("🔴 **CRITICAL: AT ALL-TIME HIGH** - Swift reversal expected!")
-                    analysis.append("   → Look for **SUPPLY ZONES** above current price")
-                elif longs_pct_of_peak >= 95:
-                    analysis.append("⚠️ **CRITICAL: APPROACHING ALL-TIME HIGH**")
-                    analysis.append("   → Prepare for potential reversal at supply zones")
-                elif longs_pct_of_peak >= 90:
-                    analysis.append("📊 **Near peak levels** - Monitor for exhaustion at supply")
-            
-            if peaks.get('peak_shorts'):
-                shorts_pct_of_peak = (latest['Shorts'] / peaks['peak_shorts'] * 100)
-                analysis.append(f"\n**Shorts:** {latest['Shorts']:,.0f} vs Peak {peaks['peak_shorts']:,.0f} ({shorts_pct_of_peak:.1f}%)")
-                
-                if shorts_pct_of_peak >= 98:
-                    analysis.append("🔴 **CRITICAL: SHORTS AT ALL-TIME HIGH** - Short squeeze imminent!")
-                    analysis.append("   → Look for **DEMAND ZONES** below current price")
-                elif shorts_pct_of_peak >= 95:
-                    analysis.append("⚠️ **CRITICAL: SHORTS APPROACHING ALL-TIME HIGH**")
-                    analysis.append("   → Prepare for potential short squeeze at demand zones")
-                elif shorts_pct_of_peak >= 90:
-                    analysis.append("📊 **Shorts near peak** - Monitor for covering at demand")
-            
-            if peaks.get('min_longs') and latest['Longs'] <= peaks['min_longs'] * 1.1:
-                analysis.append(f"\n🟢 **Longs at historic lows** - Potential **DEMAND ZONE** forming")
-            
-            if peaks.get('min_shorts') and latest['Shorts'] <= peaks['min_shorts'] * 1.1:
-                analysis.append(f"\n🔴 **Shorts at historic lows** - Potential **SUPPLY ZONE** forming")
-        else:
-            analysis.append("📊 No peak volume data available for this market")
-        analysis.append("")
-    
-    if st.session_state.show_comparison:
-        analysis.append("### 📊 13-WEEK AVERAGE COMPARISON")
-        analysis.append(f"- **Longs:** {latest['Longs']:,.0f} vs 13wk avg {avg_longs:,.0f} ({longs_vs_avg:+.1f}%)")
-        analysis.append(f"- **Shorts:** {latest['Shorts']:,.0f} vs 13wk avg {avg_shorts:,.0f} ({shorts_vs_avg:+.1f}%)")
-        analysis.append(f"- **Net:** {latest['Net']:+,.0f} vs 13wk avg {avg_net:+,.0f}")
-        
-        if abs(longs_vs_avg) > 20:
-            analysis.append(f"\n{'📈' if longs_vs_avg > 0 else '📉'} **Significant deviation** in long positioning")
-        if abs(shorts_vs_avg) > 20:
-            analysis.append(f"{'📉' if shorts_vs_avg > 0 else '📈'} **Significant deviation** in short positioning")
-        analysis.append("")
-    
-    if st.session_state.show_zones:
-        analysis.append("### 🎯 KEY SUPPLY/DEMAND ZONES")
-        
-        if latest['Long %'] >= 70:
-            analysis.append("**📈 DEMAND ZONE** (Institutional Buying)")
-            analysis.append("- **Location:** Recent swing lows")
-            analysis.append("- **Strategy:** Buy on pullbacks to demand zone")
-            analysis.append("- **Stop Loss:** Below the demand zone low")
-            analysis.append("- **RSI Confirmation:** Look for RSI > 40 to confirm demand zone holding")
-        elif latest['Short %'] >= 70:
-            analysis.append("**📉 SUPPLY ZONE** (Institutional Selling)")
-            analysis.append("- **Location:** Recent swing highs")
-            analysis.append("- **Strategy:** Sell on rallies to supply zone")
-            analysis.append("- **Stop Loss:** Above the supply zone high")
-            analysis.append("- **RSI Confirmation:** Look for RSI < 60 to confirm supply zone holding")
-        else:
-            analysis.append("**📊 RANGE BOUNDARIES**")
-            analysis.append("- **Demand Zone:** Recent swing lows")
-            analysis.append("- **Supply Zone:** Recent swing highs")
-            analysis.append("- **Strategy:** Buy at demand, sell at supply")
-            analysis.append("- **RSI Confirmation:** RSI < 30 at demand, RSI > 70 at supply")
-        analysis.append("")
-    
-    if st.session_state.show_rsi:
-        analysis.append("### 📊 RSI CONFIRMATION LEVELS")
-        analysis.append("**RSI (Relative Strength Index) Rules:**")
-        analysis.append("- **RSI > 40** suggests DEMAND ZONE will likely hold (bullish)")
-        analysis.append("- **RSI < 60** suggests SUPPLY ZONE will likely hold (bearish)")
-        analysis.append("- **RSI < 30** at demand zone = oversold bounce potential")
-        analysis.append("- **RSI > 70** at supply zone = overbought reversal potential")
-        analysis.append("\n*Note: Check your chart for actual RSI values*")
-        analysis.append("")
-    
-    if st.session_state.show_myfxbook:
-        analysis.append("### 👥 MYFXBOOK RETAIL SENTIMENT")
-        analysis.append("**Contrarian Trading Signals:**")
-        
-        if latest['Long %'] >= 70:
-            analysis.append("- **🔥 Institutional long extreme** → Check MyFxBook for retail long crowd")
-            analysis.append("- **CONTRARIAN:** If retail is also long, consider fading the move")
-            analysis.append("- **Confirmation:** Wait for retail sentiment to peak before trading against")
-        elif latest['Short %'] >= 70:
-            analysis.append("- **🔥 Institutional short extreme** → Check MyFxBook for retail short crowd")
-            analysis.append("- **CONTRARIAN:** If retail is also short, prepare for reversal")
-            analysis.append("- **Confirmation:** Look for retail capitulation")
-        else:
-            analysis.append("- Monitor MyFxBook for extreme retail positioning (80%+ in one direction)")
-            analysis.append("- Use as additional confluence with COT data")
-        
-        analysis.append("\n**Trading Against Sentiment Rules:**")
-        analysis.append("1. Identify extreme retail positioning (70-80%+ on MyFxBook)")
-        analysis.append("2. Confirm with COT institutional extreme (70%+ longs/shorts)")
-        analysis.append("3. Wait for price to reach key supply/demand zone")
-        analysis.append("4. Look for reversal candlestick patterns")
-        analysis.append("5. Execute trade in opposite direction of retail crowd")
-        analysis.append("")
-    
-    if st.session_state.show_news:
-        analysis.append("### 📰 NEWS & FUNDAMENTAL CONTEXT")
-        analysis.append("**Check MyFxBook News Section for:**")
-        analysis.append("- Central bank decisions (Fed, ECB, BOE, etc.)")
-        analysis.append("- Economic data releases (CPI, NFP, GDP, etc.)")
-        analysis.append("- Geopolitical events")
-        analysis.append("- Market sentiment shifts")
-        analysis.append("\n**Integration with COT Data:**")
-        analysis.append("- Strong COT positioning + major news event = increased volatility")
-        analysis.append("- News can trigger the reversal at extreme COT levels")
-        analysis.append("- Use news as confluence for supply/demand zone trades")
-        analysis.append("")
-    
-    if st.session_state.show_plan:
-        analysis.append("### 📋 COMPLETE TRADING PLAN")
-        
-        if latest['Long %'] >= 70:
-            bias = "BULLISH (but watch for reversal at supply)"
-        elif latest['Short %'] >= 70:
-            bias = "BEARISH (but watch for reversal at demand)"
-        else:
-            bias = "NEUTRAL - range trading"
-        
-        analysis.append(f"**Primary Bias:** {bias}")
-        
-        analysis.append("\n**✅ ENTRY CONDITIONS (ALL must be met):**")
-        analysis.append("1. **COT Confirmation:** Institutional positioning aligns with bias")
-        analysis.append("2. **Price Action:** Price reaches key supply/demand zone")
-        analysis.append("3. **RSI Confirmation:**")
-        analysis.append("   - For DEMAND zone longs: RSI > 40 (zone likely to hold)")
-        analysis.append("   - For SUPPLY zone shorts: RSI < 60 (zone likely to hold)")
-        analysis.append("4. **MyFxBook Sentiment:** Retail crowd is on opposite side (contrarian)")
-        analysis.append("5. **Candlestick Pattern:** Reversal signal at the zone")
-        
-        analysis.append("\n**🛑 STOP LOSS PLACEMENT:**")
-        if "BULLISH" in bias:
-            analysis.append("- Below the DEMAND ZONE low")
-            analysis.append("- Add 1.5x ATR buffer for volatility")
-        elif "BEARISH" in bias:
-            analysis.append("- Above the SUPPLY ZONE high")
-            analysis.append("- Add 1.5x ATR buffer for volatility")
-        else:
-            analysis.append("- Beyond range boundaries (below demand or above supply)")
-        
-        analysis.append("\n**🎯 TAKE PROFIT TARGETS:**")
-        analysis.append("- **Target 1:** Nearest opposite zone (1:2 risk/reward)")
-        analysis.append("- **Target 2:** Next major supply/demand level")
-        analysis.append("- **Target 3:** Trail stop after 1:1 achieved")
-        
-        analysis.append("\n**⚖️ RISK MANAGEMENT:**")
-        analysis.append("- Maximum risk: 1-2% of account per trade")
-        analysis.append("- Avoid trading 30 minutes before/after major news")
-        analysis.append("- Correlated markets should confirm (e.g., EUR/USD and GBP/USD)")
-        
-        if peaks['has_peaks']:
-            if (peaks.get('peak_longs') and latest['Longs'] >= peaks['peak_longs'] * 0.95) or \
-               (peaks.get('peak_shorts') and latest['Shorts'] >= peaks['peak_shorts'] * 0.95):
-                analysis.append("\n⚠️ **⚠️ CRITICAL WARNING: NEAR HISTORICAL EXTREMES! ⚠️**")
-                analysis.append("**Action:** Prepare for swift reversal at nearest supply/demand zone")
-                analysis.append("**Confirmation:** Wait for RSI divergence and MyFxBook retail extreme")
-        
-        analysis.append("")
-    
-    analysis.append("---")
-    analysis.append(f"*Analysis based on last {len(recent_13)} weeks of COT data*")
-    analysis.append(f"*Combine with technical analysis on your charts*")
-    
-    return "\n".join(analysis)
+@st.cache_resource
+def get_shared_market_data(backend):
+    """One store and in-memory copy of the data per process, shared by all sessions"""
+    return open_shared_data(DATA_DIR, backend, STORE_COMPRESS, snapshot_path=STARTUP_SNAPSHOT_PATH)
+
+shared_market_data = get_shared_market_data(STORE_BACKEND)
+market_store = shared_market_data.store
+edit_journal = shared_market_data.journal
 
-# -------------------------------
-# LOAD OR INITIALIZE DATA
-# -------------------------------
 loaded_data = load_from_json()
 if loaded_data:
-    st.session_state.markets_df = loaded_data
+    st.session_state.markets_df = apply_pending_edits(loaded_data)
     st.session_state.historical_data_loaded = True
+    st.session_state.startup_stats = shared_market_data.last_load
+    if shared_market_data.last_load.get('changed'):
+        st.toast(f"🔄 Reloaded {len(shared_market_data.last_load['changed'])} market(s) changed by another session")
 else:
+    startup_started = time.perf_counter()
     st.session_state.markets_df = load_historical_data()
     st.session_state.markets_df = apply_switch_logic(st.session_state.markets_df)
     st.session_state.historical_data_loaded = True
-    save_to_json()
+    try:
+        save_to_json()
+    except StoreConflict:
+        # Another session initialised the store first; use its data
+        st.rerun()
+    shared_market_data.compact()
+    st.session_state.startup_stats = {
+        'source': "built-in history",
+        'snapshot': None,
+        'seconds': time.perf_counter() - startup_started,
+    }
 
 # -------------------------------
 # AUTO-FETCH ON FRIDAYS
 # -------------------------------
+def record_fetch_stats(extractor):
+    """Keep per-source latency and the full report rows of the last fetch"""
+    st.session_state.last_fetch_stats = {
+        'total_seconds': extractor.fetch_seconds,
+        'sources': extractor.source_stats,
+    }
+    if extractor.report_table is not None and len(extractor.report_table):
+        st.session_state.last_report_rows = {
+            'report_date': extractor.report_table.report_date,
+            'rows': extractor.report_table.by_display_name(),
+        }
+
 def check_and_auto_fetch():
     today = datetime.now().date()
     is_friday = datetime.now().weekday() == 4
@@ -1205,22 +867,21 @@ def check_and_auto_fetch():
     
     if is_friday and st.session_state.last_auto_fetch != today:
         with st.spinner("📡 Auto-fetching weekly CFTC data..."):
-            extractor = CombinedCFTCExtractor()
+            extractor = CombinedCFTCExtractor(cache=raw_report_cache, offline=st.session_state.offline_mode)
             grouped_data = extractor.extract_all()
+            record_fetch_stats(extractor)
+            
+            # Nothing new on cftc.gov since the last merge: skip parsing and merging,
+            # and count today's check as done so reruns don't re-send the GETs
+            if extractor.all_unchanged:
+                st.session_state.last_auto_fetch = today
+                return
             
             if extractor.report_date:
                 report_date = datetime.strptime(extractor.report_date, '%Y-%m-%d')
                 
-                data_already_exists = False
-                for group_name, markets in grouped_data.items():
-                    for display_name, data in markets.items():
-                        if display_name in st.session_state.markets_df:
-                            df = st.session_state.markets_df[display_name]
-                            if report_date in df['Date'].values:
-                                data_already_exists = True
-                                break
-                
-                if data_already_exists:
+                if report_already_stored(st.session_state.markets_df, report_date, grouped_data, market_has_date):
+                    extractor.commit_cache()
                     st.info(f"ℹ️ Data for {extractor.report_date} already exists in database")
                     return
                 
@@ -1228,45 +889,20 @@ def check_and_auto_fetch():
                 st.session_state.last_auto_fetch = today
                 st.session_state.fetch_history.append(extractor.report_date)
                 
-                added_count = 0
-                for group_name, markets in grouped_data.items():
-                    for display_name, data in markets.items():
-                        if display_name not in st.session_state.markets_df:
-                            switch_markets = ['USD/CAD', 'USD/CHF', 'USD/JPY', 'USD/MXN', 'USD/BRL', 'USD/ZAR']
-                            if display_name in switch_markets:
-                                processed_data = {
-                                    'longs': data['shorts'],
-                                    'shorts': data['longs'],
-                                    'net': -data['net'],
-                                    'long_percent': data['short_percent'],
-                                    'short_percent': data['long_percent'],
-                                    'total': data['total']
-                                }
-                            else:
-                                processed_data = data
-                            
-                            st.session_state.markets_df[display_name] = pd.DataFrame([{
-                                'Date': report_date,
-                                'Longs': processed_data['longs'],
-                                'Shorts': processed_data['shorts'],
-                                'Total': processed_data['total'],
-                                'Long %': processed_data['long_percent'],
-                                'Short %': processed_data['short_percent'],
-                                'Net': processed_data['net']
-                            }])
-                            added_count += 1
-                        else:
-                            df = st.session_state.markets_df[display_name]
-                            if report_date not in df['Date'].values:
-                                st.session_state.markets_df = add_new_data(
-                                    st.session_state.markets_df, display_name, report_date, data
-                                )
-                                added_count += 1
+                added_count = len(ingest_report(st.session_state.markets_df, report_date, grouped_data, market_has_date))
                 
-                save_to_json()
-                st.success(f"✅ Auto-fetched {added_count} new data points for {extractor.report_date}")
+                try:
+                    save_to_json()
+                except StoreConflict as e:
+                    st.session_state.last_auto_fetch = None
+                    st.warning(f"⚠️ Fetched data not saved: {', '.join(e.markets)} changed in another session. It will be retried on reload.")
+                    return
+                extractor.commit_cache()
+                st.toast(f"✅ Auto-fetched {added_count} new data points for {extractor.report_date}")
 
+# Before any market is drawn, so a new week is on the page in this same run
 check_and_auto_fetch()
+mark_startup_phase('data loaded')
 
 # -------------------------------
 # STREAMLIT UI
@@ -1278,10 +914,28 @@ total_markets = len(st.session_state.markets_df)
 total_records = sum(len(df) for df in st.session_state.markets_df.values())
 st.sidebar.success(f"✅ LOADED: {total_markets} markets")
 st.sidebar.info(f"📊 Total records: {total_records}")
+startup_stats = st.session_state.startup_stats
+st.sidebar.caption(
+    f"⚡ Data loaded from {startup_stats['source']} in {startup_stats['seconds'] * 1000:.0f} ms"
+    + (f" · snapshot {startup_stats['snapshot']}" if startup_stats['snapshot'] else "")
+)
 
 if st.session_state.last_fetch_date:
     st.sidebar.info(f"📡 Latest: {st.session_state.last_fetch_date}")
 
+if st.session_state.last_fetch_stats:
+    stats = st.session_state.last_fetch_stats
+    st.sidebar.caption(f"⏱️ Last fetch: {stats['total_seconds']:.2f}s")
+    for source, source_stats in stats['sources'].items():
+        if source_stats['error']:
+            st.sidebar.caption(f"  • {source}: failed after {source_stats['seconds']:.2f}s")
+        elif source_stats['status'] == 'unchanged':
+            st.sidebar.caption(f"  • {source}: unchanged ({source_stats['seconds']:.2f}s)")
+        elif source_stats['status'] == 'cached':
+            st.sidebar.caption(f"  • {source}: offline copy ({source_stats['records']} contracts)")
+        else:
+            st.sidebar.caption(f"  • {source}: {source_stats['seconds']:.2f}s ({source_stats['records']} contracts)")
+
 st.sidebar.divider()
 st.sidebar.header("🔘 Analysis Toggles")
 
@@ -1290,6 +944,7 @@ with col1:
     st.session_state.show_positioning = st.checkbox("🎯 Positioning", value=st.session_state.show_positioning)
     st.session_state.show_peak = st.checkbox("📈 Peak Volume", value=st.session_state.show_peak)
     st.session_state.show_comparison = st.checkbox("📊 13-Week Comp", value=st.session_state.show_comparison)
+    st.session_state.show_indicators = st.checkbox("📐 COT Index", value=st.session_state.show_indicators)
     st.session_state.show_zones = st.checkbox("🎯 Supply/Demand", value=st.session_state.show_zones)
 
 with col2:
@@ -1301,72 +956,71 @@ with col2:
 st.sidebar.divider()
 if st.sidebar.button("🚀 FETCH LATEST CFTC DATA", type="primary", use_container_width=True):
     with st.spinner("📡 Fetching data from CFTC.gov..."):
-        extractor = CombinedCFTCExtractor()
+        extractor = CombinedCFTCExtractor(cache=raw_report_cache, offline=st.session_state.offline_mode)
         grouped_data = extractor.extract_all()
+        record_fetch_stats(extractor)
         
-        if extractor.report_date:
+        if extractor.all_unchanged:
+            st.sidebar.info("ℹ️ CFTC reports unchanged since the last fetch")
+        elif extractor.report_date:
             report_date = datetime.strptime(extractor.report_date, '%Y-%m-%d')
             
-            data_already_exists = False
-            for group_name, markets in grouped_data.items():
-                for display_name, data in markets.items():
-                    if display_name in st.session_state.markets_df:
-                        df = st.session_state.markets_df[display_name]
-                        if report_date in df['Date'].values:
-                            data_already_exists = True
-                            break
-                    if data_already_exists:
-                        break
-                if data_already_exists:
-                    break
-            
-            if data_already_exists:
+            if report_already_stored(st.session_state.markets_df, report_date, grouped_data, market_has_date):
+                extractor.commit_cache()
                 st.sidebar.warning(f"⚠️ Data for {extractor.report_date} has already been extracted!")
             else:
                 st.session_state.last_fetch_date = extractor.report_date
                 st.session_state.fetch_history.append(extractor.report_date)
                 
-                added_count = 0
-                for group_name, markets in grouped_data.items():
-                    for display_name, data in markets.items():
-                        if display_name not in st.session_state.markets_df:
-                            switch_markets = ['USD/CAD', 'USD/CHF', 'USD/JPY', 'USD/MXN', 'USD/BRL', 'USD/ZAR']
-                            if display_name in switch_markets:
-                                processed_data = {
-                                    'longs': data['shorts'],
-                                    'shorts': data['longs'],
-                                    'net': -data['net'],
-                                    'long_percent': data['short_percent'],
-                                    'short_percent': data['long_percent'],
-                                    'total': data['total']
-                                }
-                            else:
-                                processed_data = data
-                            
-                            st.session_state.markets_df[display_name] = pd.DataFrame([{
-                                'Date': report_date,
-                                'Longs': processed_data['longs'],
-                                'Shorts': processed_data['shorts'],
-                                'Total': processed_data['total'],
-                                'Long %': processed_data['long_percent'],
-                                'Short %': processed_data['short_percent'],
-                                'Net': processed_data['net']
-                            }])
-                            added_count += 1
-                        else:
-                            df = st.session_state.markets_df[display_name]
-                            if report_date not in df['Date'].values:
-                                st.session_state.markets_df = add_new_data(
-                                    st.session_state.markets_df, display_name, report_date, data
-                                )
-                                added_count += 1
+                added_count = len(ingest_report(st.session_state.markets_df, report_date, grouped_data, market_has_date))
                 
-                save_to_json()
-                st.sidebar.success(f"✅ Added {added_count} new data points for {extractor.report_date}")
-                st.rerun()
+                try:
+                    save_to_json()
+                except StoreConflict as e:
+                    st.sidebar.warning(f"⚠️ Not saved: {', '.join(e.markets)} changed in another session. Fetch again.")
+                else:
+                    extractor.commit_cache()
+                    st.sidebar.success(f"✅ Added {added_count} new data points for {extractor.report_date}")
+                    st.rerun()
         else:
             st.sidebar.error("❌ Failed to fetch data")
 
+st.session_state.offline_mode = st.sidebar.checkbox(
+    "📴 Offline (use cached reports)", value=st.session_state.offline_mode,
+    help="Parse the last downloaded CFTC pages instead of contacting cftc.gov"
+)
+
+with st.sidebar.expander("📦 Historical Backfill"):
+    archive_path = st.text_input(
+        "Archive zip or folder", value=str(ARCHIVE_DIR),
+        help="CFTC legacy futures-only annual archives (deacotYYYY.zip)"
+    )
+    overwrite_existing = st.checkbox("Overwrite existing weeks", value=False)
+    if st.button("📦 Import Archives", use_container_width=True):
+        with st.spinner("📦 Reading CFTC archives..."):
+            started = datetime.now()
+            try:
+                backfill = backfill_from_archives([archive_path])
+            except Exception as e:
+                backfill = None
+                st.error(f"Error reading archives: {str(e)}")
+            if backfill:
+                changed = merge_backfill(st.session_state.markets_df, backfill, overwrite=overwrite_existing)
+                try:
+                    save_to_json()
+                except StoreConflict as e:
+                    st.warning(f"⚠️ Not saved: {', '.join(e.markets)} changed in another session. Import again.")
+                else:
+                    elapsed = (datetime.now() - started).total_seconds()
+                    st.success(f"✅ Imported {changed} rows across {len(backfill)} markets in {elapsed:.1f}s")
+            elif backfill is not None:
+                st.warning("⚠️ No archive files found")
+    if st.button("🩹 Repair Missing Weeks", use_container_width=True,
+                 help="Interpolate every week missing inside each market's history and save them in one write"):
+        with st.spinner("🩹 Interpolating missing weeks..."):
+            success, msg = repair_missing_weeks()
+        (st.success if success else st.warning)(msg)
+
 st.sidebar.divider()
 if not st.session_state.edit_mode:
     if st.sidebar.button("✏️ Enable Data Editing Mode", use_container_width=True):
@@ -1378,16 +1032,39 @@ else:
         cancel_edit()
         st.rerun()
 
+undo_entry, redo_entry = edit_journal.peek(st.session_state.instance_id)
+col_undo, col_redo = st.sidebar.columns(2)
+with col_undo:
+    if st.button("↶ Undo", use_container_width=True, disabled=undo_entry is None,
+                 help=f"Undo {undo_entry['description']}" if undo_entry else None):
+        success, msg = undo_last_edit()
+        if success:
+            st.toast(msg)
+            st.rerun()
+        st.sidebar.warning(msg)
+with col_redo:
+    if st.button("↷ Redo", use_container_width=True, disabled=redo_entry is None,
+                 help=f"Redo {redo_entry['description']}" if redo_entry else None):
+        success, msg = undo_last_edit(undo=False)
+        if success:
+            st.toast(msg)
+            st.rerun()
+        st.sidebar.warning(msg)
+
 if st.sidebar.button("🗑️ Clear All Data", use_container_width=True):
     if st.sidebar.checkbox("Confirm delete? This cannot be undone"):
         st.session_state.markets_df = {}
         st.session_state.last_fetch_date = None
         st.session_state.extracted_data_count = 0
         st.session_state.fetch_history = []
-        if JSON_STORE_PATH.exists():
-            os.remove(JSON_STORE_PATH)
+        st.session_state.pending_edits = {}
+        shared_market_data.clear()
+        edit_journal.clear()
+        if STORE_BACKEND != "json":
+            MarketStore(JSON_STORE_PATH).clear()
         if EXCEL_STORE_PATH.exists():
             os.remove(EXCEL_STORE_PATH)
+        raw_report_cache.clear()
         st.sidebar.success("✅ All data cleared")
         st.rerun()
 
@@ -1403,6 +1080,68 @@ group_markets = {
     'Crypto': ['MICRO-BTC/USD']
 }
 
+SCREENER_FILTERS = {
+    "All markets": lambda t: t,
+    f"Bias shift this week (>{BIAS_SHIFT_PCT}% vs 13-wk avg)": lambda t: t[t['Bias Shift']],
+    f"{EXTREME_PCT}%+ extremes": lambda t: t[t['Extreme'] != ''],
+    "Near peak (90%+ of all-time high)": lambda t: t[t['Peak Status'] != ''],
+    "At historic lows": lambda t: t[t['Longs at Lows'] | t['Shorts at Lows']],
+    "RSI extremes (≤30 / ≥70)": lambda t: t[(t['Net RSI'] <= 30) | (t['Net RSI'] >= 70)],
+}
+
+if st.session_state.markets_df:
+    with st.expander("🔎 ALL-MARKETS SCREENER", expanded=True):
+        screener_filter = st.radio("Show", list(SCREENER_FILTERS), horizontal=True, key="screener_filter")
+        st.session_state.peak_index.update_all(st.session_state.markets_df)
+        peaks = st.session_state.peak_index.all_peaks()
+        screener = SCREENER_FILTERS[screener_filter](screen_markets(st.session_state.markets_df, peaks))
+        screener = screener.sort_values('Longs vs Avg %', key=abs, ascending=False)
+        st.dataframe(
+            screener,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
+                "Longs": st.column_config.NumberColumn("Longs", format="%d"),
+                "Shorts": st.column_config.NumberColumn("Shorts", format="%d"),
+                "Net": st.column_config.NumberColumn("Net", format="%+d"),
+                "Long %": st.column_config.NumberColumn("Long %", format="%.1f%%"),
+                "Short %": st.column_config.NumberColumn("Short %", format="%.1f%%"),
+                "Longs vs Avg %": st.column_config.NumberColumn("Longs vs Avg", format="%+.1f%%"),
+                "Shorts vs Avg %": st.column_config.NumberColumn("Shorts vs Avg", format="%+.1f%%"),
+                "Net RSI": st.column_config.NumberColumn("Net RSI", format="%.1f"),
+                "Long % RSI": st.column_config.NumberColumn("Long % RSI", format="%.1f"),
+                "Net StochRSI": st.column_config.NumberColumn("Net StochRSI", format="%.0f"),
+                "Longs % of Peak": st.column_config.NumberColumn("Longs % of Peak", format="%.1f%%"),
+                "Shorts % of Peak": st.column_config.NumberColumn("Shorts % of Peak", format="%.1f%%"),
+            },
+        )
+        st.caption(f"{len(screener)} of {len(st.session_state.markets_df)} markets · click a column header to sort")
+    
+    with st.expander(f"🧪 ALERT BACKTEST (bias shift >{BIAS_SHIFT_PCT}% and {EXTREME_PCT}% extremes over all history)"):
+        if st.checkbox("Run backtest", key="run_backtest"):
+            triggers = backtest_alerts(st.session_state.markets_df)
+            st.dataframe(backtest_summary(triggers), use_container_width=True, hide_index=True)
+            st.caption("Runs = separate streaks of the signal · Net with signal = share of triggers where Net "
+                       "moved the signal's way over the following weeks")
+            col_bt1, col_bt2 = st.columns(2)
+            with col_bt1:
+                bt_market = st.selectbox("Market", ["All markets"] + sorted(st.session_state.markets_df), key="backtest_market")
+            with col_bt2:
+                bt_signal = st.selectbox("Signal", ["All signals"] + list(triggers['Signal'].unique()), key="backtest_signal")
+            shown = triggers
+            if bt_market != "All markets":
+                shown = shown[shown['Market'] == bt_market]
+            if bt_signal != "All signals":
+                shown = shown[shown['Signal'] == bt_signal]
+            st.dataframe(
+                shown.sort_values('Date', ascending=False, kind='mergesort'),
+                use_container_width=True,
+                hide_index=True,
+                column_config={"Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD")},
+            )
+            st.caption(f"{len(shown)} of {len(triggers)} triggers")
+
 for group, markets in group_markets.items():
     available_markets = [m for m in markets if m in st.session_state.markets_df]
     
@@ -1412,11 +1151,49 @@ for group, markets in group_markets.items():
         
         for idx, market in enumerate(available_markets):
             with tabs[idx]:
-                df = st.session_state.markets_df[market].copy()
+                df = st.session_state.markets_df[market]
                 
                 if st.session_state.edit_mode and st.session_state.current_editing_market == market:
+                    pending_txn = st.session_state.pending_edits.get(market)
+                    if pending_txn:
+                        st.info(f"📝 {len(pending_txn)} uncommitted change(s) for {market}")
+                        col_c1, col_c2 = st.columns(2)
+                        with col_c1:
+                            if st.button("✅ Commit Changes", key=f"commit_{market}"):
+                                success, msg = commit_edit(market)
+                                if success:
+                                    st.success(msg)
+                                    st.rerun()
+                                else:
+                                    st.error(msg)
+                        with col_c2:
+                            if st.button("↩️ Discard Changes", key=f"discard_{market}"):
+                                discard_edit(market)
+                                st.rerun()
+                    
                     if st.session_state.get('edit_submode') == 'bulk':
                         bulk_edit_mode(market)
+                    elif st.session_state.get('edit_submode') == 'insert':
+                        st.subheader("🔍 INSERT MISSING WEEK")
+                        target_week = st.date_input("Missing week", key=f"insert_date_{market}")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            if st.button("➕ Stage Interpolated Week", key=f"stage_insert_{market}"):
+                                begin_edit(market)
+                                success, msg = insert_missing_week(market, target_week.strftime('%Y-%m-%d'))
+                                if success:
+                                    st.success(msg)
+                                    st.rerun()
+                                else:
+                                    if not st.session_state.pending_edits.get(market):
+                                        discard_edit(market)
+                                    st.error(msg)
+                        with col2:
+                            if st.button("❌ Cancel", key=f"cancel_insert_{market}"):
+                                cancel_edit()
+                                st.rerun()
+                        
+                        st.divider()
                     else:
                         st.subheader("✏️ QUICK EDIT MODE")
                         edit_df = df.copy()
@@ -1432,19 +1209,18 @@ for group, markets in group_markets.items():
                         col1, col2 = st.columns(2)
                         with col1:
                             if st.button("💾 Save Changes", key=f"save_{market}"):
-                                edited_df['Date'] = pd.to_datetime(edited_df['Date'])
-                                edited_df['Total'] = edited_df['Longs'] + edited_df['Shorts']
-                                edited_df['Net'] = edited_df['Longs'] - edited_df['Shorts']
-                                edited_df['Long %'] = (edited_df['Longs'] / edited_df['Total'] * 100).round(1)
-                                edited_df['Short %'] = (edited_df['Shorts'] / edited_df['Total'] * 100).round(1)
-                                edited_df = edited_df.sort_values('Date', ascending=True).reset_index(drop=True)
-                                
-                                st.session_state.markets_df[market] = edited_df
-                                save_to_json()
-                                st.session_state.edit_mode = False
-                                st.session_state.current_editing_market = None
-                                st.success(f"✅ Data saved for {market}")
-                                st.rerun()
+                                try:
+                                    st.session_state.markets_df[market] = upsert_positions(df, *editor_changes(edit_df, edited_df))
+                                    save_to_json([market], f"table edit of {market}")
+                                except ValueError as e:
+                                    st.error(f"Error saving: {str(e)}")
+                                except StoreConflict as e:
+                                    st.error(f"⚠️ {market} changed in another session since this page loaded. Reload and edit again.")
+                                else:
+                                    st.session_state.edit_mode = False
+                                    st.session_state.current_editing_market = None
+                                    st.success(f"✅ Data saved for {market}")
+                                    st.rerun()
                         
                         with col2:
                             if st.button("❌ Cancel", key=f"cancel_{market}"):
@@ -1480,6 +1256,19 @@ for group, markets in group_markets.items():
                 if market in ['USD/CAD', 'USD/CHF', 'USD/JPY', 'USD/MXN', 'USD/BRL', 'USD/ZAR']:
                     st.caption("🔄 **SWITCHED**: Longs/Shorts swapped for USD-based pair")
                 
+                if st.session_state.last_report_rows and market in st.session_state.last_report_rows['rows']:
+                    report_row = st.session_state.last_report_rows['rows'][market]
+                    longs_chg = int(report_row['chg_noncomm_long'])
+                    shorts_chg = int(report_row['chg_noncomm_short'])
+                    if market in USD_BASE_MARKETS:
+                        longs_chg, shorts_chg = shorts_chg, longs_chg
+                    st.caption(
+                        f"🏦 CFTC {st.session_state.last_report_rows['report_date']}: "
+                        f"open interest {int(report_row['open_interest']):,} "
+                        f"({int(report_row['chg_open_interest']):+,} w/w) · "
+                        f"non-commercial change: longs {longs_chg:+,} / shorts {shorts_chg:+,}"
+                    )
+                
                 if st.session_state.edit_mode and st.session_state.current_editing_market is None:
                     col_e1, col_e2, col_e3 = st.columns(3)
                     with col_e1:
@@ -1519,7 +1308,7 @@ for group, markets in group_markets.items():
                 st.caption(f"📈 Total records: {total_weeks} weeks")
                 
                 st.subheader("🔍 COMPREHENSIVE MARKET ANALYSIS")
-                analysis_text = analyze_market_with_peaks(df, market)
+                analysis_text = memoized_analysis(df, market)
                 st.markdown(analysis_text)
                 
                 st.divider()
@@ -1532,8 +1321,12 @@ st.sidebar.header("💾 Export Data")
 
 if st.session_state.markets_df:
     if st.sidebar.button("💾 Save to Master Excel", use_container_width=True):
-        save_to_json()
-        st.sidebar.success(f"✅ Saved {len(st.session_state.markets_df)} markets")
+        try:
+            save_to_json()
+            shared_market_data.compact()
+            st.sidebar.success(f"✅ Saved {len(st.session_state.markets_df)} markets")
+        except StoreConflict as e:
+            st.sidebar.warning(f"⚠️ {', '.join(e.markets)} changed in another session; reload before saving")
     
     st.sidebar.subheader("📋 Download CSV")
     selected_market = st.sidebar.selectbox(
@@ -1553,6 +1346,17 @@ if st.session_state.markets_df:
             use_container_width=True
         )
     
+    # Built on request: analysing and serialising every market is wasted work on most reruns
+    if st.sidebar.button("🧾 Prepare Analysis JSON (all markets)", use_container_width=True):
+        analyses = {m: memoized_result(df, m) for m, df in st.session_state.markets_df.items() if len(df)}
+        st.sidebar.download_button(
+            label="📥 Download Analysis JSON",
+            data=render_json(analyses),
+            file_name="cot_analysis.json",
+            mime="application/json",
+            use_container_width=True
+        )
+    
     if st.session_state.fetch_history:
         st.sidebar.divider()
         st.sidebar.caption("📅 Fetch History:")
@@ -1562,9 +1366,24 @@ if st.session_state.markets_df:
 # -------------------------------
 # FOOTER
 # -------------------------------
+with st.sidebar.expander("🐞 Debug: analysis cache"):
+    memo_stats = analysis_memo.stats()
+    col_hits, col_misses = st.columns(2)
+    col_hits.metric("Hits", memo_stats['hits'])
+    col_misses.metric("Misses", memo_stats['misses'])
+    st.caption(
+        f"Hit rate {memo_stats['hit_rate']:.0%} · {memo_stats['size']}/{memo_stats['maxsize']} entries · "
+        f"{memo_stats['evictions']} evicted (shared by all sessions)"
+    )
+    st.caption(f"Peak index: {st.session_state.peak_index.counts}")
+    st.caption(f"Indicators: {st.session_state.indicator_cache.counts}")
+    if st.button("🧹 Clear analysis cache", use_container_width=True):
+        analysis_memo.clear()
+        st.rerun()
+
 st.markdown("---")
 st.caption("Data source: U.S. Commodity Futures Trading Commission (CFTC)")
-st.caption("✅ **PEAK VOLUME VALUES**: Hardcoded from your Excel files")
+st.caption("✅ **PEAK VOLUME VALUES**: Derived from stored history (all-time and rolling 1/3/5 years)")
 st.caption("✅ **SWITCH LOGIC**: Applied to USD/CAD, USD/CHF, USD/JPY, USD/MXN, USD/BRL, USD/ZAR")
 st.caption("✅ **13 WEEKS DISPLAY**: Most recent at top")
 st.caption("✅ **AUTO-FETCH**: Runs automatically on Fridays")
@@ -1572,4 +1391,6 @@ st.caption("✅ **DUPLICATE CHECK**: Won't fetch same data twice")
 st.caption("✅ **EDIT MODE**: Manually add/edit missing data")
 st.caption("✅ **TOGGLE SECTIONS**: Each analysis section can be hidden/shown")
 st.caption("✅ **BIAS SHIFT ALERTS**: Warns when positioning shifts >15% from 13-week average")
+st.caption("✅ **ALERT BACKTEST**: Replays bias-shift and 70% extreme alerts over all stored history")
 
+mark_startup_phase('ui drawn')
@@ -0,0 +1,138 @@
+import csv
+import io
+import zipfile
+
+import pytest
+
+import cftc_extractor
+from cftc_extractor import BACKFILL_COLUMNS, CombinedCFTCExtractor, backfill_from_archives, parse_archive_member
+
+REPORT_BLOCK = """\
+{name} - {exchange}                         Code-099741
+FUTURES ONLY POSITIONS AS OF 02/03/26                                |
+(CONTRACTS OF EUR 125,000)                                   OPEN INTEREST:   {oi:,}
+COMMITMENTS
+  {longs:,}   {shorts:,}    1,000   20,000   30,000   40,000   50,000    6,000    7,000
+{changes}
+PERCENT OF OPEN INTEREST FOR EACH CATEGORY OF TRADERS
+NUMBER OF TRADERS IN EACH CATEGORY (TOTAL TRADERS:   300)
+"""
+CHANGES_ROW = """CHANGES FROM 01/27/26 (CHANGE IN OPEN INTEREST:    -1,500)
+    -250      300        0     -100      100      -50       50       10      -10
+"""
+
+
+def report_text():
+    cme = 'CHICAGO MERCANTILE EXCHANGE'
+    return "<pre>\n" + "".join([
+        REPORT_BLOCK.format(name='EURO FX', exchange=cme, oi=90000, longs=150000, shorts=50000, changes=CHANGES_ROW),
+        REPORT_BLOCK.format(name='JAPANESE YEN', exchange=cme, oi=80000, longs=20000, shorts=60000, changes=''),
+        # Not one of the report exchanges: no name, so the block is skipped
+        REPORT_BLOCK.format(name='CRUDE OIL', exchange='NEW YORK MERCANTILE EXCHANGE',
+                            oi=1, longs=1, shorts=1, changes=''),
+    ]) + "</pre>\n"
+
+
+ARCHIVE_HEADER = [
+    'Market and Exchange Names', 'As of Date in Form YYMMDD', 'As of Date in Form YYYY-MM-DD',
+    'Open Interest (All)', 'Noncommercial Positions-Long (All)', 'Noncommercial Positions-Short (All)',
+]
+
+
+def write_archive(path, rows):
+    """Zip with one annual.txt member; rows are (name, YYYY-MM-DD, longs, shorts)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ARCHIVE_HEADER)
+    for name, day, longs, shorts in rows:
+        writer.writerow([name, day[2:].replace('-', ''), day, longs + shorts, longs, shorts])
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('annual.txt', buffer.getvalue())
+    return str(path)
+
+
+# -------------------------------
+# REPORT PARSER
+# -------------------------------
+def test_report_records_and_table():
+    extractor = CombinedCFTCExtractor()
+    data = extractor.parse_report_text(report_text(), 'CME')
+
+    assert extractor.report_date == '2026-02-03'
+    assert data == {
+        'EURO FX': {'longs': 150000, 'shorts': 50000, 'net': 100000,
+                    'long_percent': 75.0, 'short_percent': 25.0, 'total': 200000},
+        'JAPANESE YEN': {'longs': 20000, 'shorts': 60000, 'net': -40000,
+                         'long_percent': 25.0, 'short_percent': 75.0, 'total': 80000},
+    }
+    table = extractor.report_tables['CME']
+    assert table.contracts == ['EURO FX', 'JAPANESE YEN']
+    euro = table.get('EURO FX')
+    assert (euro['open_interest'], euro['noncomm_spread'], euro['nonrept_short']) == (90000, 1000, 7000)
+    assert (euro['chg_open_interest'], euro['chg_noncomm_long'], euro['chg_nonrept_short']) == (-1500, -250, -10)
+    assert euro['has_changes']
+    yen = table.get('JAPANESE YEN')
+    assert not yen['has_changes'] and yen['chg_open_interest'] == 0
+
+
+@pytest.mark.parametrize('chunk_chars', [3, 50, 1 << 16])
+def test_report_parse_does_not_depend_on_chunking(monkeypatch, chunk_chars):
+    text = report_text()
+    expected = CombinedCFTCExtractor().parse_report_text(text, 'CME')
+    monkeypatch.setattr(cftc_extractor, 'REPORT_CHUNK_CHARS', chunk_chars)
+    monkeypatch.setattr(cftc_extractor, 'REPORT_CHUNK_LINES', 2)
+
+    extractor = CombinedCFTCExtractor()
+    assert extractor.parse_report_text(text, 'CME') == expected
+    assert extractor.parse_report_stream(io.StringIO(text), 'FILE') == expected
+    assert extractor.parse_report_stream(iter(text.splitlines(True)), 'LINES') == expected
+    assert (extractor.report_tables['LINES'].rows == extractor.report_tables['CME'].rows).all()
+
+
+# -------------------------------
+# ARCHIVE BACKFILL
+# -------------------------------
+def test_archive_skips_exchanges_the_live_fetch_does_not_read(tmp_path):
+    path = write_archive(tmp_path / 'deacot2024.zip', [
+        ('CRUDE OIL, LIGHT SWEET - NEW YORK MERCANTILE EXCHANGE', '2024-01-02', 900, 100),
+        ('CRUDE OIL, LIGHT SWEET-WTI - ICE FUTURES EUROPE', '2024-01-02', 300, 100),
+        ('WHEAT-SRW - CHICAGO BOARD OF TRADE', '2024-01-02', 500, 500),
+        ('EURO FX - CHICAGO MERCANTILE EXCHANGE', '2024-01-02', 600, 400),
+    ])
+    rows = parse_archive_member(path, 'annual.txt')
+
+    assert sorted(rows) == ['CRUDE OIL/USD', 'EUR/USD']
+    assert rows['CRUDE OIL/USD'] == [('2024-01-02', 300, 100, 400, 75.0, 25.0, 200)]
+    assert rows['EUR/USD'] == [('2024-01-02', 600, 400, 1000, 60.0, 40.0, 200)]
+
+
+@pytest.mark.parametrize('order', [1, -1])
+def test_archive_same_name_on_two_exchanges_keeps_the_later_report_page(tmp_path, order):
+    listed = [
+        ('GOLD - COMMODITY EXCHANGE INC.', '2024-01-02', 700, 300),
+        ('GOLD - ICE FUTURES U.S.', '2024-01-02', 100, 100),
+    ]
+    path = write_archive(tmp_path / 'deacot2024.zip', listed[::order])
+    rows = parse_archive_member(path, 'annual.txt')
+
+    # ICE Futures U.S. comes after COMEX in the live fetch, so its row wins
+    assert rows['XAU/USD'] == [('2024-01-02', 100, 100, 200, 50.0, 50.0, 0)]
+
+
+def test_archive_switches_usd_base_pairs_and_merges_years(tmp_path):
+    write_archive(tmp_path / 'deacot2023.zip', [
+        ('JAPANESE YEN - CHICAGO MERCANTILE EXCHANGE', '2023-12-26', 200, 800),
+    ])
+    write_archive(tmp_path / 'deacot2024.zip', [
+        ('JAPANESE YEN - CHICAGO MERCANTILE EXCHANGE', '2024-01-02', 250, 750),
+        ('JAPANESE YEN - NEW YORK MERCANTILE EXCHANGE', '2024-01-02', 1, 1),
+    ])
+    backfill = backfill_from_archives([tmp_path], max_workers=1)
+
+    assert list(backfill) == ['USD/JPY']
+    usd_jpy = backfill['USD/JPY']
+    assert list(usd_jpy) == BACKFILL_COLUMNS
+    assert usd_jpy['Date'] == ['2023-12-26', '2024-01-02']
+    assert usd_jpy['Longs'] == [800, 750]
+    assert usd_jpy['Shorts'] == [200, 250]
+    assert usd_jpy['Net'] == [600, 500]
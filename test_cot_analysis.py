@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cot_analysis import (AVERAGE_WEEKS, BACKTEST_HORIZONS, BIAS_SHIFT_PCT, EXTREME_PCT, RSI_PERIOD, WilderRSIState,
+                          backtest_alerts, backtest_summary, wilder_rsi)
+from cot_store import derive_position_columns
+
+
+def reference_rsi(values, period=RSI_PERIOD):
+    """Textbook Wilder RSI, one week at a time"""
+    rsi = [np.nan] * len(values)
+    avg_gain = avg_loss = None
+    for i in range(1, len(values)):
+        change = values[i] - values[i - 1]
+        gain, loss = max(change, 0), max(-change, 0)
+        if i < period:
+            continue
+        if i == period:
+            changes = np.diff(values[:period + 1])
+            avg_gain = np.clip(changes, 0, None).mean()
+            avg_loss = np.clip(-changes, 0, None).mean()
+        else:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss > 0:
+            rsi[i] = 100 - 100 / (1 + avg_gain / avg_loss)
+        else:
+            rsi[i] = 100.0 if avg_gain > 0 else 50.0
+    return np.array(rsi)
+
+
+# -------------------------------
+# WILDER RSI
+# -------------------------------
+@pytest.mark.parametrize('seed', range(5))
+def test_wilder_rsi_matches_reference_loop(seed):
+    values = np.random.default_rng(seed).normal(0, 5000, 80).cumsum()
+    expected = reference_rsi(values)
+
+    np.testing.assert_allclose(wilder_rsi(values), expected, equal_nan=True)
+    state = WilderRSIState()
+    np.testing.assert_allclose([state.push(v) for v in values], expected, equal_nan=True)
+
+
+def test_wilder_rsi_columns_are_independent_histories():
+    rng = np.random.default_rng(7)
+    lengths = [40, RSI_PERIOD + 1, 25, RSI_PERIOD]
+    grid = np.full((max(lengths), len(lengths)), np.nan)
+    for i, n in enumerate(lengths):
+        grid[:n, i] = rng.normal(0, 1000, n).cumsum()
+
+    rsi = wilder_rsi(grid)
+    for i, n in enumerate(lengths):
+        np.testing.assert_allclose(rsi[:n, i], reference_rsi(grid[:n, i]), equal_nan=True)
+        assert np.isnan(rsi[n:, i]).all()
+    assert np.isnan(rsi[:, -1]).all()
+
+
+def test_wilder_rsi_flat_and_one_way_series():
+    weeks = np.arange(RSI_PERIOD + 5, dtype=float)
+    assert wilder_rsi(np.zeros_like(weeks))[-1] == 50.0
+    assert wilder_rsi(weeks)[-1] == 100.0
+    assert wilder_rsi(-weeks)[-1] == 0.0
+
+
+# -------------------------------
+# BACKTEST
+# -------------------------------
+def random_markets(lengths, seed=3, holes=0.0):
+    """Synthetic markets; ``holes`` is the share of Longs/Shorts values left blank"""
+    rng = np.random.default_rng(seed)
+    markets = {}
+    for i, weeks in enumerate(lengths):
+        longs = np.maximum(100, 50000 + rng.normal(0, 6000, weeks).cumsum()).astype(np.int64)
+        shorts = np.maximum(100, 30000 + rng.normal(0, 6000, weeks).cumsum()).astype(np.int64)
+        if holes:
+            longs = np.where(rng.random(weeks) < holes, np.nan, longs)
+            shorts = np.where(rng.random(weeks) < holes, np.nan, shorts)
+        markets[f'MKT{i}/USD'] = derive_position_columns(pd.DataFrame({
+            'Date': pd.date_range(end='2026-02-03', periods=weeks, freq='7D'),
+            'Longs': longs,
+            'Shorts': shorts,
+        }))
+    return markets
+
+
+def reference_backtest(markets_df):
+    """The latest-week alert rules applied to each week's trailing window, one week at a time"""
+    triggers = []
+    for market, df in markets_df.items():
+        previous = set()
+        for t in range(len(df)):
+            recent = df.iloc[max(0, t + 1 - AVERAGE_WEEKS):t + 1]
+            latest = recent.iloc[-1]
+            longs_vs_avg = (latest['Longs'] - recent['Longs'].mean()) / recent['Longs'].mean() * 100
+            shorts_vs_avg = (latest['Shorts'] - recent['Shorts'].mean()) / recent['Shorts'].mean() * 100
+            signals = {}
+            if longs_vs_avg > BIAS_SHIFT_PCT:
+                signals['LONGS BULLISH'] = longs_vs_avg
+            elif longs_vs_avg < -BIAS_SHIFT_PCT:
+                signals['LONGS BEARISH'] = longs_vs_avg
+            if shorts_vs_avg > BIAS_SHIFT_PCT:
+                signals['SHORTS BEARISH'] = shorts_vs_avg
+            elif shorts_vs_avg < -BIAS_SHIFT_PCT:
+                signals['SHORTS BULLISH'] = shorts_vs_avg
+            if latest['Long %'] >= EXTREME_PCT:
+                signals['EXTREME BULLISH'] = latest['Long %']
+            elif latest['Short %'] >= EXTREME_PCT:
+                signals['EXTREME BEARISH'] = latest['Short %']
+            for signal, value in signals.items():
+                ahead = [df['Net'].iloc[t + h] - latest['Net'] if t + h < len(df) else np.nan
+                         for h in BACKTEST_HORIZONS]
+                triggers.append((market, latest['Date'], signal, round(value, 1), signal not in previous, *ahead))
+            previous = set(signals)
+    return triggers
+
+
+@pytest.mark.parametrize('holes', [0.0, 0.1])
+@pytest.mark.parametrize('seed', range(3))
+def test_backtest_matches_reference_loop(seed, holes):
+    # blank weeks (a manual edit or missing input) drop out of the averages, as in recent.mean()
+    markets_df = random_markets([120, 30, AVERAGE_WEEKS - 1, 1], seed, holes)
+    expected = reference_backtest(markets_df)
+    triggers = backtest_alerts(markets_df)
+
+    assert len(triggers) == len(expected) > 0
+    columns = ['Market', 'Date', 'Signal', 'Value', 'New'] + [f'Net +{h}w' for h in BACKTEST_HORIZONS]
+    got = sorted(triggers[columns].itertuples(index=False, name=None), key=lambda t: t[:3])
+    expected = sorted(expected, key=lambda t: t[:3])
+    for row, want in zip(got, expected):
+        assert row[:3] == want[:3]
+        np.testing.assert_allclose(np.array(row[3:], dtype=float), np.array(want[3:], dtype=float),
+                                   atol=0.051, equal_nan=True)
+    assert triggers['Market'].is_monotonic_increasing
+
+
+def test_backtest_empty_and_summary_counts():
+    assert backtest_alerts({}).empty
+    assert backtest_summary(backtest_alerts({})).empty
+
+    markets_df = random_markets([120, 60])
+    triggers = backtest_alerts(markets_df)
+    summary = backtest_summary(triggers).set_index('Signal')
+    counts = triggers.groupby('Signal').size()
+    assert summary['Triggers'].sort_index().tolist() == counts.sort_index().tolist()
+    assert (summary['Runs'] <= summary['Triggers']).all()
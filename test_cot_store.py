@@ -0,0 +1,474 @@
+import pickle
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cot_store import (INTERPOLATED, JSON_STORE_NAME, STARTUP_SNAPSHOT_NAME, ColumnarStore, EditJournal, MarketStore,
+                       StartupSnapshot, StoreConflict, derive_position_columns, editor_changes,
+                       interpolate_missing_weeks, open_shared_data, upsert_positions)
+
+
+def market_frame(rows, interpolated=None):
+    """Date-sorted market frame in the store's column layout from (date, longs, shorts)"""
+    df = pd.DataFrame(rows, columns=['Date', 'Longs', 'Shorts'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Total'] = df['Longs'] + df['Shorts']
+    df['Long %'] = (df['Longs'] / df['Total'] * 100).round(1)
+    df['Short %'] = (df['Shorts'] / df['Total'] * 100).round(1)
+    df['Net'] = df['Longs'] - df['Shorts']
+    if interpolated is not None:
+        df[INTERPOLATED] = interpolated
+    return df
+
+
+def editor_frame(df):
+    """What the app hands to st.data_editor: string dates, Date/Longs/Shorts"""
+    shown = df[['Date', 'Longs', 'Shorts']].copy()
+    shown['Date'] = shown['Date'].dt.strftime('%Y-%m-%d')
+    return shown
+
+
+# -------------------------------
+# UPSERT
+# -------------------------------
+def test_derive_position_columns_zero_total_is_zero_percent():
+    df = pd.DataFrame({'Longs': [300, 0, 0], 'Shorts': [100, 0, 50]})
+    derive_position_columns(df)
+    assert df['Total'].tolist() == [400, 0, 50]
+    assert df['Long %'].tolist() == [75.0, 0.0, 0.0]
+    assert df['Short %'].tolist() == [25.0, 0.0, 100.0]
+    assert df['Net'].tolist() == [200, 0, -50]
+
+
+def test_upsert_replaces_adds_and_deletes_on_date():
+    df = market_frame([('2024-01-02', 100, 50), ('2024-01-09', 110, 60), ('2024-01-16', 120, 70)])
+    edited = pd.DataFrame({'Date': ['2024-01-23', '2024-01-09', None, '2024-01-09'],
+                           'Longs': [90, 1, None, 130.0], 'Shorts': [10, 1, None, 70.0]})
+
+    merged = upsert_positions(df, edited, deleted=[pd.Timestamp('2024-01-02')])
+    assert merged['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-09', '2024-01-16', '2024-01-23']
+    # the last row for a date wins, the blank row is ignored
+    assert merged.equals(market_frame([('2024-01-09', 130, 70), ('2024-01-16', 120, 70), ('2024-01-23', 90, 10)]))
+    assert merged['Longs'].dtype == df['Longs'].dtype
+    # the input frame is left alone
+    assert len(df) == 3 and df.loc[1, 'Longs'] == 110
+
+
+def test_upsert_fractional_positions_leave_the_column_float():
+    df = market_frame([('2024-01-02', 100, 50)])
+    merged = upsert_positions(df, pd.DataFrame({'Date': ['2024-01-09'], 'Longs': [10.5], 'Shorts': [2]}))
+    assert merged['Longs'].tolist() == [100.0, 10.5]
+    assert merged['Shorts'].dtype == df['Shorts'].dtype
+
+
+def test_upsert_keeps_or_takes_interpolated_flags():
+    df = market_frame([('2024-01-02', 100, 50), ('2024-01-09', 110, 60)], interpolated=[False, True])
+    new_week = pd.DataFrame({'Date': ['2024-01-16'], 'Longs': [1], 'Shorts': [1]})
+    assert upsert_positions(df, new_week)[INTERPOLATED].tolist() == [False, True, False]
+
+    filled = new_week.assign(**{INTERPOLATED: [True]})
+    assert upsert_positions(df, filled)[INTERPOLATED].tolist() == [False, True, True]
+    # a frame without the flag only gains it when the upsert carries one
+    plain = market_frame([('2024-01-02', 100, 50)])
+    assert INTERPOLATED not in upsert_positions(plain, new_week)
+    assert upsert_positions(plain, filled)[INTERPOLATED].tolist() == [False, True]
+
+
+@pytest.mark.parametrize('row', [
+    ('2024-01-09', -1, 5),
+    ('2024-01-09', 10, None),
+    ('2024-01-09', 'ten', 5),
+    (None, 10, 5),
+])
+def test_upsert_rejects_bad_rows(row):
+    df = market_frame([('2024-01-02', 100, 50)])
+    with pytest.raises(ValueError, match="non-negative"):
+        upsert_positions(df, pd.DataFrame([row], columns=['Date', 'Longs', 'Shorts']))
+
+
+# -------------------------------
+# GAP INTERPOLATION
+# -------------------------------
+def test_interpolation_fills_inside_gaps_linearly_in_time():
+    markets_df = {
+        'EUR/USD': market_frame([('2024-01-02', 100, 50), ('2024-01-23', 130, 80), ('2024-01-30', 100, 80)]),
+        # starts later and ends earlier than EUR/USD: nothing is filled outside its own range
+        'USD/JPY': market_frame([('2024-01-09', 0, 700), ('2024-01-16', 0, 0)]),
+        'GBP/USD': market_frame([('2024-01-02', 10, 10), ('2024-02-13', 17, 3)]),
+    }
+    gaps = interpolate_missing_weeks(markets_df)
+
+    assert sorted(gaps) == ['EUR/USD', 'GBP/USD']
+    euro = gaps['EUR/USD']
+    assert list(euro.columns) == ['Date', 'Longs', 'Shorts', INTERPOLATED]
+    assert euro['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-09', '2024-01-16']
+    assert euro['Longs'].tolist() == [110, 120]
+    assert euro['Shorts'].tolist() == [60, 70]
+    assert euro[INTERPOLATED].all()
+
+    pound = gaps['GBP/USD']
+    assert pound['Date'].tolist() == list(pd.date_range('2024-01-09', '2024-02-06', freq='7D'))
+    weeks = np.arange(1, 6)
+    assert pound['Longs'].tolist() == np.interp(weeks, [0, 6], [10, 17]).round().tolist()
+    assert pound['Shorts'].tolist() == np.interp(weeks, [0, 6], [10, 3]).round().tolist()
+
+
+def test_interpolation_snaps_report_dates_to_tuesdays():
+    # a Friday release date and a Monday holiday shift still count as the Tuesday week
+    markets_df = {'EUR/USD': market_frame([('2024-01-05', 100, 50), ('2024-01-15', 110, 60), ('2024-01-30', 140, 90)])}
+    gaps = interpolate_missing_weeks(markets_df)
+
+    # weeks of 01-02, 01-16 and 01-30 reported
+    assert gaps['EUR/USD']['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-09', '2024-01-23']
+    assert gaps['EUR/USD'][['Longs', 'Shorts']].values.tolist() == [[105, 55], [125, 75]]
+
+
+def test_interpolation_without_gaps_or_for_other_markets_is_empty():
+    markets_df = {
+        'EUR/USD': market_frame([('2024-01-02', 100, 50), ('2024-01-16', 120, 70)]),
+        'USD/JPY': market_frame([('2024-01-02', 100, 50), ('2024-01-09', 120, 70)]),
+        'AUD/USD': market_frame([('2024-01-02', 100, 50)]),
+    }
+    assert interpolate_missing_weeks(markets_df, ['USD/JPY', 'AUD/USD', 'NZD/USD']) == {}
+    assert list(interpolate_missing_weeks(markets_df)) == ['EUR/USD']
+
+
+# -------------------------------
+# EDITOR CHANGES
+# -------------------------------
+def test_editor_changes_only_touch_edited_rows():
+    df = market_frame([('2024-01-02', 100, 50), ('2024-01-09', 110, 60), ('2024-01-16', 120, 70)],
+                      interpolated=[False, True, False])
+    shown = editor_frame(df)
+    edited = shown.copy()
+    edited.loc[2, 'Longs'] = 200.0
+
+    upserts, deleted = editor_changes(shown, edited)
+    assert upserts['Date'].tolist() == [pd.Timestamp('2024-01-16')]
+    assert deleted.tolist() == [pd.Timestamp('2024-01-16')]
+
+    merged = upsert_positions(df, upserts, deleted)
+    assert list(merged.columns) == list(df.columns)
+    assert merged[INTERPOLATED].tolist() == [False, True, False]
+    assert merged.loc[2, ['Longs', 'Total', 'Net']].tolist() == [200, 270, 130]
+    assert merged.loc[:1].equals(df.loc[:1])
+
+
+def test_editor_changes_unchanged_editor_is_a_no_op():
+    df = market_frame([('2024-01-02', 100, 50), ('2024-01-09', 110, 60)], interpolated=[True, False])
+    shown = editor_frame(df)
+
+    upserts, deleted = editor_changes(shown, shown.astype({'Longs': float, 'Shorts': float}))
+    assert upserts.empty and deleted.empty
+    assert upsert_positions(df, upserts, deleted).equals(df)
+
+
+def test_editor_changes_redated_removed_and_added_rows():
+    df = market_frame([('2024-01-02', 100, 50), ('2024-01-09', 110, 60), ('2024-01-16', 120, 70)])
+    shown = editor_frame(df)
+    edited = shown.drop(index=0)
+    edited.loc[1, 'Date'] = '2024-01-10'
+    edited.loc[7] = ['2024-01-23', 0, 0]
+
+    merged = upsert_positions(df, *editor_changes(shown, edited))
+    assert merged['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-10', '2024-01-16', '2024-01-23']
+    # A zero total gives 0 % rather than NaN
+    assert merged.iloc[-1][['Total', 'Long %', 'Short %', 'Net']].tolist() == [0, 0, 0, 0]
+
+
+# -------------------------------
+# EDIT JOURNAL
+# -------------------------------
+def journal_edit(journal, author, longs):
+    before = market_frame([('2024-01-02', 100, 50)])
+    after = market_frame([('2024-01-02', longs, 50)])
+    return journal.record(f"edit by {author}", {'EUR/USD': (before, after)}, author=author)
+
+
+def test_journal_undo_and_redo_are_per_author(tmp_path):
+    journal = EditJournal(tmp_path / 'edit_journal.json')
+    first_a = journal_edit(journal, 'a', 110)
+    only_b = journal_edit(journal, 'b', 120)
+    last_a = journal_edit(journal, 'a', 130)
+
+    assert journal.peek('a') == (last_a, None)
+    assert journal.peek('b') == (only_b, None)
+    assert journal.peek('c') == (None, None)
+
+    # b may not move a's entry, nor a b's
+    assert not journal.done(last_a | {'author': 'b'})
+    assert journal.done(only_b)
+    assert journal.peek('b') == (None, only_b)
+    assert journal.peek('a') == (last_a, None)
+    # only the latest entry of an author can be undone
+    assert not journal.done(first_a)
+
+    # a new edit by a clears a's redo stack, not b's
+    assert journal.done(last_a)
+    journal_edit(journal, 'a', 140)
+    assert journal.peek('a')[1] is None
+    assert journal.peek('b') == (None, only_b)
+
+
+def test_journal_limit_applies_per_author(tmp_path):
+    journal = EditJournal(tmp_path / 'edit_journal.json', limit=2)
+    kept_b = journal_edit(journal, 'b', 105)
+    for longs in (110, 120, 130):
+        journal_edit(journal, 'a', longs)
+
+    # a's oldest edit (id 2) is dropped, b's stays
+    assert [e['id'] for e in journal._read()['undo']] == [kept_b['id'], 3, 4]
+    assert journal.peek('b')[0] == kept_b
+
+
+# -------------------------------
+# WRITE-AHEAD LOG STORE
+# -------------------------------
+def weekly_markets(longs):
+    return {
+        'EUR/USD': market_frame([('2024-01-02', longs, 50), ('2024-01-09', 110, 60)]),
+        'USD/JPY': market_frame([('2024-01-02', 300, 400)]),
+    }
+
+
+def test_wal_replay_stops_at_a_torn_record_and_next_append_cuts_it(tmp_path):
+    store = MarketStore(tmp_path / 'market_data.json')
+    store.sync(weekly_markets(100))
+    store.sync(weekly_markets(120))
+    assert store.wal_records == 2
+    # A crash mid-append leaves a record without its newline
+    with open(store.wal_path, 'ab') as f:
+        f.write(b'0badf00d\t{"seq":3,"ops":[{"op":"drop","mar')
+
+    reopened = MarketStore(store.snapshot_path)
+    loaded = reopened.load()
+    assert reopened.seq == 2
+    assert sorted(loaded) == ['EUR/USD', 'USD/JPY']
+    assert loaded['EUR/USD'].equals(weekly_markets(120)['EUR/USD'])
+
+    assert reopened.sync(weekly_markets(130)) == ['EUR/USD']
+    assert store.wal_path.read_bytes().endswith(b'\n')
+    again = MarketStore(store.snapshot_path)
+    assert again.load()['EUR/USD'].equals(weekly_markets(130)['EUR/USD'])
+    assert again.seq == 3 and again.wal_records == 3
+
+
+def test_wal_record_with_bad_checksum_ends_replay(tmp_path):
+    store = MarketStore(tmp_path / 'market_data.json')
+    store.sync(weekly_markets(100))
+    store.sync(weekly_markets(120))
+    lines = store.wal_path.read_bytes().splitlines(True)
+    store.wal_path.write_bytes(lines[0] + b'00000000' + lines[1][8:])
+
+    reopened = MarketStore(store.snapshot_path)
+    assert reopened.load()['EUR/USD'].equals(weekly_markets(100)['EUR/USD'])
+    assert reopened.seq == 1
+
+
+def test_wal_compaction_folds_the_log_into_the_snapshot(tmp_path):
+    store = MarketStore(tmp_path / 'market_data.json', compact_records=3)
+    for longs in (100, 110, 120):
+        store.sync(weekly_markets(longs))
+    # The third record triggered a compaction
+    assert store.wal_records == 0
+    assert store.wal_path.read_bytes() == b''
+    store.sync(weekly_markets(130))
+    store.sync({'EUR/USD': weekly_markets(140)['EUR/USD']})
+
+    reopened = MarketStore(store.snapshot_path)
+    loaded = reopened.load()
+    assert (reopened.seq, reopened.wal_records) == (5, 2)
+    assert sorted(loaded) == ['EUR/USD']
+    assert loaded['EUR/USD'].equals(weekly_markets(140)['EUR/USD'])
+
+    reopened.compact()
+    assert reopened.wal_path.read_bytes() == b''
+    compacted = MarketStore(store.snapshot_path)
+    assert compacted.load()['EUR/USD'].equals(loaded['EUR/USD'])
+    assert compacted.seq == 5
+
+
+def test_wal_records_at_or_below_the_snapshot_seq_are_skipped(tmp_path):
+    store = MarketStore(tmp_path / 'market_data.json')
+    store.sync(weekly_markets(100))
+    stale_log = store.wal_path.read_bytes()
+    store.compact()
+    store.sync(weekly_markets(120))
+    # A crash between the snapshot replace and the log truncate leaves old records behind
+    store.wal_path.write_bytes(stale_log + store.wal_path.read_bytes())
+
+    reopened = MarketStore(store.snapshot_path)
+    assert reopened.load()['EUR/USD'].equals(weekly_markets(120)['EUR/USD'])
+    assert (reopened.seq, reopened.wal_records) == (2, 1)
+
+
+# -------------------------------
+# COLUMNAR STORE
+# -------------------------------
+def test_columnar_sync_skips_markets_that_only_changed_dtype(tmp_path):
+    store = ColumnarStore(tmp_path / 'columnar')
+    assert store.sync(weekly_markets(100)) == ['EUR/USD', 'USD/JPY']
+    files = {m: e['file'] for m, e in store.manifest.items()}
+
+    # what an editor round trip hands back: the same numbers as floats
+    floats = {m: df.astype({'Longs': float, 'Shorts': float, 'Net': float}) for m, df in weekly_markets(100).items()}
+    assert store.sync(floats) == []
+    assert {m: e['file'] for m, e in store.manifest.items()} == files
+
+    floats['EUR/USD'].loc[1, 'Longs'] = 110.5
+    assert store.sync(floats) == ['EUR/USD']
+    assert ColumnarStore(tmp_path / 'columnar').load()['EUR/USD']['Longs'].tolist() == [100.0, 110.5]
+
+
+# -------------------------------
+# STARTUP SNAPSHOT
+# -------------------------------
+def snapshot_markets():
+    markets_df = weekly_markets(100)
+    # flags with gaps come back from the JSON store as an object column
+    markets_df['EUR/USD'][INTERPOLATED] = np.array([True, None], dtype=object)
+    return markets_df
+
+
+def saved_snapshot(tmp_path):
+    store = MarketStore(tmp_path / 'market_data.json')
+    store.sync(snapshot_markets())
+    snapshot = StartupSnapshot(tmp_path / 'startup_snapshot.npz', MarketStore(store.snapshot_path))
+    assert snapshot.load() is None and snapshot.status == 'missing'
+    snapshot.save(store.load(), snapshot.signature, store.export_state())
+    return store, snapshot
+
+
+def test_snapshot_round_trip_and_adopt(tmp_path):
+    store, snapshot = saved_snapshot(tmp_path)
+    loaded = snapshot.load()
+
+    assert snapshot.status == 'valid'
+    assert sorted(loaded) == ['EUR/USD', 'USD/JPY']
+    for market, df in store.load().items():
+        pd.testing.assert_frame_equal(loaded[market], df)
+    assert snapshot.store.export_state() == store.export_state()
+
+
+def test_snapshot_is_stale_once_the_store_changes(tmp_path):
+    store, snapshot = saved_snapshot(tmp_path)
+    store.sync(weekly_markets(120))
+    assert snapshot.load() is None and snapshot.status == 'stale'
+
+
+class Planted:
+    ran = False
+
+    def __reduce__(self):
+        return (setattr, (Planted, 'ran', True))
+
+
+def test_snapshot_never_unpickles(tmp_path):
+    store, snapshot = saved_snapshot(tmp_path)
+    with open(snapshot.path, 'wb') as f:
+        pickle.dump(Planted(), f)
+    assert snapshot.load() is None and snapshot.status == 'unreadable'
+    assert not Planted.ran
+
+
+# -------------------------------
+# STARTUP REGRESSIONS (see benchmarks/bench_startup.py)
+# -------------------------------
+def test_startup_loads_the_snapshot_without_rebuilding_it(tmp_path):
+    rng = np.random.default_rng(5)
+    weeks = 20 * 52
+    dates = pd.date_range(end='2026-02-03', periods=weeks, freq='7D')
+    MarketStore(tmp_path / JSON_STORE_NAME).sync({
+        f'MKT{i:02d}/USD': derive_position_columns(pd.DataFrame({
+            'Date': dates, 'Longs': rng.integers(1000, 400000, weeks), 'Shorts': rng.integers(1000, 400000, weeks),
+        }))
+        for i in range(21)
+    })
+    snapshot_path = tmp_path / STARTUP_SNAPSHOT_NAME
+
+    # First launch reads the store and writes the snapshot in the background
+    first = open_shared_data(tmp_path, snapshot_path=snapshot_path)
+    _, expected = first.view()
+    assert first.last_load['source'] == 'store'
+    deadline = time.monotonic() + 30
+    while (not snapshot_path.exists() or str(snapshot_path) in StartupSnapshot._rebuilding) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    written = snapshot_path.stat().st_mtime_ns
+
+    started = time.perf_counter()
+    shared = open_shared_data(tmp_path, snapshot_path=snapshot_path)
+    _, loaded = shared.view()
+    seconds = time.perf_counter() - started
+
+    assert shared.last_load['source'] == 'snapshot'
+    assert shared.last_load['snapshot'] == 'valid'
+    assert not StartupSnapshot._rebuilding
+    assert snapshot_path.stat().st_mtime_ns == written
+    assert sorted(loaded) == sorted(expected)
+    pd.testing.assert_frame_equal(loaded['MKT00/USD'], expected['MKT00/USD'])
+    # ~50 ms on a laptop; the bound only catches a fall back to JSON replay or worse
+    assert seconds < 2.0
+
+
+def test_app_modules_import_without_the_lazy_dependencies():
+    lazy = ['requests', 'sqlite3', 'concurrent.futures.process']
+    code = ("import sys, cftc_extractor, cot_store, cot_analysis, cot_report; "
+            f"print([m for m in {lazy!r} if m in sys.modules])")
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=str(Path(__file__).parent)).stdout
+    assert out.strip() == '[]'
+
+
+# -------------------------------
+# SHARED DATA / CONFLICTS
+# -------------------------------
+@pytest.fixture(params=['json', 'columnar', 'sqlite'])
+def two_processes(tmp_path, request):
+    """Two SharedMarketData over one store directory, as two app processes would hold them"""
+    first = open_shared_data(tmp_path, request.param)
+    first.sync(weekly_markets(100))
+    return first, open_shared_data(tmp_path, request.param)
+
+
+def test_stale_write_to_the_same_market_conflicts(two_processes):
+    first, second = two_processes
+    base_a, frames_a = first.view()
+    base_b, frames_b = second.view()
+    assert base_a == base_b
+
+    frames_a['EUR/USD'] = weekly_markets(120)['EUR/USD']
+    written, base_a = first.sync(frames_a, ['EUR/USD'], base_a)
+    assert written == ['EUR/USD'] and base_a > base_b
+
+    frames_b['EUR/USD'] = weekly_markets(130)['EUR/USD']
+    with pytest.raises(StoreConflict) as conflict:
+        second.sync(frames_b, ['EUR/USD'], base_b)
+    assert conflict.value.markets == ['EUR/USD']
+    # The refused write left the first process's rows in place
+    assert second.view()[1]['EUR/USD'].equals(weekly_markets(120)['EUR/USD'])
+
+
+def test_stale_write_to_another_market_goes_through(two_processes):
+    first, second = two_processes
+    base_a, frames_a = first.view()
+    base_b, frames_b = second.view()
+
+    frames_a['EUR/USD'] = weekly_markets(120)['EUR/USD']
+    first.sync(frames_a, ['EUR/USD'], base_a)
+    frames_b['USD/JPY'] = market_frame([('2024-01-02', 350, 400)])
+    written, new_base = second.sync(frames_b, ['USD/JPY'], base_b)
+
+    assert written == ['USD/JPY']
+    # Someone else wrote since base_b, so the base does not move
+    assert new_base == base_b
+    _, merged = first.view()
+    assert merged['EUR/USD'].equals(weekly_markets(120)['EUR/USD'])
+    assert merged['USD/JPY'].equals(frames_b['USD/JPY'])
+    # ...and the stale EUR/USD frame second still holds keeps conflicting
+    with pytest.raises(StoreConflict):
+        second.sync(frames_b, ['EUR/USD'], new_base)